@@ -10,39 +10,118 @@ st.set_page_config(
 )
 
 # Importar componentes y utilidades
+from utils.rerun_timing import APP_SCOPE, RerunTimer
+
+# Medir el tiempo de script de la ejecución completa
+app_timer = RerunTimer(APP_SCOPE)
+
 from components.header import render_header
 from components.document_selector import render_document_selector
-from components.analysis_cards import render_analysis_cards
-from utils.session import initialize_session_state, update_analysis_state, clear_selection
+from components.memory_panel import render_memory_panel
+from components.metrics_panel import render_metrics_panel, start_metrics_export
+from components.rerun_timing import render_rerun_timing
+from components.analysis_cards import (render_analysis_cards, render_cards_html, create_section_placeholders,
+                                      update_section_placeholder)
+from utils.session import (initialize_session_state, update_analysis_state, track_session_memory,
+                           get_analysis_results, get_analysis_view, get_selected_documents,
+                           on_new_analysis, request_analysis)
 from utils.rest_api import initialize_api_client, load_available_documents, analyze_selected_documents
-from utils.pdf_generator import create_download_button
+from utils.pdf_generator import create_download_button, start_pdf_prerender
+
+# Exportar las métricas para Prometheus (opcional, ver [metrics] en los secrets)
+start_metrics_export()
 
 # Inicializar estado de la sesión
 initialize_session_state()
 
+# Contabilizar la memoria de la sesión y aplicar el presupuesto global
+track_session_memory()
+
 # Inicializar cliente de API
 initialize_api_client()
 
-# Cargar documentos disponibles (solo si no están ya cargados o son None)
-if 'available_documents' not in st.session_state or st.session_state.available_documents is None or len(st.session_state.available_documents) == 0:
-    with st.spinner("Cargando documentos disponibles..."):
-        documents = load_available_documents()
+# Cargar documentos disponibles desde la caché compartida (solo espera al API en la primera carga)
+with st.spinner("Cargando documentos disponibles..."):
+    documents = load_available_documents()
 
 # Renderizar encabezado
 render_header()
 
-# Renderizar selector de documentos
-selected_documents = render_document_selector()
+# Panel de memoria por sesión (opcional, ver [memory] en los secrets)
+render_memory_panel()
+
+# Panel de métricas (opcional, ver [metrics] en los secrets)
+render_metrics_panel()
+
+# Los fragmentos se vuelven a ejecutar solos cuando cambian sus propios widgets.
+# Leen los resultados de la sesión en vez de recibirlos como argumentos, para
+# que Streamlit no los retenga entre ejecuciones (ver utils.session_memory).
+
+@st.fragment
+def selector_fragment():
+    """Selector de documentos y botón de análisis."""
+    timer = RerunTimer("selector")
+    
+    # Renderizar selector de documentos
+    selected_documents = render_document_selector()
+    
+    # Botón para generar análisis
+    col1, col2, col3 = st.columns([2, 1, 2])
+    with col2:
+        # El análisis y sus resultados se muestran fuera del fragmento: el callback pide la página completa
+        st.button(
+            "Generar Análisis",
+            disabled=len(selected_documents) == 0,
+            help="Generar análisis completo de los documentos seleccionados",
+            type="primary",
+            on_click=request_analysis
+        )
+        st.checkbox(
+            "Forzar nuevo análisis",
+            key="force_refresh",
+            help="Ignora los resultados en caché y solicita un análisis nuevo al API"
+        )
+    
+    render_rerun_timing(timer)
+
+@st.fragment
+def results_fragment():
+    """Tarjetas de resultados (sin widgets: solo cambian con una ejecución completa)."""
+    timer = RerunTimer("results")
+    api_results = get_analysis_results()
+    if api_results is None:
+        return
+    
+    # El HTML de las tarjetas se calcula una vez por resultado
+    render_analysis_cards(api_results, get_analysis_view("cards_html", render_cards_html))
+    render_rerun_timing(timer)
+
+@st.fragment
+def export_fragment():
+    """Descarga del PDF y botón de nuevo análisis."""
+    timer = RerunTimer("export")
+    api_results = get_analysis_results()
+    if api_results is None:
+        return
+    
+    # Botones de acción
+    st.markdown("---")
+    col1, col2, col3 = st.columns([1, 1, 1])
+    
+    with col1:
+        # Botón para descargar PDF
+        create_download_button(api_results, get_selected_documents())
+    
+    with col3:
+        # Botón para nuevo análisis
+        st.button("Nuevo Análisis", type="secondary", on_click=on_new_analysis)
+    
+    render_rerun_timing(timer)
 
-# Botón para generar análisis
-col1, col2, col3 = st.columns([2, 1, 2])
-with col2:
-    generate_clicked = st.button(
-        "Generar Análisis",
-        disabled=len(selected_documents) == 0,
-        help="Generar análisis completo de los documentos seleccionados",
-        type="primary"
-    )
+selector_fragment()
+selected_documents = get_selected_documents()
+force_refresh = st.session_state.get("force_refresh", False)
+generate_clicked = st.session_state.pop("analysis_requested", False)
 
 # Procesar análisis cuando se hace clic en el botón
 if generate_clicked and selected_documents:
@@ -54,22 +133,50 @@ if generate_clicked and selected_documents:
         "analysis_id": None
     })
     
+    # En modo jobs o streaming se muestra el progreso real informado por el API
+    api_client = st.session_state.api_client
+    progress_bar = (st.progress(0, text="Generando análisis...")
+                    if api_client.jobs_url or api_client.stream_url else None)
+    
+    def show_progress(state):
+        update_analysis_state(state)
+        if progress_bar:
+            progress_bar.progress(min(int(state["progress"]), 100), text=state["message"])
+    
+    # En modo streaming cada tarjeta se rellena en cuanto llega su sección
+    stream_area = st.empty() if api_client.stream_url else None
+    section_placeholders = {}
+    if stream_area is not None:
+        with stream_area.container():
+            section_placeholders = create_section_placeholders()
+    
+    def show_section(section, partial_results):
+        if section_placeholders:
+            update_section_placeholder(section_placeholders, section, partial_results)
+    
     # Mostrar un spinner durante el procesamiento
     with st.spinner("Procesando análisis..."):
         # Solicitar análisis
-        success, results = analyze_selected_documents(selected_documents)
+        success, results = analyze_selected_documents(selected_documents, force_refresh=force_refresh,
+                                                      on_progress=show_progress, on_section=show_section)
+        
+        if progress_bar:
+            progress_bar.empty()
+        
+        # Las tarjetas definitivas se renderizan más abajo con los resultados completos
+        if stream_area is not None:
+            stream_area.empty()
         
         if success and results:
-            # Actualizar estado a "completado"
+            # Actualizar estado a "completado" (conservando el analysis_id del modo jobs)
             update_analysis_state({
                 "status": "complete",
                 "progress": 100,
-                "message": "Análisis completado",
-                "analysis_id": None
+                "message": "Análisis completado"
             })
             
-            # Guardar resultados
-            st.session_state.api_results = results
+            # Empezar a generar el PDF en segundo plano (si está activado)
+            start_pdf_prerender(results, selected_documents)
         else:
             # Actualizar estado a "error"
             update_analysis_state({
@@ -82,27 +189,10 @@ if generate_clicked and selected_documents:
             st.error("No se pudo completar el análisis. Por favor, intente nuevamente.")
 
 # Mostrar resultados si existen
-if st.session_state.api_results and st.session_state.analysis_state["status"] == "complete":
-    st.markdown("---")
-    render_analysis_cards(st.session_state.api_results)
-    
-    # Botones de acción
+api_results = get_analysis_results() if st.session_state.analysis_state["status"] == "complete" else None
+if api_results:
     st.markdown("---")
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    with col1:
-        # Botón para descargar PDF
-        create_download_button(st.session_state.api_results, selected_documents)
-    
-    with col3:
-        # Botón para nuevo análisis
-        if st.button("Nuevo Análisis", type="secondary"):
-            clear_selection()
-            st.session_state.api_results = None
-            st.session_state.analysis_state = {
-                "status": "idle",
-                "progress": 0,
-                "message": "",
-                "analysis_id": None
-            }
-            st.rerun()
\ No newline at end of file
+    results_fragment()
+    export_fragment()
+
+render_rerun_timing(app_timer)
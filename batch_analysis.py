@@ -0,0 +1,307 @@
+"""
+Análisis por lotes sin interfaz (fuera de Streamlit).
+
+Lee un manifiesto con conjuntos de números de documento y los analiza con un pool
+de hilos acotado y un límite de solicitudes por segundo. Por cada conjunto escribe
+<salida>/<id>.json (resultados procesados) y <salida>/<id>.pdf.
+
+Es reanudable: cada conjunto terminado se registra en <salida>/batch_state.jsonl y
+los archivos se escriben de forma atómica, por lo que al volver a ejecutar el mismo
+comando tras una caída solo se procesan los conjuntos pendientes o con error.
+
+Formato del manifiesto (JSON Lines, un conjunto por línea; también se acepta un
+archivo .json con una lista de conjuntos):
+    {"id": "circular-2024-01", "document_numbers": ["2020029582", "2020029583"]}
+    ["2020029582", "2020029583"]
+
+Uso:
+    python batch_analysis.py manifiesto.jsonl --output salida/ --workers 4 --rate 2
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from utils.rest_api import DocumentAnalysisAPI
+from utils.pdf_generator import generate_analysis_pdf_fixed
+from utils.result_cache import AnalysisResultCache, canonical_document_numbers, canonical_key
+
+logger = logging.getLogger("batch_analysis")
+
+DEFAULT_SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+STATE_FILENAME = "batch_state.jsonl"
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """
+    Lee la configuración (secciones [api] y [cognito]) desde un archivo TOML,
+    normalmente el mismo .streamlit/secrets.toml que usa la aplicación.
+
+    Args:
+        path: Ruta del archivo TOML
+
+    Returns:
+        Dict: Configuración
+    """
+    try:
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except ImportError:
+        # Python < 3.11: toml ya es dependencia de Streamlit
+        import toml
+        with open(path, "r", encoding="utf-8") as f:
+            return toml.load(f)
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Lee el manifiesto de conjuntos de documentos.
+
+    Args:
+        path: Ruta del manifiesto (.jsonl o .json)
+
+    Returns:
+        List[Dict]: Conjuntos con id y document_numbers canónicos (sin duplicados, ordenados)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            raw_entries = json.load(f)
+        else:
+            raw_entries = [json.loads(line) for line in f if line.strip()]
+
+    entries = []
+    seen: Set[str] = set()
+    for raw in raw_entries:
+        if isinstance(raw, dict):
+            numbers = raw.get("document_numbers", [])
+            entry_id = raw.get("id")
+        else:
+            numbers = raw
+            entry_id = None
+
+        numbers = list(canonical_document_numbers(numbers))
+        if not numbers:
+            logger.warning("Conjunto sin números de documento omitido: %s", raw)
+            continue
+
+        # Sin id explícito, el id es la clave de contenido del conjunto
+        entry_id = str(entry_id or canonical_key(numbers)[:16])
+        if entry_id in seen:
+            logger.warning("Id repetido en el manifiesto, se omite: %s", entry_id)
+            continue
+        seen.add(entry_id)
+        entries.append({"id": entry_id, "document_numbers": numbers})
+
+    return entries
+
+
+class RateLimiter:
+    """Limitador de tipo token bucket compartido por todos los hilos."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Solicitudes por segundo permitidas (0 o menos: sin límite)
+            burst: Solicitudes que se pueden hacer de golpe
+        """
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que se pueda hacer una solicitud."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ErrorCollector:
+    """Recibe los mensajes de error del cliente y los separa por hilo de trabajo."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, message: str):
+        logger.error(message)
+        self.messages().append(message)
+
+    def messages(self) -> List[str]:
+        if not hasattr(self._local, "messages"):
+            self._local.messages = []
+        return self._local.messages
+
+    def reset(self):
+        self._local.messages = []
+
+
+class BatchState:
+    """Registro de conjuntos terminados (JSON Lines de solo anexado)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Última línea truncada por una caída
+                        continue
+                    if record.get("status") == "done":
+                        self.done.add(record["id"])
+                    else:
+                        self.done.discard(record["id"])
+
+    def record(self, entry_id: str, status: str, **details):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"id": entry_id, "status": status, "at": time.time(), **details}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if status == "done":
+                self.done.add(entry_id)
+
+
+def write_atomic(path: str, data: bytes):
+    """Escribe un archivo completo o nada (archivo temporal + os.replace)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def process_entry(entry: Dict[str, Any], client: DocumentAnalysisAPI, errors: ErrorCollector,
+                  limiter: RateLimiter, output_dir: str, document_names: Dict[str, str],
+                  cache: Optional[AnalysisResultCache]) -> Dict[str, Any]:
+    """
+    Analiza un conjunto y escribe sus resultados en JSON y PDF.
+
+    Returns:
+        Dict: Detalle del resultado (status, seconds, cached y error si corresponde)
+    """
+    errors.reset()
+    entry_id = entry["id"]
+    numbers = entry["document_numbers"]
+    start = time.perf_counter()
+
+    cache_key = canonical_key(numbers, client.model_tag)
+    results = cache.get(cache_key) if cache else None
+    cached = results is not None
+
+    if not cached:
+        limiter.acquire()
+        results = client.request_analysis(
+            numbers,
+            on_progress=lambda state: logger.info("[%s] %s%% %s", entry_id, state["progress"], state["message"])
+        )
+        if not results:
+            return {"status": "error", "error": "; ".join(errors.messages()) or "Análisis sin resultados"}
+        if cache:
+            cache.put(cache_key, results)
+
+    processed = client.process_analysis_results(results)
+
+    write_atomic(os.path.join(output_dir, f"{entry_id}.json"), json.dumps({
+        "id": entry_id,
+        "document_numbers": numbers,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "results": processed.to_dict(),
+    }, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    selected_documents = [{"number": number, "name": document_names.get(number, number)} for number in numbers]
+    pdf_data = generate_analysis_pdf_fixed(processed, selected_documents, on_error=errors)
+    if not pdf_data:
+        return {"status": "error", "error": "; ".join(errors.messages()) or "No se pudo generar el PDF"}
+    write_atomic(os.path.join(output_dir, f"{entry_id}.pdf"), pdf_data)
+
+    return {"status": "done", "seconds": round(time.perf_counter() - start, 3), "cached": cached}
+
+
+def load_document_names(client: DocumentAnalysisAPI) -> Dict[str, str]:
+    """Descarga el catálogo una vez para poner nombres en los PDF (opcional)."""
+    try:
+        catalog, _, _ = client.fetch_documents(as_store=True)
+        return {catalog.number(row): catalog.name(row) for row in range(len(catalog))}
+    except Exception as e:
+        logger.warning("No se pudo cargar el catálogo; los PDF usarán solo números: %s", e)
+        return {}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Análisis documentario por lotes (sin Streamlit)")
+    parser.add_argument("manifest", help="Manifiesto .jsonl/.json con los conjuntos de documentos")
+    parser.add_argument("--output", default="batch_output", help="Directorio de salida")
+    parser.add_argument("--config", default=DEFAULT_SECRETS_PATH, help="Archivo TOML con [api] y [cognito]")
+    parser.add_argument("--workers", type=int, default=4, help="Análisis simultáneos")
+    parser.add_argument("--rate", type=float, default=1.0, help="Solicitudes de análisis por segundo (0: sin límite)")
+    parser.add_argument("--cache", default=None, help="Ruta SQLite de la caché de resultados (opcional)")
+    parser.add_argument("--no-names", action="store_true", help="No descargar el catálogo para los nombres")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    os.makedirs(args.output, exist_ok=True)
+    state = BatchState(os.path.join(args.output, STATE_FILENAME))
+
+    entries = load_manifest(args.manifest)
+    pending = [entry for entry in entries if entry["id"] not in state.done]
+    logger.info("%d conjuntos en el manifiesto, %d ya terminados, %d pendientes",
+                len(entries), len(entries) - len(pending), len(pending))
+    if not pending:
+        return 0
+
+    errors = ErrorCollector()
+    client = DocumentAnalysisAPI(config=load_config(args.config), on_error=errors)
+    limiter = RateLimiter(args.rate, burst=args.workers)
+    cache = AnalysisResultCache(args.cache) if args.cache else None
+    document_names = {} if args.no_names else load_document_names(client)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        futures = {
+            executor.submit(process_entry, entry, client, errors, limiter, args.output, document_names, cache): entry
+            for entry in pending
+        }
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {"status": "error", "error": f"Error inesperado: {e}"}
+
+            state.record(entry["id"], **outcome)
+            if outcome["status"] == "done":
+                logger.info("[%s] terminado en %ss%s", entry["id"], outcome["seconds"],
+                            " (caché)" if outcome.get("cached") else "")
+            else:
+                failed += 1
+                logger.error("[%s] con error: %s", entry["id"], outcome["error"])
+
+    logger.info("Lote terminado: %d correctos, %d con error", len(pending) - failed, failed)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark del HTML de las tarjetas de resultados por ejecución: ruta original
+(siete bloques f-string por ejecución y referencias concatenadas con +=) frente
+a render_cards_html (una pasada, con escape) y a la vista memorizada que se
+reutiliza en las ejecuciones siguientes.
+
+Uso:
+    python -m benchmarks.bench_card_render [referencias] [párrafos_por_sección] [repeticiones]
+"""
+import sys
+import time
+
+from components.analysis_cards import SECTION_CARDS, render_cards_html
+from devtools.stub_api import build_analysis
+from utils.analysis_result import AnalysisResult
+from utils.session_memory import OffloadableValue
+
+
+def legacy_card(title, content):
+    """Tarjeta de la ruta original."""
+    return f"""
+        <div class="section-card">
+            <div class="section-header">{title}</div>
+            <div class="content-text">{content}</div>
+        </div>
+        """
+
+
+def legacy_references(results):
+    """Texto de referencias de la ruta original (concatenación con +=)."""
+    referencias_content = ""
+    references = results.references
+    for i, ref in enumerate(references, 1):
+        referencias_content += f"""
+Referencia {i}: {ref.tipo_doc} - N° {ref.num_interno_doc}
+
+Área Emisora: {ref.area}
+Fecha de Emisión: {ref.fecha_emision}
+N° de Expediente: {ref.num_expediente}
+ID del Documento: {ref.viddoc}
+
+"""
+        if i < len(references):
+            referencias_content += "---\n\n"
+    return referencias_content
+
+
+def legacy_render(results):
+    """HTML que la ruta original construía en cada ejecución."""
+    cards = [legacy_card(title, results.text(key) or default) for key, title, default, _ in SECTION_CARDS]
+    cards.append(legacy_card("Referencias", legacy_references(results)))
+    return cards
+
+
+def best_of(repeats, call):
+    """Mejor tiempo de `repeats` ejecuciones."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    references = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    numbers = [f"2020{i:06d}" for i in range(references)]
+    results = AnalysisResult.from_response(build_analysis(numbers, paragraphs))
+    stored = OffloadableValue(results, offload_dir="/tmp")
+    stored.derived("cards_html", render_cards_html)
+
+    legacy = best_of(repeats, lambda: legacy_render(results))
+    fresh = best_of(repeats, lambda: render_cards_html(results))
+    cached = best_of(repeats, lambda: stored.derived("cards_html", render_cards_html))
+
+    rendered = render_cards_html(results)
+    html_bytes = sum(len(cards) for cards in rendered.columns) + len(rendered.references)
+    print(f"{len(results.references)} referencias, {paragraphs} párrafos por sección, "
+          f"{html_bytes / 1e6:.1f} MB de HTML")
+    print(f"{'original (por ejecución)':<28} {legacy * 1000:>9.2f} ms")
+    print(f"{'render_cards_html (una vez)':<28} {fresh * 1000:>9.2f} ms")
+    print(f"{'vista memorizada':<28} {cached * 1000:>9.3f} ms  ({legacy / cached:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark de ingestión del catálogo: ruta original (response.json() + bucle con
+dos extracciones por documento) frente a la ruta en streaming de utils.catalog_ingest.
+
+Uso:
+    python -m benchmarks.bench_catalog_ingest [número_de_documentos]
+"""
+import json
+import re
+import sys
+import time
+import tracemalloc
+
+from utils.catalog_ingest import DEFAULT_CHUNK_SIZE, ingest_documents
+
+
+def build_catalog(rows: int) -> bytes:
+    """Genera un catálogo sintético con el mismo formato que el API."""
+    records = []
+    for i in range(rows):
+        if i % 50 == 0:
+            name = f"Documento sin número {i}.docx"
+        else:
+            name = f"{2020000000 + i} - RSASCM {i % 1000:03d} ICCGSA.docx"
+        records.append({"NUM_INTERNO_DOC": str(i), "NOMBRE_DOCUMENTO": name})
+    return json.dumps(records).encode("utf-8")
+
+
+def legacy_ingest(body: bytes):
+    """Reproduce la ruta original de DocumentAnalysisAPI.get_documents."""
+    def extract(doc_name):
+        match = re.match(r"^(\d+)", doc_name)
+        if match:
+            return match.group(1)
+        return ""
+
+    processed_documents = []
+    for doc in json.loads(body):
+        doc_name = doc.get("NOMBRE_DOCUMENTO", "")
+        doc_id = extract(doc_name)
+        doc_number = extract(doc_name)
+        if not doc_id:
+            doc_id = doc_number if doc_number else f"doc_{len(processed_documents)}"
+        processed_documents.append({"id": doc_id, "name": doc_name, "number": doc_number})
+    return processed_documents
+
+
+def iter_chunks(body: bytes, size: int = DEFAULT_CHUNK_SIZE):
+    """Simula response.iter_content()."""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def measure(label, func, rows):
+    # El tiempo se mide sin tracemalloc, que distorsiona los resultados
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<10} {rows / elapsed:>12,.0f} docs/s  {elapsed * 1000:>9.1f} ms  pico {peak / 1e6:>8.1f} MB")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    body = build_catalog(rows)
+    print(f"Catálogo sintético: {rows:,} documentos, {len(body) / 1e6:.1f} MB")
+
+    # En la ruta original el cuerpo completo se mantiene en memoria como bytes y como texto
+    legacy = measure("original", lambda: legacy_ingest(body), rows)
+    streamed = measure("streaming", lambda: ingest_documents(iter_chunks(body))[0], rows)
+
+    assert streamed == legacy, "La ruta en streaming no produce el mismo resultado"
+    print("Resultado idéntico en ambas rutas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark del coste de la instrumentación por evento: una llamada a una función
+vacía con y sin el decorador instrument, OperationMetrics.observe y
+record_cache, en un hilo y con varios hilos a la vez.
+
+Uso:
+    python -m benchmarks.bench_metrics [eventos] [hilos]
+"""
+import sys
+import threading
+import time
+
+from utils.metrics import get_metrics_registry, instrument
+
+
+def noop(value):
+    """Función sin trabajo: su coste es el de la llamada."""
+    return value
+
+
+@instrument("bench_instrumented", failed=lambda value: value is None)
+def instrumented(value):
+    """La misma función, instrumentada."""
+    return value
+
+
+def per_event(events, call):
+    """Segundos por evento de `events` llamadas."""
+    start = time.perf_counter()
+    for i in range(events):
+        call(i)
+    return (time.perf_counter() - start) / events
+
+
+def per_event_threads(events, threads, call):
+    """Segundos por evento (tiempo total / eventos totales) con `threads` hilos a la vez."""
+    workers = [threading.Thread(target=per_event, args=(events, call)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (events * threads)
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    registry = get_metrics_registry()
+    operation = registry.operation("bench_observe")
+
+    base = per_event(events, noop)
+    rows = [
+        ("instrument (1 hilo)", per_event(events, instrumented) - base),
+        ("observe", per_event(events, lambda i: operation.observe(i * 1e-6))),
+        ("record_cache", per_event(events, lambda i: registry.record_cache("bench", i % 4 != 0))),
+        (f"instrument ({threads} hilos)",
+         per_event_threads(events // threads, threads, instrumented) - base),
+    ]
+
+    print(f"{events} eventos")
+    for label, seconds in rows:
+        print(f"{label:<24} {seconds * 1e6:>7.2f} µs/evento")
+
+    start = time.perf_counter()
+    text = registry.render_prometheus()
+    print(f"{'render_prometheus':<24} {(time.perf_counter() - start) * 1000:>7.2f} ms "
+          f"({len(text.splitlines())} líneas)")
+
+
+if __name__ == "__main__":
+    main()
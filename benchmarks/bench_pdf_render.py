@@ -0,0 +1,77 @@
+"""
+Benchmark del render del PDF de análisis: ruta original (estilos reconstruidos
+en cada reporte y escape con reemplazos encadenados) frente a la plantilla
+compartida, con y sin compresión de páginas.
+
+Uso:
+    python -m benchmarks.bench_pdf_render [párrafos_por_sección] [repeticiones]
+"""
+import io
+import sys
+import time
+from contextlib import nullcontext
+from unittest import mock
+
+import utils.pdf_report as pdf_report
+from devtools.stub_api import build_analysis
+from utils.analysis_result import AnalysisResult
+
+
+def legacy_escape(text):
+    """Escape de la ruta original (cinco reemplazos encadenados)."""
+    if not isinstance(text, str):
+        text = str(text)
+    text = text.replace('&', '&amp;')
+    text = text.replace('<', '&lt;')
+    text = text.replace('>', '&gt;')
+    text = text.replace('"', '&quot;')
+    text = text.replace("'", '&#x27;')
+    return text
+
+
+def render(results, docs):
+    """Construye un reporte en memoria y devuelve (páginas, bytes)."""
+    output = io.BytesIO()
+    pages = pdf_report.build_analysis_pdf(results, docs, output)
+    return pages, len(output.getvalue())
+
+
+def best_of(repeats, call):
+    """Mejor tiempo de `repeats` ejecuciones y el resultado de la última."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        value = call()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    numbers = [f"2020{i:06d}" for i in range(20)]
+    results = AnalysisResult.from_response(build_analysis(numbers, paragraphs))
+    docs = [{"number": number, "name": f"Resolución {number} <anexo> & 'otros'"} for number in numbers]
+
+    variants = [
+        ("original", mock.patch.multiple(pdf_report, escape_xml_chars=legacy_escape,
+                                         get_report_template=pdf_report.ReportTemplate)),
+        ("plantilla", nullcontext()),
+        ("plantilla sin compresión", mock.patch.object(
+            pdf_report, "get_report_template", lambda: pdf_report.ReportTemplate(page_compression=0))),
+    ]
+
+    # Calentamiento (fuentes y plantilla compartida)
+    render(results, docs)
+
+    print(f"{paragraphs} párrafos por sección, mejor de {repeats}")
+    print(f"{'':<26} {'s/reporte':>10} {'págs/s':>8} {'páginas':>8} {'KB':>8}")
+    for name, patch in variants:
+        with patch:
+            seconds, (pages, size) = best_of(repeats, lambda: render(results, docs))
+        print(f"{name:<26} {seconds:>10.3f} {pages / seconds:>8.1f} {pages:>8} {size / 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de decodificación y normalización de la respuesta de /generate: ruta
+original (response.json() + process_analysis_results con un bloque por sección)
+frente a utils.result_decoder (decodificador rápido si está instalado) y
+AnalysisResult.from_response (una pasada por sección).
+
+Uso:
+    python -m benchmarks.bench_result_decoding [párrafos_por_sección] [repeticiones]
+"""
+import json
+import sys
+import time
+
+from devtools.stub_api import build_analysis
+from utils.analysis_result import AnalysisResult, Reference
+from utils.result_decoder import DECODER_BACKEND, decode_analysis_response
+
+
+def legacy_process(results):
+    """Reproduce el process_analysis_results original (sin el print de depuración)."""
+    processed_results = {
+        "introduction": "",
+        "contexto": "",
+        "resumenes_ejecutivos": "",
+        "analisis_detallado": "",
+        "comparacion_documentos": "",
+        "conclusion": "",
+        "referencias_data": []
+    }
+    if "sections" in results:
+        sections = results["sections"]
+        for key in ("introduction", "contexto", "resumenes_ejecutivos",
+                    "analisis_detallado", "comparacion_documentos", "conclusion"):
+            if key in sections and len(sections[key]) > 0:
+                texts = []
+                for item in sections[key]:
+                    if "text" in item:
+                        texts.append(item["text"])
+                processed_results[key] = "\n\n".join(texts)
+
+    referencias_data = None
+    locations = [
+        results.get("referencia"),
+        results.get("referencias"),
+        results.get("sections", {}).get("referencia") if "sections" in results else None,
+        results.get("sections", {}).get("referencias") if "sections" in results else None
+    ]
+    for location in locations:
+        if isinstance(location, list) and len(location) > 0:
+            referencias_data = location
+            break
+    processed_results["referencias_data"] = referencias_data or []
+    return processed_results
+
+
+def best_of(func, repeat):
+    """Mejor tiempo (ms) de varias ejecuciones."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    numbers = [f"2020{i:06d}" for i in range(200)]
+    analysis = build_analysis(numbers[:5], paragraphs)
+    analysis["referencias"] = build_analysis(numbers)["referencias"]
+    body = json.dumps(analysis).encode("utf-8")
+    print(f"Respuesta sintética: {len(body) / 1e6:.1f} MB, backend: {DECODER_BACKEND}")
+
+    legacy_decoded = json.loads(body)
+    decoded = decode_analysis_response(body)
+
+    rows = [
+        ("decodificar", best_of(lambda: json.loads(body), repeat),
+         best_of(lambda: decode_analysis_response(body), repeat)),
+        ("normalizar", best_of(lambda: legacy_process(legacy_decoded), repeat),
+         best_of(lambda: AnalysisResult.from_response(decoded), repeat)),
+        ("total", best_of(lambda: legacy_process(json.loads(body)), repeat),
+         best_of(lambda: AnalysisResult.from_response(decode_analysis_response(body)), repeat)),
+    ]
+    print(f"{'':<12} {'original':>10} {'nuevo':>10} {'mejora':>8}")
+    for label, legacy_ms, new_ms in rows:
+        print(f"{label:<12} {legacy_ms:>8.1f}ms {new_ms:>8.1f}ms {legacy_ms / new_ms:>7.2f}x")
+
+    # Mismos textos por sección y mismos campos de referencia que la ruta original
+    legacy = legacy_process(legacy_decoded)
+    legacy["referencias_data"] = [Reference.from_dict(ref)._asdict() for ref in legacy["referencias_data"]]
+    assert AnalysisResult.from_response(decoded).to_dict() == legacy, \
+        "La normalización nueva no produce el mismo resultado"
+    print("Resultado idéntico en ambas rutas.")
+
+
+if __name__ == "__main__":
+    main()
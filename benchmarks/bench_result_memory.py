@@ -0,0 +1,65 @@
+"""
+Benchmark de memoria por sesión del resultado de análisis: dict de textos unidos
+(ruta original) frente a AnalysisResult (párrafos que referencian la respuesta).
+
+Se mide lo que retiene cada sesión cuando varias sesiones muestran el mismo
+análisis y la respuesta del API ya está en memoria (caché de resultados), y
+también el total cuando la sesión es la única que conserva el resultado.
+
+Uso:
+    python -m benchmarks.bench_result_memory [párrafos_por_sección] [sesiones]
+"""
+import gc
+import json
+import sys
+import tracemalloc
+
+from benchmarks.bench_result_decoding import legacy_process
+from devtools.stub_api import build_analysis
+from utils.analysis_result import AnalysisResult
+
+
+def retained(build, sessions):
+    """Bytes retenidos por `sessions` resultados construidos con `build`."""
+    gc.collect()
+    tracemalloc.start()
+    results = [build() for _ in range(sessions)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return current
+
+
+def standalone(build_from_body, body):
+    """Bytes retenidos por un resultado cuando la respuesta decodificada ya no existe."""
+    gc.collect()
+    tracemalloc.start()
+    result = build_from_body(body)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    numbers = [f"2020{i:06d}" for i in range(50)]
+    body = json.dumps(build_analysis(numbers, paragraphs))
+    response = json.loads(body)
+    print(f"Respuesta sintética: {len(body) / 1e6:.1f} MB, {sessions} sesiones")
+
+    legacy_shared = retained(lambda: legacy_process(response), sessions) / sessions
+    new_shared = retained(lambda: AnalysisResult.from_response(response), sessions) / sessions
+    legacy_alone = standalone(lambda data: legacy_process(json.loads(data)), body)
+    new_alone = standalone(lambda data: AnalysisResult.from_response(json.loads(data)), body)
+
+    print(f"{'':<30} {'original':>12} {'nuevo':>12}")
+    print(f"{'por sesión (respuesta en caché)':<30} {legacy_shared / 1e3:>10.1f}KB {new_shared / 1e3:>10.1f}KB")
+    print(f"{'resultado sin la respuesta':<30} {legacy_alone / 1e3:>10.1f}KB {new_alone / 1e3:>10.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
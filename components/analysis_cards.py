@@ -1,119 +1,184 @@
 import streamlit as st
-from typing import Dict, Any
+from html import escape
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
 
-def render_analysis_cards(results: Dict[str, Any]):
+from utils.analysis_result import AnalysisResult
+from utils.metrics import instrument
+
+# Tarjetas de secciones: (clave en los resultados, título, mensaje por defecto, columna)
+SECTION_CARDS = [
+    ("introduction", "Introducción", "No hay información de introducción disponible.", 0),
+    ("resumenes_ejecutivos", "Resúmenes Ejecutivos", "No hay resúmenes ejecutivos disponibles.", 0),
+    ("comparacion_documentos", "Comparación de Documentos", "No hay contenido principal disponible.", 0),
+    ("contexto", "Contexto", "No hay información de contexto disponible.", 1),
+    ("analisis_detallado", "Análisis detallado", "No hay información de contexto disponible.", 1),
+    ("conclusion", "Conclusión", "No hay conclusión disponible.", 1),
+]
+
+PENDING_MESSAGE = "⏳ Generando sección..."
+
+class RenderedCards(NamedTuple):
+    """HTML de las tarjetas de un resultado, listo para emitir en cada ejecución."""
+    columns: Tuple[str, str]  # Tarjetas de secciones de cada columna
+    references: str           # Tarjeta de referencias
+
+def section_card_html(title: str, content_html: str) -> str:
+    """
+    Construye el HTML de una tarjeta de sección. El HTML no tiene líneas en
+    blanco, para que el markdown lo trate como un único bloque HTML.
+
+    Args:
+        title: Título de la tarjeta
+        content_html: Contenido de la tarjeta (HTML ya escapado)
+
+    Returns:
+        str: HTML de la tarjeta
+    """
+    return (f'<div class="section-card"><div class="section-header">{title}</div>'
+            f'<div class="content-text">{content_html}</div></div>')
+
+def paragraphs_html(paragraphs: Iterable[str]) -> str:
+    """Párrafos escapados, cada uno en su <p> (los saltos de línea internos pasan a <br>)."""
+    return "".join("<p>" + escape(paragraph).replace("\n", "<br>") + "</p>" for paragraph in paragraphs)
+
+def section_content(results: AnalysisResult, key: str, default: str) -> str:
+    """
+    Contenido HTML de la tarjeta de una sección: sus párrafos o el mensaje por defecto.
+
+    Args:
+        results: Resultados procesados del análisis
+        key: Clave de la sección
+        default: Mensaje si la sección no tiene contenido
+
+    Returns:
+        str: Contenido de la tarjeta (HTML)
+    """
+    return paragraphs_html(results.paragraphs(key)) or f"<p>{default}</p>"
+
+def render_cards_html(results: AnalysisResult) -> RenderedCards:
+    """
+    Produce el HTML de todas las tarjetas de un resultado. Se calcula una vez
+    por resultado (ver utils.session.get_analysis_view).
+
+    Args:
+        results: Resultados procesados del análisis
+
+    Returns:
+        RenderedCards: HTML de las tarjetas de cada columna y de las referencias
+    """
+    columns = ([], [])
+    for key, title, default, column in SECTION_CARDS:
+        columns[column].append(section_card_html(title, section_content(results, key, default)))
+    return RenderedCards(
+        columns=("".join(columns[0]), "".join(columns[1])),
+        references=section_card_html("Referencias", references_content(results))
+    )
+
+def render_section_cards(rendered: RenderedCards):
+    """
+    Renderiza las seis tarjetas de secciones en dos columnas.
+
+    Args:
+        rendered: HTML de las tarjetas (render_cards_html)
+    """
+    # Dividir la pantalla en dos columnas
+    columns = st.columns(2)
+
+    for column, cards_html in zip(columns, rendered.columns):
+        with column:
+            st.markdown(cards_html, unsafe_allow_html=True)
+
+def create_section_placeholders() -> Dict[str, Any]:
+    """
+    Crea la estructura de tarjetas vacía para el modo streaming: cada tarjeta
+    muestra un mensaje de espera hasta que llega su sección.
+
+    Returns:
+        Dict[str, Any]: Placeholder (st.empty) por clave de sección y para "referencias"
+    """
+    st.markdown('<div class="section-title">Resultados del Análisis</div>', unsafe_allow_html=True)
+    st.markdown("---")
+
+    placeholders = {}
+    columns = st.columns(2)
+    for key, title, _, column in SECTION_CARDS:
+        with columns[column]:
+            placeholders[key] = st.empty()
+            placeholders[key].markdown(section_card_html(title, f"<p>{PENDING_MESSAGE}</p>"), unsafe_allow_html=True)
+
+    st.markdown("---")
+    placeholders["referencias"] = st.empty()
+    placeholders["referencias"].markdown(section_card_html("Referencias", f"<p>{PENDING_MESSAGE}</p>"), unsafe_allow_html=True)
+    return placeholders
+
+def update_section_placeholder(placeholders: Dict[str, Any], section: str, results: AnalysisResult):
+    """
+    Rellena la tarjeta de una sección que acaba de llegar en modo streaming.
+
+    Args:
+        placeholders: Placeholders creados con create_section_placeholders
+        section: Clave de la sección recibida
+        results: Resultados procesados acumulados hasta el momento
+    """
+    if section in ("referencia", "referencias"):
+        placeholders["referencias"].markdown(
+            section_card_html("Referencias", references_content(results)), unsafe_allow_html=True
+        )
+        return
+
+    for key, title, default, _ in SECTION_CARDS:
+        if key == section and key in placeholders:
+            placeholders[key].markdown(section_card_html(title, section_content(results, key, default)), unsafe_allow_html=True)
+            return
+
+def references_content(results: AnalysisResult) -> str:
+    """
+    Construye el contenido HTML (escapado) de la tarjeta de referencias.
+
+    Args:
+        results: Resultados procesados del análisis
+
+    Returns:
+        str: Contenido de la tarjeta de referencias (HTML)
+    """
+    referencias_data = results.references
+
+    if not referencias_data:
+        # Mensaje cuando no hay referencias
+        return "<p>No se encontraron referencias en la respuesta del análisis.</p>"
+
+    # Una entrada por referencia, separadas por una línea horizontal
+    entries = []
+    for i, ref in enumerate(referencias_data, 1):
+        entries.append(
+            f"<p><b>Referencia {i}: {escape(str(ref.tipo_doc))} - N° {escape(str(ref.num_interno_doc))}</b></p>"
+            f"<p>Área Emisora: {escape(str(ref.area))}<br>"
+            f"Fecha de Emisión: {escape(str(ref.fecha_emision))}<br>"
+            f"N° de Expediente: {escape(str(ref.num_expediente))}<br>"
+            f"ID del Documento: {escape(str(ref.viddoc))}</p>"
+        )
+
+    return "<hr>".join(entries)
+
+@instrument("render_analysis_cards")
+def render_analysis_cards(results: AnalysisResult, rendered: Optional[RenderedCards] = None):
     """
     Renderiza los resultados del análisis en tarjetas con el nuevo diseño.
-    
+
     Args:
         results: Resultados procesados del análisis
+        rendered: HTML ya calculado de las tarjetas (si no se indica, se calcula)
     """
+    if rendered is None:
+        rendered = render_cards_html(results)
+
     st.markdown('<div class="section-title">Resultados del Análisis</div>', unsafe_allow_html=True)
     st.markdown("---")
-    
-    # Dividir la pantalla en dos columnas
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Introducción
-        intro_content = results.get("introduction", "No hay información de introducción disponible.")
-        st.markdown(f"""
-        <div class="section-card">
-            <div class="section-header">Introducción</div>
-            <div class="content-text">{intro_content}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Resumenes ejecutivos
-        resumenes_ejecutivos = results.get("resumenes_ejecutivos", "No hay resúmenes ejecutivos disponibles.")
-        st.markdown(f"""
-        <div class="section-card">
-            <div class="section-header">Resúmenes Ejecutivos</div>
-            <div class="content-text">{resumenes_ejecutivos}</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-         # Comparacion_documentos
-        comparacion_documentos = results.get("comparacion_documentos", "No hay contenido principal disponible.")
-        st.markdown(f"""
-        <div class="section-card">
-            <div class="section-header">Comparación de Documentos</div>
-            <div class="content-text">{comparacion_documentos}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        # Contexto
-        context_content = results.get("contexto", "No hay información de contexto disponible.")
-        st.markdown(f"""
-        <div class="section-card">
-            <div class="section-header">Contexto</div>
-            <div class="content-text">{context_content}</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Análisis detallado
-        analisis_detallado = results.get("analisis_detallado", "No hay información de contexto disponible.")
-        st.markdown(f"""
-        <div class="section-card">
-            <div class="section-header">Análisis detallado</div>
-            <div class="content-text">{analisis_detallado}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Conclusión
-        conclusion_content = results.get("conclusion", "No hay conclusión disponible.")
-        st.markdown(f"""
-        <div class="section-card">
-            <div class="section-header">Conclusión</div>
-            <div class="content-text">{conclusion_content}</div>
-        </div>
-        """, unsafe_allow_html=True)
+
+    render_section_cards(rendered)
 
     # ======= SECCIÓN DE REFERENCIAS SIMPLE =======
     st.markdown("---")
-    
-    # Obtener datos de referencias
-    referencias_data = results.get("referencias_data", [])
-    
-    if referencias_data and isinstance(referencias_data, list) and len(referencias_data) > 0:
-        # Crear contenido de referencias como texto simple
-        referencias_content = ""
-        
-        for i, ref in enumerate(referencias_data, 1):
-            tipo_doc = ref.get('tipo_doc', 'Documento')
-            num_interno = ref.get('num_interno_doc', 'N/A')
-            area = ref.get('area', 'N/A')
-            fecha = ref.get('fecha_emision', 'N/A')
-            expediente = ref.get('num_expediente', 'N/A')
-            viddoc = ref.get('viddoc', 'N/A')
-            
-            # Agregar cada referencia como texto simple
-            referencias_content += f"""
-Referencia {i}: {tipo_doc} - N° {num_interno}
-
-Área Emisora: {area}
-Fecha de Emisión: {fecha}
-N° de Expediente: {expediente}
-ID del Documento: {viddoc}
-
-"""
-            if i < len(referencias_data):
-                referencias_content += "---\n\n"
-        
-        # Mostrar usando el mismo formato que las otras secciones
-        st.markdown(f"""
-        <div class="section-card">
-            <div class="section-header">Referencias</div>
-            <div class="content-text">{referencias_content}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    else:
-        # Mensaje cuando no hay referencias
-        st.markdown("""
-        <div class="section-card">
-            <div class="section-header">Referencias</div>
-            <div class="content-text">No se encontraron referencias en la respuesta del análisis.</div>
-        </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+
+    # Mostrar usando el mismo formato que las otras secciones
+    st.markdown(rendered.references, unsafe_allow_html=True)
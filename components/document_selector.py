@@ -1,10 +1,59 @@
 import streamlit as st
-from typing import List, Dict, Any
-from utils.session import add_document, clear_selection
+from typing import List, Dict, Any, Optional
+from utils.session import get_selected_documents, on_add_documents, on_clear_selection, on_document_selected
+from utils.catalog_search import get_search_index
+from utils.widget_keys import widget_key
+
+# Resultados de búsqueda que se muestran en el selector
+SEARCH_TOP_K = 20
+
+# Por encima de este tamaño, el catálogo completo no se envía al selectbox (solo búsqueda)
+FULL_LIST_MAX_ROWS = 2000
+
+# Máximo de documentos que se pueden agregar de una vez con "Agregar todos"
+MAX_BULK_ADD = 200
+
+PLACEHOLDER_OPTION = "Seleccione un documento..."
+
+# Etiquetas de las facetas del catálogo
+FACET_LABELS = {
+    "type": "Tipo de documento",
+    "year": "Año",
+    "issuer": "Emisor",
+}
+
+def render_facet_filters(catalog) -> Optional[List[int]]:
+    """
+    Renderiza los filtros por faceta (tipo, año, emisor).
+    
+    Args:
+        catalog: CatalogStore compartido
+        
+    Returns:
+        List[int]: Filas que cumplen los filtros, o None si no hay filtros activos
+    """
+    with st.expander("Filtros"):
+        filters = {}
+        for facet, label in FACET_LABELS.items():
+            counts = catalog.facet_counts(facet)
+            if not counts:
+                continue
+            options = [value for value, _ in counts]
+            count_by_value = dict(counts)
+            filters[facet] = st.multiselect(
+                label,
+                options,
+                format_func=lambda value, counts=count_by_value: f"{value} ({counts[value]:,})",
+                key=f"doc_facet_{facet}"
+            )
+    
+    return catalog.rows_matching(filters)
 
 def render_document_selector():
     """
     Renderiza el selector de documentos y la lista de documentos seleccionados.
+    Se ejecuta dentro de un fragmento; los cambios de selección se aplican en
+    callbacks (ver utils.session), con una sola ejecución por acción.
     
     Returns:
         List[Dict]: Lista de documentos seleccionados
@@ -18,53 +67,96 @@ def render_document_selector():
         st.markdown("---")
         st.markdown("**Selección de Documentos**")
         
-        # Obtener documentos disponibles del estado de la sesión
-        documents = st.session_state.available_documents or []
+        # Obtener el catálogo compartido referenciado en la sesión
+        catalog = st.session_state.available_documents
         
-        if not documents:
+        if not catalog:
             st.warning("No se pudieron cargar los documentos. Por favor, refresque la página.")
         else:
-            # Selectbox con todos los documentos
-            document_options = [f"{doc['name'][:70]}..." for doc in documents]
-             #document_options = [f"{doc['name'][:70]}... ({doc.get('relevance', '100%')})" for doc in documents]
-            # La clave del selectbox ahora usa st.session_state.selector_key
-            selected_option = st.selectbox(
-                "Seleccione un documento para agregar:",
-                ["Seleccione un documento..."] + document_options,
-                key=f"doc_selector_{st.session_state.selector_key}" # Clave dinámica
+            # Búsqueda indexada por nombre o número de documento
+            query = st.text_input(
+                "Buscar documento por nombre o número:",
+                key="doc_search_query",
+                placeholder="Ej.: 2020029582 o RSASCM 074"
             )
             
-            # Lógica para procesar la selección
-            if selected_option != "Seleccione un documento...":
-                # Encontrar el documento seleccionado
-                selected_index = document_options.index(selected_option)
-                selected_doc = documents[selected_index]
-                
-                # Intentar agregar el documento
-                if add_document(selected_doc):
-                    st.success(f"✅ Documento agregado: {selected_doc['name'][:50]}...")
-                    st.rerun()  # Forzar actualización de la UI
+            # Filtros por faceta (precalculados en el catálogo)
+            filtered_rows = render_facet_filters(catalog)
+            
+            if query.strip():
+                # Solo los mejores resultados llegan al selectbox
+                if filtered_rows is None:
+                    candidate_rows = get_search_index(catalog).search(query, top_k=SEARCH_TOP_K)
                 else:
-                    # Documento ya está seleccionado
-                    if st.session_state.last_attempted_document == selected_doc['id']:
-                        st.warning("⚠️ Este documento ya está seleccionado")
+                    # Buscar más resultados para conservar suficientes tras aplicar los filtros
+                    allowed = set(filtered_rows)
+                    candidate_rows = [row for row in get_search_index(catalog).search(query, top_k=SEARCH_TOP_K * 10)
+                                      if row in allowed][:SEARCH_TOP_K]
+                if not candidate_rows:
+                    st.caption("No se encontraron documentos para la búsqueda.")
+                matching_rows = candidate_rows
+            elif filtered_rows is not None:
+                candidate_rows = filtered_rows[:FULL_LIST_MAX_ROWS]
+                matching_rows = filtered_rows
+            elif len(catalog) <= FULL_LIST_MAX_ROWS:
+                candidate_rows = range(len(catalog))
+                matching_rows = None
+            else:
+                candidate_rows = []
+                matching_rows = None
+                st.caption(f"El catálogo tiene {len(catalog):,} documentos. Use la búsqueda para encontrarlos.")
+            
+            # Agregar de una vez todos los documentos que cumplen la búsqueda/los filtros
+            if matching_rows:
+                too_many = len(matching_rows) > MAX_BULK_ADD
+                st.button(f"Agregar todos los coincidentes ({len(matching_rows):,})",
+                          disabled=too_many,
+                          help=f"Disponible cuando hay como máximo {MAX_BULK_ADD} coincidencias",
+                          on_click=on_add_documents,
+                          args=([] if too_many else list(matching_rows),))
+                
+                notice = st.session_state.pop("selection_notice", None)
+                if notice:
+                    st.warning(notice)
+            
+            # Las opciones son filas del catálogo: no hace falta buscar el texto elegido en la lista
+            # La clave del selectbox es versionada (utils.widget_keys); al rotarla se libera la anterior
+            # El documento se agrega en el callback; al agregarse cambia la clave y el selector se resetea
+            selector_key = widget_key("doc_selector") # Clave dinámica
+            selected_row = st.selectbox(
+                "Seleccione un documento para agregar:",
+                [None, *candidate_rows],
+                format_func=lambda row: PLACEHOLDER_OPTION if row is None else f"{catalog.name(row)[:70]}...",
+                key=selector_key,
+                on_change=on_document_selected,
+                args=(selector_key,)
+            )
+            
+            notice = st.session_state.pop("document_notice", None)
+            if notice:
+                st.success(notice)
+            
+            # Si el selector conserva un valor, es un documento que ya estaba seleccionado
+            if selected_row is not None and st.session_state.last_attempted_document == catalog.doc_id(selected_row):
+                st.warning("⚠️ Este documento ya está seleccionado")
 
+    # Los documentos seleccionados se materializan desde sus filas en el catálogo
+    selected_documents = get_selected_documents()
+    
     with col2:
         st.markdown('<div class="section-title">Documentos Seleccionados</div>', unsafe_allow_html=True)
         
         # Área de documentos seleccionados
-        if st.session_state.selected_documents:
+        if selected_documents:
             st.markdown('<div class="selected-docs-container">', unsafe_allow_html=True)
             selected_names = ""
-            for i, doc in enumerate(st.session_state.selected_documents, 1):
+            for i, doc in enumerate(selected_documents, 1):
                 selected_names += f'<span class="selected-doc-tag">{i}. {doc["name"][:50]}...</span> '
             st.markdown(selected_names, unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
             
             # Botón para limpiar selección
-            if st.button("Limpiar Selección"):
-                clear_selection()
-                st.rerun()
+            st.button("Limpiar Selección", on_click=on_clear_selection)
         else:
             # Contenido por defecto cuando no hay documentos seleccionados
             st.info("**Instrucciones:**\n\n1. Revise la lista de documentos disponibles\n2. Use el selector para elegir documentos\n3. Los documentos seleccionados aparecerán aquí\n4. Haga clic en 'Generar Análisis' cuando esté listo")
@@ -82,9 +174,9 @@ def render_document_selector():
                 """)
     
     # Información de documentos seleccionados (debajo de ambas columnas)
-    if st.session_state.selected_documents:
-        st.success(f"Total: {len(st.session_state.selected_documents)} documento(s) seleccionado(s)")
+    if selected_documents:
+        st.success(f"Total: {len(selected_documents)} documento(s) seleccionado(s)")
     else:
         st.info("Seleccione al menos un documento para generar el análisis")
     
-    return st.session_state.selected_documents
\ No newline at end of file
+    return selected_documents
\ No newline at end of file
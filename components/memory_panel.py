@@ -0,0 +1,33 @@
+import streamlit as st
+
+from utils.session_memory import get_session_memory_manager
+
+def render_memory_panel():
+    """
+    Muestra en la barra lateral la memoria estimada por sesión y el presupuesto
+    global. Solo se muestra con show_panel = true en la sección [memory] de los secrets.
+    """
+    if not st.secrets.get("memory", {}).get("show_panel", False):
+        return
+
+    report = get_session_memory_manager().get_report()
+    current_id = st.session_state._memory_tracker.session_id
+
+    with st.sidebar.expander("Memoria de sesiones"):
+        col1, col2 = st.columns(2)
+        col1.metric("Sesiones", report["session_count"])
+        col2.metric("Total estimado", f"{report['total_bytes'] / 1e6:.1f} MB",
+                    help=f"Presupuesto: {report['budget_bytes'] / 1e6:.0f} MB")
+        st.caption(f"Descargas a disco: {report['offloads']} "
+                   f"({report['offloaded_bytes'] / 1e6:.1f} MB)")
+
+        st.dataframe([
+            {
+                "Sesión": session["session_id"] + (" (actual)" if session["session_id"] == current_id else ""),
+                "KB": round(session["total_bytes"] / 1e3, 1),
+                "Inactiva (s)": session["idle_seconds"],
+                "Widgets": session["widget_keys"],
+                "En disco": "Sí" if session["offloaded"] else "No",
+            }
+            for session in report["sessions"]
+        ], hide_index=True)
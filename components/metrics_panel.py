@@ -0,0 +1,77 @@
+import streamlit as st
+
+from utils.metrics import (DEFAULT_EXPORT_HOST, DEFAULT_EXPORT_INTERVAL, get_metrics_registry,
+                           start_metrics_exporter)
+
+# Nombres visibles de las cachés
+CACHE_LABELS = {
+    "token": "Token",
+    "catalog": "Catálogo",
+    "analysis_result": "Resultados",
+    "request_coalescer": "Análisis agrupados",
+    "cards_html": "HTML de tarjetas",
+    "pdf": "PDF",
+}
+
+def start_metrics_export():
+    """
+    Inicia (una vez por proceso) la exportación de métricas para Prometheus
+    configurada en la sección [metrics] de los secrets: textfile_path para el
+    textfile collector de node_exporter y/o port para un endpoint /metrics.
+    """
+    metrics_config = st.secrets.get("metrics", {})
+    textfile_path = metrics_config.get("textfile_path")
+    port = metrics_config.get("port")
+    if not textfile_path and not port:
+        return
+
+    start_metrics_exporter(
+        textfile_path=textfile_path,
+        interval=metrics_config.get("textfile_interval_seconds", DEFAULT_EXPORT_INTERVAL),
+        port=port,
+        host=metrics_config.get("host", DEFAULT_EXPORT_HOST)
+    )
+
+def render_metrics_panel():
+    """
+    Muestra en la barra lateral la latencia, los errores y los bytes de las
+    operaciones instrumentadas y la tasa de aciertos de las cachés (de todo el
+    proceso). Solo se muestra con show_panel = true en la sección [metrics] de los secrets.
+    """
+    if not st.secrets.get("metrics", {}).get("show_panel", False):
+        return
+
+    registry = get_metrics_registry()
+    metrics = registry.get_metrics()
+
+    with st.sidebar.expander("Métricas"):
+        st.dataframe([
+            {
+                "Operación": name,
+                "Llamadas": stats["count"],
+                "Errores": stats["errors"],
+                "Media (ms)": round(stats["seconds_avg"] * 1000, 1),
+                "p95 (ms)": stats["p95"] * 1000,
+                "KB": round(stats["bytes"] / 1e3, 1),
+            }
+            for name, stats in metrics["operations"].items()
+        ], hide_index=True)
+        st.caption("p95: límite superior del bucket del histograma")
+
+        st.dataframe([
+            {
+                "Caché": CACHE_LABELS.get(name, name),
+                "Aciertos": stats["hits"],
+                "Fallos": stats["misses"],
+                "Tasa": f"{stats['hit_rate']:.0%}",
+            }
+            for name, stats in metrics["caches"].items()
+        ], hide_index=True)
+
+        st.download_button(
+            "Descargar (Prometheus)",
+            data=registry.render_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain",
+            on_click="ignore"
+        )
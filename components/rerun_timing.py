@@ -0,0 +1,42 @@
+import streamlit as st
+
+from utils.rerun_timing import APP_SCOPE, RerunTimer, get_rerun_counts, last_full_run_seconds
+
+# Nombres visibles de los fragmentos
+SCOPE_LABELS = {
+    "selector": "Selector",
+    "results": "Resultados",
+    "export": "Exportación",
+}
+
+def render_rerun_timing(timer: RerunTimer):
+    """
+    Termina la medición y muestra el tiempo de la ejecución. En los fragmentos
+    que se ejecutan solos, muestra también cuánto tiempo de script se ahorró
+    frente a la última ejecución completa, y el total de ejecuciones de script
+    de la sesión (cada acción debe sumar una). Solo se muestra con show_timing = true
+    en la sección [ui] de los secrets (la medición se guarda siempre).
+    
+    Args:
+        timer: Medición iniciada al principio de la página o del fragmento
+    """
+    in_full_run = timer.in_full_run
+    elapsed = timer.stop()
+    if not st.secrets.get("ui", {}).get("show_timing", False):
+        return
+    
+    counts = get_rerun_counts()
+    full_runs = counts.get(APP_SCOPE, 0)
+    fragment_runs = sum(counts.values()) - full_runs
+    
+    if timer.scope == APP_SCOPE:
+        st.sidebar.caption(f"⏱️ Ejecución completa: {elapsed * 1000:.0f} ms · "
+                           f"ejecuciones: {full_runs} completas, {fragment_runs} de fragmentos")
+        return
+    
+    text = f"⏱️ {SCOPE_LABELS.get(timer.scope, timer.scope)}: {elapsed * 1000:.0f} ms"
+    full_run = last_full_run_seconds()
+    if not in_full_run and full_run is not None:
+        text += (f" · ejecución completa: {full_run * 1000:.0f} ms"
+                 f" · ahorro: {max(full_run - elapsed, 0) * 1000:.0f} ms")
+    st.caption(f"{text} · ejecuciones: {full_runs + fragment_runs}")
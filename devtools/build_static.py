@@ -0,0 +1,21 @@
+"""
+Genera los recursos estáticos de la aplicación: la hoja de estilos con el hash
+del contenido en el nombre (static/styles.<hash>.css).
+La aplicación también la genera al arrancar si falta; este comando sirve para
+prepararla en el build (p. ej. si el directorio de la aplicación es de solo lectura).
+
+Uso:
+    python -m devtools.build_static
+"""
+import os
+
+from utils.static_assets import STATIC_DIR, build_stylesheet
+
+
+def main():
+    name = build_stylesheet()
+    print(f"Hoja de estilos: {os.path.join(STATIC_DIR, name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Servidor stub local del API de análisis, para probar la aplicación sin conexión.
+
+Implementa los endpoints que usa utils.rest_api:
+    POST /oauth2/token        Token de Cognito (client_credentials)
+    GET  /documents           Catálogo de documentos (con ETag / If-None-Match)
+    POST /generate            Análisis síncrono
+    POST /generate/stream     Análisis por secciones en streaming (NDJSON, o SSE con --sse)
+    POST /jobs                Envío de un análisis asíncrono (devuelve analysis_id)
+    GET  /jobs/<analysis_id>  Estado y progreso del análisis asíncrono
+
+Uso:
+    python -m devtools.stub_api --port 8765 --documents 500 --job-seconds 10
+
+Y en .streamlit/secrets.toml:
+    [api]
+    auth_url = "http://localhost:8765/oauth2/token"
+    documents_url = "http://localhost:8765/documents"
+    generate_url = "http://localhost:8765/generate"
+    stream_url = "http://localhost:8765/generate/stream"
+    jobs_url = "http://localhost:8765/jobs"
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+# Secciones que devuelve el API de análisis
+SECTIONS = ("introduction", "contexto", "resumenes_ejecutivos",
+            "analisis_detallado", "comparacion_documentos", "conclusion")
+
+
+def build_documents(count: int) -> List[Dict[str, str]]:
+    """Catálogo sintético con el formato del API."""
+    types = ("RSASCM", "RSMV", "OFICIO", "CIRCULAR")
+    issuers = ("ICCGSA", "SMV", "BVL", "CAVALI")
+    documents = []
+    for i in range(count):
+        number = f"{2018 + i % 7}{i:06d}"
+        name = f"{number} - {types[i % len(types)]} {i % 1000:03d} {issuers[i % len(issuers)]}.docx"
+        documents.append({"NUM_INTERNO_DOC": str(i), "NOMBRE_DOCUMENTO": name})
+    return documents
+
+
+def build_analysis(document_numbers: List[str], paragraphs: int = 3) -> Dict[str, Any]:
+    """Resultado de análisis sintético con el formato del API."""
+    joined = ", ".join(document_numbers)
+    sections = {}
+    for section in SECTIONS:
+        sections[section] = [
+            {"text": f"{section.replace('_', ' ').capitalize()} ({i + 1}) de los documentos {joined}. "
+                     "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4}
+            for i in range(paragraphs)
+        ]
+    return {
+        "sections": sections,
+        "referencias": [
+            {
+                "tipo_doc": "Resolución",
+                "num_interno_doc": number,
+                "area": "Superintendencia Adjunta",
+                "fecha_emision": "2020-01-15",
+                "num_expediente": f"EXP-{number}",
+                "viddoc": f"VID{number}",
+            }
+            for number in document_numbers
+        ],
+    }
+
+
+class StubState:
+    """Estado compartido del servidor (catálogo y trabajos en curso)."""
+
+    def __init__(self, documents: int, latency: float, job_seconds: float, sse: bool = False):
+        self.documents_body = json.dumps(build_documents(documents)).encode("utf-8")
+        self.documents_etag = '"%s"' % hashlib.sha256(self.documents_body).hexdigest()[:16]
+        self.latency = latency
+        self.job_seconds = job_seconds
+        self.sse = sse
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def create_job(self, document_numbers: List[str]) -> str:
+        analysis_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[analysis_id] = {
+                "document_numbers": document_numbers,
+                "started_at": time.time(),
+            }
+        return analysis_id
+
+    def job_status(self, analysis_id: str) -> Dict[str, Any]:
+        with self.lock:
+            job = self.jobs.get(analysis_id)
+        if job is None:
+            return None
+
+        elapsed = time.time() - job["started_at"]
+        if elapsed >= self.job_seconds:
+            return {
+                "analysis_id": analysis_id,
+                "status": "complete",
+                "progress": 100,
+                "message": "Análisis completado",
+                "result": build_analysis(job["document_numbers"]),
+            }
+
+        progress = int(100 * elapsed / self.job_seconds)
+        section = SECTIONS[min(int(progress / 100 * len(SECTIONS)), len(SECTIONS) - 1)]
+        return {
+            "analysis_id": analysis_id,
+            "status": "processing",
+            "progress": progress,
+            "message": f"Generando sección: {section}",
+        }
+
+
+def make_handler(state: StubState):
+    class StubHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 para que el cliente pueda reutilizar conexiones keep-alive
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload: Any, headers: Dict[str, str] = None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length) if length else b""
+            try:
+                return json.loads(body or b"{}")
+            except ValueError:
+                return {}
+
+        def _send_chunk(self, data: bytes):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _stream_analysis(self, document_numbers: List[str]):
+            """Envía las secciones una a una, repartiendo la latencia simulada entre ellas."""
+            analysis = build_analysis(document_numbers)
+            events = []
+            for index, section in enumerate(SECTIONS, 1):
+                events.append({"event": "section", "section": section, "items": analysis["sections"][section]})
+                events.append({"event": "progress", "progress": round(100 * index / len(SECTIONS)),
+                               "message": f"Sección {index} de {len(SECTIONS)}"})
+            events.append({"event": "referencias", "items": analysis["referencias"]})
+            events.append({"event": "done"})
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if state.sse else "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            delay = state.latency / len(SECTIONS)
+            for event in events:
+                if event["event"] == "section":
+                    time.sleep(delay)
+                if state.sse:
+                    payload = {key: value for key, value in event.items() if key != "event"}
+                    data = f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+                else:
+                    data = json.dumps(event) + "\n"
+                self._send_chunk(data.encode("utf-8"))
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_POST(self):
+            if self.path.startswith("/oauth2/token"):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._send_json(200, {"access_token": "stub-token", "expires_in": 3600,
+                                      "token_type": "Bearer"})
+            elif self.path == "/generate":
+                document_numbers = self._read_json().get("document_numbers", [])
+                time.sleep(state.latency)
+                self._send_json(200, build_analysis(document_numbers))
+            elif self.path == "/generate/stream":
+                self._stream_analysis(self._read_json().get("document_numbers", []))
+            elif self.path == "/jobs":
+                document_numbers = self._read_json().get("document_numbers", [])
+                analysis_id = state.create_job(document_numbers)
+                self._send_json(202, {"analysis_id": analysis_id, "status": "queued"})
+            else:
+                self._send_json(404, {"message": "Not found"})
+
+        def do_GET(self):
+            if self.path == "/documents":
+                if self.headers.get("If-None-Match") == state.documents_etag:
+                    self.send_response(304)
+                    self.send_header("ETag", state.documents_etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(state.documents_body)))
+                self.send_header("ETag", state.documents_etag)
+                self.end_headers()
+                self.wfile.write(state.documents_body)
+            elif self.path.startswith("/jobs/"):
+                job = state.job_status(self.path[len("/jobs/"):])
+                if job is None:
+                    self._send_json(404, {"message": "Análisis no encontrado"})
+                else:
+                    self._send_json(200, job)
+            else:
+                self._send_json(404, {"message": "Not found"})
+
+    return StubHandler
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8765, documents: int = 500,
+                  latency: float = 2.0, job_seconds: float = 10.0, sse: bool = False) -> ThreadingHTTPServer:
+    """
+    Crea el servidor stub (sin iniciarlo).
+
+    Args:
+        host: Interfaz en la que escuchar
+        port: Puerto (0 para uno libre)
+        documents: Tamaño del catálogo sintético
+        latency: Latencia simulada de /generate en segundos
+        job_seconds: Duración simulada de cada trabajo asíncrono
+        sse: Si es True, /generate/stream usa Server-Sent Events en lugar de NDJSON
+
+    Returns:
+        ThreadingHTTPServer: Servidor listo para serve_forever()
+    """
+    state = StubState(documents, latency, job_seconds, sse)
+    return ThreadingHTTPServer((host, port), make_handler(state))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor stub del API de análisis")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--documents", type=int, default=500, help="Tamaño del catálogo sintético")
+    parser.add_argument("--latency", type=float, default=2.0, help="Latencia de /generate (s)")
+    parser.add_argument("--job-seconds", type=float, default=10.0, help="Duración de cada trabajo (s)")
+    parser.add_argument("--sse", action="store_true", help="Usar SSE en /generate/stream")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.documents, args.latency, args.job_seconds, args.sse)
+    print(f"API stub escuchando en http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
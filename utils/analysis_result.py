@@ -0,0 +1,142 @@
+import sys
+import logging
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+from utils.result_decoder import ANALYSIS_SECTIONS, PARAGRAPH_SEPARATOR, REFERENCE_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Posición de cada sección dentro de AnalysisResult.sections
+_SECTION_INDEX = {key: index for index, key in enumerate(ANALYSIS_SECTIONS)}
+
+
+def _intern(value: Any) -> Any:
+    """Interna los textos cortos que se repiten entre referencias (tipo, área, fecha)."""
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 64 else value
+
+
+def _split_paragraphs(items: List[Dict[str, Any]]) -> Tuple[str, ...]:
+    """
+    Párrafos de los elementos de una sección: los textos con líneas en blanco
+    internas se dividen en varios párrafos; los demás se referencian sin copiarlos.
+    """
+    paragraphs = []
+    for item in items:
+        if "text" not in item:
+            continue
+        text = item["text"]
+        if isinstance(text, str) and PARAGRAPH_SEPARATOR in text:
+            paragraphs.extend(part for part in text.split(PARAGRAPH_SEPARATOR) if part.strip())
+        else:
+            paragraphs.append(text)
+    return tuple(paragraphs)
+
+
+class Reference(NamedTuple):
+    """Referencia a un documento citado en el análisis."""
+    tipo_doc: Any = "Documento"
+    num_interno_doc: Any = "N/A"
+    area: Any = "N/A"
+    fecha_emision: Any = "N/A"
+    num_expediente: Any = "N/A"
+    viddoc: Any = "N/A"
+
+    @classmethod
+    def from_dict(cls, ref: Dict[str, Any]) -> "Reference":
+        """Construye la referencia desde el dict del API (los campos faltantes usan el valor por defecto)."""
+        if not isinstance(ref, dict):
+            return cls()
+        return cls(*(_intern(ref.get(field, default))
+                     for field, default in cls._field_defaults.items()))
+
+
+class AnalysisResult(NamedTuple):
+    """
+    Resultado de análisis inmutable y compacto que se guarda en la sesión.
+
+    Cada sección se guarda como una tupla de párrafos (en el orden de
+    ANALYSIS_SECTIONS) que referencia los textos de la respuesta del API, sin
+    copiarlos en un único texto (solo se dividen los que contienen líneas en
+    blanco); la UI y el PDF recorren los párrafos directamente.
+    """
+    sections: Tuple[Tuple[str, ...], ...]
+    references: Tuple[Reference, ...]
+
+    @classmethod
+    def from_response(cls, results: Dict[str, Any]) -> "AnalysisResult":
+        """
+        Normaliza la respuesta del API en una sola pasada por sección y busca las
+        referencias en la raíz y luego en "sections".
+
+        Args:
+            results: Respuesta decodificada del API
+
+        Returns:
+            AnalysisResult: Resultado normalizado
+        """
+        sections = results.get("sections")
+        if not isinstance(sections, dict):
+            sections = {}
+
+        paragraphs = tuple(
+            _split_paragraphs(items) if items else ()
+            for items in map(sections.get, ANALYSIS_SECTIONS)
+        )
+
+        references = ()
+        for container in (results, sections):
+            for key in REFERENCE_KEYS:
+                location = container.get(key)
+                if isinstance(location, list) and location:
+                    references = tuple(Reference.from_dict(ref) for ref in location)
+                    break
+            if references:
+                break
+        else:
+            logger.debug("No se encontraron referencias en la respuesta del análisis")
+
+        return cls(paragraphs, references)
+
+    @classmethod
+    def from_section(cls, results: Dict[str, Any], section: str) -> "AnalysisResult":
+        """
+        Normaliza solo una sección (o solo las referencias) de una respuesta
+        parcial en streaming, para actualizar su tarjeta sin recorrer de nuevo
+        todo lo recibido.
+
+        Args:
+            results: Respuesta parcial acumulada
+            section: Clave de la sección recibida (o "referencias")
+
+        Returns:
+            AnalysisResult: Resultado con solo esa sección
+        """
+        if section in REFERENCE_KEYS:
+            return cls.from_response({section: results.get(section)})
+        return cls.from_response({"sections": {section: results.get("sections", {}).get(section)}})
+
+    def paragraphs(self, key: str) -> Tuple[str, ...]:
+        """Párrafos de una sección (tupla vacía si no hay contenido)."""
+        index = _SECTION_INDEX.get(key)
+        return self.sections[index] if index is not None else ()
+
+    def text(self, key: str) -> str:
+        """Texto de una sección con los párrafos separados por una línea en blanco."""
+        return PARAGRAPH_SEPARATOR.join(self.paragraphs(key))
+
+    def iter_sections(self) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+        """Recorre (clave, párrafos) en el orden de ANALYSIS_SECTIONS."""
+        return zip(ANALYSIS_SECTIONS, self.sections)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Representación como dict (la forma anterior de los resultados procesados),
+        para exportar a JSON.
+
+        Returns:
+            Dict: Una clave por sección (texto) y "referencias_data" (lista de dicts)
+        """
+        processed_results = {key: PARAGRAPH_SEPARATOR.join(paragraphs)
+                             for key, paragraphs in self.iter_sections()}
+        processed_results["referencias_data"] = [ref._asdict() for ref in self.references]
+        return processed_results
@@ -0,0 +1,173 @@
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Tiempo (segundos) durante el cual el catálogo se considera fresco
+DEFAULT_TTL_SECONDS = 300
+
+# Espera mínima (segundos) entre intentos de refresco tras un fallo del API
+FAILURE_BACKOFF_SECONDS = 30
+
+# Firma de la función de descarga: (etag, last_modified) -> (catálogo o None si 304, etag, last_modified)
+FetchCatalog = Callable[[Optional[str], Optional[str]],
+                        Tuple[Optional[Any], Optional[str], Optional[str]]]
+
+
+class CatalogCache:
+    """
+    Caché del catálogo de documentos compartida por todas las sesiones.
+
+    - Mientras el catálogo es fresco (TTL), se devuelve sin contactar al API.
+    - Cuando vence, se sigue devolviendo el catálogo anterior y un único hilo lo
+      revalida en segundo plano (stale-while-revalidate), usando If-None-Match /
+      If-Modified-Since cuando el API devolvió ETag o Last-Modified.
+    - Si el API falla, se mantiene el último catálogo válido.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS):
+        """
+        Inicializa la caché.
+
+        Args:
+            ttl: Segundos durante los cuales el catálogo se considera fresco
+        """
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+        self._documents: Optional[Any] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._fetched_at = 0.0
+        self._next_attempt_at = 0.0
+        self._refreshing = False
+
+        # Se incrementa cada vez que cambia el contenido del catálogo
+        self.version = 0
+        self.last_error: Optional[str] = None
+
+        # Contadores para diagnóstico
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "not_modified": 0,
+                      "refreshes": 0, "errors": 0}
+
+    def get(self, fetch: FetchCatalog) -> Optional[Any]:
+        """
+        Devuelve el catálogo, descargándolo solo si nunca se ha cargado.
+
+        Args:
+            fetch: Función que descarga el catálogo (ver FetchCatalog)
+
+        Returns:
+            Any: Catálogo (posiblemente vencido) o None si nunca se pudo cargar
+        """
+        documents = self._documents
+        if documents is None:
+            return self._load_blocking(fetch)
+
+        now = time.time()
+        if now - self._fetched_at < self.ttl:
+            self.stats["hits"] += 1
+            return documents
+
+        self.stats["stale_hits"] += 1
+        self._start_background_refresh(fetch, now)
+        return documents
+
+    def _load_blocking(self, fetch: FetchCatalog) -> Optional[Any]:
+        """Primera carga: una sola sesión descarga el catálogo y el resto espera."""
+        with self._load_lock:
+            if self._documents is not None:
+                self.stats["hits"] += 1
+                return self._documents
+
+            # Si el API acaba de fallar, no reintentar en cada sesión que llega
+            if time.time() < self._next_attempt_at:
+                return None
+
+            self.stats["misses"] += 1
+            self._refresh(fetch)
+            return self._documents
+
+    def _start_background_refresh(self, fetch: FetchCatalog, now: float):
+        """Lanza la revalidación en segundo plano si no hay otra en curso."""
+        with self._lock:
+            if self._refreshing or now < self._next_attempt_at:
+                return
+            self._refreshing = True
+
+        thread = threading.Thread(target=self._background_refresh, args=(fetch,), daemon=True)
+        thread.start()
+
+    def _background_refresh(self, fetch: FetchCatalog):
+        try:
+            self._refresh(fetch)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh(self, fetch: FetchCatalog):
+        """Descarga (o revalida) el catálogo y actualiza el estado de la caché."""
+        try:
+            documents, etag, last_modified = fetch(self._etag, self._last_modified)
+        except Exception as e:
+            # Conservar el último catálogo válido y esperar antes de reintentar
+            logger.warning("Error al refrescar el catálogo: %s", e)
+            with self._lock:
+                self.last_error = str(e)
+                self._next_attempt_at = time.time() + FAILURE_BACKOFF_SECONDS
+                self.stats["errors"] += 1
+            return
+
+        with self._lock:
+            self.stats["refreshes"] += 1
+            if documents is None:
+                # 304 Not Modified: el catálogo actual sigue vigente
+                self.stats["not_modified"] += 1
+            else:
+                self._documents = documents
+                self.version += 1
+            self._etag = etag or self._etag
+            self._last_modified = last_modified or self._last_modified
+            self._fetched_at = time.time()
+            self.last_error = None
+
+    def hit_counts(self) -> Tuple[int, int]:
+        """Aciertos (frescos o vencidos) y descargas bloqueantes para las métricas."""
+        return self.stats["hits"] + self.stats["stale_hits"], self.stats["misses"]
+
+    def invalidate(self):
+        """Marca el catálogo como vencido para que se revalide en el próximo acceso."""
+        with self._lock:
+            self._fetched_at = 0.0
+            self._next_attempt_at = 0.0
+
+
+# Cachés compartidas por el proceso, una por URL de catálogo
+_caches: Dict[str, CatalogCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_catalog_cache(documents_url: str, ttl: float = DEFAULT_TTL_SECONDS) -> CatalogCache:
+    """
+    Devuelve la caché compartida para una URL de catálogo.
+
+    Args:
+        documents_url: URL del endpoint de documentos
+        ttl: TTL usado si la caché se crea en esta llamada
+
+    Returns:
+        CatalogCache: Caché compartida
+    """
+    with _caches_lock:
+        cache = _caches.get(documents_url)
+        if cache is None:
+            cache = CatalogCache(ttl)
+            _caches[documents_url] = cache
+            get_metrics_registry().register_cache("catalog", cache.hit_counts)
+        return cache
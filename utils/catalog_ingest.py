@@ -0,0 +1,230 @@
+import codecs
+import json
+import re
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# Número al inicio del nombre del documento
+# Ejemplo: "2020029582 - RSASCM 074 ICCGSA.docx" -> "2020029582"
+DOCUMENT_NUMBER_RE = re.compile(r"^(\d+)")
+
+# Campos del nombre: "<número> - <tipo> <secuencia> <emisor>.<extensión>"
+# Ejemplo: "2020029582 - RSASCM 074 ICCGSA.docx" -> tipo RSASCM, secuencia 074, emisor ICCGSA
+DOCUMENT_NAME_RE = re.compile(
+    r"^(?P<number>\d+)\s*-\s*(?P<type>[^\W\d_]+)"
+    r"(?:\s+(?P<sequence>\d+))?(?:\s+(?P<issuer>[^.]+?))?\s*(?:\.\w+)?$"
+)
+
+# Rango de años aceptado al leer el año de los primeros dígitos del número
+_MIN_YEAR = 1990
+_MAX_YEAR = 2100
+
+# Tamaño de los bloques leídos de la respuesta HTTP
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# A partir de cuántos caracteres consumidos se compacta el buffer del parser
+_COMPACT_THRESHOLD = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+# Separadores entre elementos del arreglo
+_SKIP_SEPARATORS = re.compile(r"[ \t\n\r,]*")
+
+# Caracteres que pueden seguir a un número completo dentro del arreglo
+_NUMBER_TERMINATORS = frozenset(" \t\n\r,]")
+
+
+def extract_document_number(doc_name: str) -> str:
+    """
+    Extrae el número del documento del inicio de su nombre.
+
+    Args:
+        doc_name: Nombre completo del documento
+
+    Returns:
+        str: Número del documento o "" si el nombre no empieza con dígitos
+    """
+    match = DOCUMENT_NUMBER_RE.match(doc_name)
+    if match:
+        return match.group(1)
+    return ""
+
+
+def parse_document_name(doc_name: str) -> Dict[str, str]:
+    """
+    Separa el nombre del documento en sus campos facetables.
+
+    Args:
+        doc_name: Nombre completo del documento
+
+    Returns:
+        Dict[str, str]: type, sequence, issuer y year ("" si el campo no está presente)
+    """
+    match = DOCUMENT_NAME_RE.match(doc_name)
+    if not match:
+        return {"type": "", "sequence": "", "issuer": "", "year": ""}
+
+    number = match.group("number")
+    year = number[:4] if len(number) >= 8 else ""
+    if year and not _MIN_YEAR <= int(year) <= _MAX_YEAR:
+        year = ""
+
+    return {
+        "type": match.group("type").upper(),
+        "sequence": match.group("sequence") or "",
+        "issuer": (match.group("issuer") or "").strip().upper(),
+        "year": year,
+    }
+
+
+def iter_json_array(chunks: Iterable[bytes], stats: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    Decodifica incrementalmente un arreglo JSON y entrega sus elementos uno a uno,
+    sin mantener el cuerpo completo en memoria.
+
+    Si el documento no es un arreglo, se decodifica completo y se entrega tal cual
+    (o sus elementos, si resulta ser una lista).
+
+    Args:
+        chunks: Bloques de bytes UTF-8 (p. ej. response.iter_content())
+        stats: Diccionario opcional donde se acumulan bytes leídos y el tamaño máximo del buffer
+
+    Yields:
+        Any: Cada elemento del arreglo
+    """
+    raw_decode = json.JSONDecoder().raw_decode
+    skip_separators = _SKIP_SEPARATORS.match
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+    finished = False
+    eof = False
+    chunk_iter = iter(chunks)
+
+    while not finished:
+        # Leer más datos
+        if not eof:
+            try:
+                chunk = next(chunk_iter)
+                if stats is not None:
+                    stats["bytes"] = stats.get("bytes", 0) + len(chunk)
+                buffer += utf8.decode(chunk)
+            except StopIteration:
+                buffer += utf8.decode(b"", final=True)
+                eof = True
+
+            if stats is not None and len(buffer) > stats.get("peak_buffer_chars", 0):
+                stats["peak_buffer_chars"] = len(buffer)
+
+        # Buscar la apertura del arreglo
+        if not started:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    return
+                continue
+            if buffer[pos] != "[":
+                # No es un arreglo: decodificar el documento completo
+                for chunk in chunk_iter:
+                    buffer += utf8.decode(chunk)
+                buffer += utf8.decode(b"", final=True)
+                value = json.loads(buffer[pos:])
+                if isinstance(value, list):
+                    yield from value
+                else:
+                    yield value
+                return
+            pos += 1
+            started = True
+
+        # Entregar todos los elementos completos disponibles en el buffer
+        buffer_len = len(buffer)
+        while True:
+            pos = skip_separators(buffer, pos).end()
+            if pos >= buffer_len:
+                break
+            if buffer[pos] == "]":
+                finished = True
+                break
+            try:
+                value, end = raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break
+            # Un número solo está completo si le sigue un separador
+            if (not eof and isinstance(value, (int, float))
+                    and (end >= buffer_len or buffer[end] not in _NUMBER_TERMINATORS)):
+                break
+            pos = end
+            yield value
+
+        if not finished and eof:
+            raise ValueError("JSON incompleto: el arreglo no se cerró")
+
+        # Descartar lo ya consumido para mantener el buffer acotado
+        if pos > _COMPACT_THRESHOLD:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def iter_processed_documents(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, str]]:
+    """
+    Convierte los registros del API en documentos de la UI con una sola
+    extracción del número por registro.
+
+    Args:
+        records: Registros tal como los devuelve el API
+
+    Yields:
+        Dict[str, str]: Documento con id, nombre y número
+    """
+    match_number = DOCUMENT_NUMBER_RE.match
+    for index, doc in enumerate(records):
+        doc_name = doc.get("NOMBRE_DOCUMENTO", "")
+        match = match_number(doc_name)
+        doc_number = match.group(1) if match else ""
+
+        yield {
+            # Si el nombre no tiene número, usar un id posicional
+            "id": doc_number or f"doc_{index}",
+            "name": doc_name,
+            "number": doc_number,
+        }
+
+
+def ingest_documents(chunks: Iterable[bytes], collect: Callable[[Iterable[Dict[str, str]]], Any] = list,
+                     trace_memory: bool = False) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Ingiere el catálogo desde un flujo de bytes y mide el rendimiento.
+
+    Args:
+        chunks: Bloques de bytes de la respuesta
+        collect: Función que consume el generador de documentos (por defecto list;
+            CatalogStore.from_documents construye el catálogo compacto sin lista intermedia)
+        trace_memory: Si es True, mide el pico de memoria con tracemalloc (más lento)
+
+    Returns:
+        Tuple[Any, Dict]: (resultado de collect, estadísticas con rows, seconds,
+        rows_per_sec, bytes, peak_buffer_chars y, si se pidió, peak_memory_bytes)
+    """
+    stats: Dict[str, Any] = {"bytes": 0, "peak_buffer_chars": 0}
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        documents = collect(iter_processed_documents(iter_json_array(chunks, stats)))
+    finally:
+        elapsed = time.perf_counter() - start
+        if trace_memory:
+            stats["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    stats["rows"] = len(documents)
+    stats["seconds"] = elapsed
+    stats["rows_per_sec"] = len(documents) / elapsed if elapsed > 0 else 0.0
+    return documents, stats
@@ -0,0 +1,180 @@
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+import weakref
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# Cantidad de resultados que se muestran por defecto
+DEFAULT_TOP_K = 20
+
+# Los trigramas con más filas que esto se consideran poco discriminantes y se omiten
+MAX_POSTINGS = 5000
+
+# Máximo de términos del vocabulario que puede expandir un prefijo
+MAX_PREFIX_TERMS = 64
+
+# Pesos de puntuación
+_EXACT_NUMBER_SCORE = 1000
+_NUMBER_PREFIX_SCORE = 500
+_TOKEN_PREFIX_SCORE = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Pasa a minúsculas y elimina tildes para comparar sin distinguirlas."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogSearchIndex:
+    """
+    Índice de búsqueda del catálogo, construido una vez por catálogo.
+
+    Combina búsqueda exacta y por prefijo del número de documento (lista ordenada
+    + bisect), prefijos de palabras del nombre (vocabulario ordenado) y trigramas
+    para coincidencias aproximadas. Los trigramas demasiado frecuentes se omiten,
+    de modo que el costo de una consulta no crece con el tamaño del catálogo.
+    """
+
+    def __init__(self, catalog):
+        """
+        Construye el índice.
+
+        Args:
+            catalog: CatalogStore a indexar
+        """
+        self.version = catalog.version
+
+        numbers = []
+        token_rows: Dict[str, List[int]] = defaultdict(list)
+        trigram_rows: Dict[str, List[int]] = defaultdict(list)
+
+        for row, name in enumerate(catalog.names()):
+            number = catalog.number(row)
+            if number:
+                numbers.append((number, row))
+
+            normalized = normalize_text(name)
+            for token in set(_TOKEN_RE.findall(normalized)):
+                token_rows[token].append(row)
+            for trigram in _trigrams(normalized):
+                trigram_rows[trigram].append(row)
+
+        # Números ordenados para búsqueda exacta y por prefijo
+        numbers.sort()
+        self._numbers = [number for number, _ in numbers]
+        self._number_rows = array("I", (row for _, row in numbers))
+
+        # Vocabulario ordenado para búsqueda por prefijo de palabra
+        self._vocabulary = sorted(token_rows)
+        self._token_rows = {token: array("I", rows) for token, rows in token_rows.items()}
+
+        # Listas de filas por trigrama
+        self._trigram_rows = {trigram: array("I", rows) for trigram, rows in trigram_rows.items()}
+
+    def _number_matches(self, prefix: str, limit: int) -> List[tuple]:
+        """Hasta `limit` pares (fila, número) cuyo número empieza con `prefix`."""
+        start = bisect.bisect_left(self._numbers, prefix)
+        matches = []
+        for i in range(start, min(start + limit, len(self._numbers))):
+            if not self._numbers[i].startswith(prefix):
+                break
+            matches.append((self._number_rows[i], self._numbers[i]))
+        return matches
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> List[int]:
+        """
+        Busca documentos por número o por nombre.
+
+        Args:
+            query: Texto ingresado por el usuario
+            top_k: Cantidad máxima de resultados
+
+        Returns:
+            List[int]: Filas del catálogo ordenadas por relevancia
+        """
+        normalized = normalize_text(query).strip()
+        if not normalized:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        tokens = _TOKEN_RE.findall(normalized)
+
+        # Listas omitidas por ser demasiado frecuentes (se usan solo si no hay otra coincidencia)
+        skipped = []
+
+        for token in tokens:
+            # Número de documento: coincidencia exacta o por prefijo
+            if token.isdigit():
+                for row, number in self._number_matches(token, top_k):
+                    scores[row] += _EXACT_NUMBER_SCORE if number == token else _NUMBER_PREFIX_SCORE
+
+            # Prefijo de palabra del nombre
+            start = bisect.bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[start:start + MAX_PREFIX_TERMS]:
+                if not term.startswith(token):
+                    break
+                rows = self._token_rows[term]
+                if len(rows) > MAX_POSTINGS:
+                    skipped.append(rows)
+                    continue
+                weight = _TOKEN_PREFIX_SCORE * len(token) / len(term)
+                for row in rows:
+                    scores[row] += weight
+
+        # Trigramas para coincidencias aproximadas (errores de tipeo, fragmentos)
+        for trigram in _trigrams(normalized):
+            rows = self._trigram_rows.get(trigram)
+            if rows is None:
+                continue
+            if len(rows) > MAX_POSTINGS:
+                skipped.append(rows)
+                continue
+            for row in rows:
+                scores[row] += 1
+
+        # Consulta muy poco discriminante: devolver las primeras filas de la lista más corta
+        if not scores and skipped:
+            return list(min(skipped, key=len)[:top_k])
+
+        return [row for row, _ in heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))]
+
+
+# Índices por catálogo, compartidos por todas las sesiones. Cada catálogo vivo
+# (p. ej. el anterior y el nuevo durante una revalidación) conserva su índice, que
+# se libera junto con el catálogo.
+_indexes: "weakref.WeakKeyDictionary[Any, CatalogSearchIndex]" = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+def get_search_index(catalog) -> CatalogSearchIndex:
+    """
+    Devuelve el índice de búsqueda del catálogo, construyéndolo la primera vez
+    que se pide para ese catálogo.
+
+    Args:
+        catalog: CatalogStore compartido
+
+    Returns:
+        CatalogSearchIndex: Índice de ese catálogo
+    """
+    index = _indexes.get(catalog)
+    if index is not None:
+        return index
+
+    with _index_lock:
+        index = _indexes.get(catalog)
+        if index is None:
+            index = CatalogSearchIndex(catalog)
+            _indexes[catalog] = index
+        return index
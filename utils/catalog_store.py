@@ -0,0 +1,219 @@
+import sys
+import itertools
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.catalog_ingest import parse_document_name
+
+# Cantidad máxima de dígitos que cabe en un entero sin signo de 64 bits
+_MAX_PACKED_DIGITS = 19
+
+# Versiones únicas por proceso para identificar cada catálogo construido
+_version_counter = itertools.count(1)
+
+# Facetas que se extraen del nombre al construir el catálogo
+FACETS = ("type", "year", "issuer")
+
+
+class CatalogStore:
+    """
+    Catálogo de documentos inmutable y compacto, compartido en solo lectura por
+    todas las sesiones.
+
+    En lugar de una lista de dicts {"id", "name", "number"} por sesión, guarda los
+    nombres internados en una tupla, los números en un array de enteros y un índice
+    id -> fila. Las sesiones solo guardan números de fila; los dicts se materializan
+    bajo demanda con `document(row)`.
+
+    Las facetas del nombre (tipo, año, emisor) se guardan como códigos en arrays,
+    con un índice valor -> filas por faceta para filtrar sin recorrer el catálogo.
+    """
+
+    __slots__ = ("version", "_names", "_numbers", "_number_digits",
+                 "_long_numbers", "_id_overrides", "_row_by_id",
+                 "_facet_values", "_facet_codes", "_facet_rows", "__weakref__")
+
+    def __init__(self, names: tuple, numbers: array, number_digits: array,
+                 long_numbers: Dict[int, str], id_overrides: Dict[int, str],
+                 facet_values: Dict[str, tuple], facet_codes: Dict[str, array]):
+        """Usar CatalogStore.from_documents para construir el catálogo."""
+        self.version = next(_version_counter)
+        self._names = names
+        self._numbers = numbers
+        self._number_digits = number_digits
+        self._long_numbers = long_numbers
+        self._id_overrides = id_overrides
+
+        # Índice id -> fila (si hay ids repetidos, se conserva la primera fila)
+        row_by_id: Dict[str, int] = {}
+        for row in range(len(names)):
+            row_by_id.setdefault(self.doc_id(row), row)
+        self._row_by_id = row_by_id
+
+        # Facetas: vocabulario por faceta (código 0 = sin valor), código por fila e índice valor -> filas
+        self._facet_values = facet_values
+        self._facet_codes = facet_codes
+        self._facet_rows: Dict[str, Dict[str, array]] = {}
+        for facet, codes in facet_codes.items():
+            rows_by_code: Dict[int, array] = {}
+            for row, code in enumerate(codes):
+                if code:
+                    rows_by_code.setdefault(code, array("I")).append(row)
+            values = facet_values[facet]
+            self._facet_rows[facet] = {values[code]: rows for code, rows in rows_by_code.items()}
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Dict[str, str]]) -> "CatalogStore":
+        """
+        Construye el catálogo a partir de documentos {"id", "name", "number"}.
+        Acepta un generador, de modo que la lista de dicts nunca se materializa.
+
+        Args:
+            documents: Documentos procesados (ver utils.catalog_ingest)
+
+        Returns:
+            CatalogStore: Catálogo compacto
+        """
+        names: List[str] = []
+        numbers = array("Q")
+        number_digits = array("B")
+        long_numbers: Dict[int, str] = {}
+        id_overrides: Dict[int, str] = {}
+
+        # Vocabularios de facetas; el código 0 se reserva para "sin valor"
+        facet_codes = {facet: array("I") for facet in FACETS}
+        facet_lookup: Dict[str, Dict[str, int]] = {facet: {"": 0} for facet in FACETS}
+
+        intern = sys.intern
+        for row, doc in enumerate(documents):
+            name = intern(doc.get("name", ""))
+            names.append(name)
+
+            # Las facetas se extraen una sola vez, al construir el catálogo
+            fields = parse_document_name(name)
+            for facet in FACETS:
+                lookup = facet_lookup[facet]
+                facet_codes[facet].append(lookup.setdefault(fields[facet], len(lookup)))
+
+            number = doc.get("number", "")
+            if number and len(number) <= _MAX_PACKED_DIGITS and number.isdigit():
+                numbers.append(int(number))
+                number_digits.append(len(number))
+            else:
+                # Vacío o demasiado largo para el array: guardarlo aparte
+                numbers.append(0)
+                number_digits.append(0)
+                if number:
+                    long_numbers[row] = number
+
+            # El id se deriva del número; solo se guarda si difiere de esa regla
+            doc_id = doc.get("id", "")
+            if doc_id != (number or f"doc_{row}"):
+                id_overrides[row] = doc_id
+
+        facet_values = {facet: tuple(lookup) for facet, lookup in facet_lookup.items()}
+        return cls(tuple(names), numbers, number_digits, long_numbers, id_overrides,
+                   facet_values, facet_codes)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def name(self, row: int) -> str:
+        """Nombre del documento de una fila."""
+        return self._names[row]
+
+    def names(self) -> tuple:
+        """Tupla (compartida) con todos los nombres en orden de fila."""
+        return self._names
+
+    def number(self, row: int) -> str:
+        """Número del documento de una fila ("" si no tiene)."""
+        digits = self._number_digits[row]
+        if digits:
+            return str(self._numbers[row]).zfill(digits)
+        return self._long_numbers.get(row, "")
+
+    def doc_id(self, row: int) -> str:
+        """Id del documento de una fila."""
+        doc_id = self._id_overrides.get(row)
+        if doc_id is not None:
+            return doc_id
+        return self.number(row) or f"doc_{row}"
+
+    def row_for_id(self, doc_id: str) -> Optional[int]:
+        """Fila de un id de documento, o None si no está en el catálogo."""
+        return self._row_by_id.get(doc_id)
+
+    def facet(self, row: int, facet: str) -> str:
+        """Valor de una faceta (type, year, issuer) para una fila ("" si no tiene)."""
+        return self._facet_values[facet][self._facet_codes[facet][row]]
+
+    def facet_counts(self, facet: str) -> List[Tuple[str, int]]:
+        """
+        Valores de una faceta con la cantidad de documentos de cada uno.
+
+        Args:
+            facet: Nombre de la faceta (type, year, issuer)
+
+        Returns:
+            List[Tuple[str, int]]: (valor, cantidad) ordenados por valor
+        """
+        return sorted((value, len(rows)) for value, rows in self._facet_rows[facet].items())
+
+    def rows_matching(self, filters: Dict[str, Iterable[str]]) -> Optional[List[int]]:
+        """
+        Filas que cumplen todos los filtros de facetas (OR dentro de una faceta,
+        AND entre facetas).
+
+        Args:
+            filters: Valores seleccionados por faceta; las facetas vacías no filtran
+
+        Returns:
+            List[int]: Filas en orden del catálogo, o None si no hay ningún filtro activo
+        """
+        row_sets = []
+        for facet, values in filters.items():
+            values = list(values)
+            if not values:
+                continue
+            index = self._facet_rows[facet]
+            rows = set()
+            for value in values:
+                rows.update(index.get(value, ()))
+            row_sets.append(rows)
+
+        if not row_sets:
+            return None
+
+        # Intersecar empezando por el conjunto más pequeño
+        row_sets.sort(key=len)
+        result = row_sets[0].intersection(*row_sets[1:])
+        return sorted(result)
+
+    def document(self, row: int) -> Dict[str, str]:
+        """Materializa el dict {"id", "name", "number"} de una fila."""
+        return {
+            "id": self.doc_id(row),
+            "name": self._names[row],
+            "number": self.number(row),
+        }
+
+    def iter_documents(self) -> Iterator[Dict[str, str]]:
+        """Materializa todos los documentos uno a uno (para compatibilidad)."""
+        for row in range(len(self._names)):
+            yield self.document(row)
+
+    def nbytes(self) -> int:
+        """Estimación del tamaño en memoria del catálogo (bytes)."""
+        total = sys.getsizeof(self._names) + sum(sys.getsizeof(name) for name in self._names)
+        total += self._numbers.buffer_info()[1] * self._numbers.itemsize
+        total += self._number_digits.buffer_info()[1] * self._number_digits.itemsize
+        total += sys.getsizeof(self._row_by_id)
+        for facet, codes in self._facet_codes.items():
+            total += codes.buffer_info()[1] * codes.itemsize
+            total += sum(rows.buffer_info()[1] * rows.itemsize for rows in self._facet_rows[facet].values())
+        return total
+
+
+# Catálogo vacío compartido (cuando el API aún no respondió)
+EMPTY_CATALOG = CatalogStore.from_documents([])
@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Valores por defecto del transporte
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_CONNECTIONS = 4   # Hosts distintos que se mantienen en el pool (Cognito + API Gateway)
+DEFAULT_POOL_MAXSIZE = 32      # Conexiones keep-alive por host
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+
+# Códigos de estado que justifican un reintento
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Métodos que se pueden repetir sin efectos secundarios
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class HttpTransport:
+    """
+    Transporte HTTP compartido basado en requests.Session.
+
+    Mantiene conexiones keep-alive en un pool para evitar un handshake TCP+TLS por
+    solicitud, separa los timeouts de conexión y lectura y reintenta con backoff
+    exponencial y jitter las respuestas 429/5xx de las llamadas idempotentes.
+    """
+
+    def __init__(self, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX):
+        """
+        Inicializa el transporte.
+
+        Args:
+            connect_timeout: Timeout para establecer la conexión (segundos)
+            read_timeout: Timeout de lectura por defecto (segundos)
+            pool_connections: Número de pools (hosts) que se conservan
+            pool_maxsize: Conexiones keep-alive por host
+            max_retries: Reintentos máximos para llamadas idempotentes
+            backoff_base: Espera base del backoff exponencial (segundos)
+            backoff_max: Espera máxima entre reintentos (segundos)
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Los reintentos se manejan aquí para poder aplicar jitter y contarlos
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0,
+            pool_block=False
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._errors = 0
+
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        Realiza una solicitud HTTP sobre el pool compartido.
+
+        Args:
+            method: Método HTTP
+            url: URL de destino
+            idempotent: Fuerza si la llamada se puede reintentar; por defecto depende del método
+            read_timeout: Timeout de lectura para esta llamada (por defecto el del transporte)
+            **kwargs: Argumentos adicionales para requests.Session.request
+
+        Returns:
+            requests.Response: Respuesta final (tras los reintentos, si los hubo)
+
+        Raises:
+            requests.RequestException: Si la solicitud falla y no quedan reintentos
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        max_attempts = self.max_retries + 1 if idempotent else 1
+
+        kwargs.setdefault("timeout", (self.connect_timeout,
+                                      read_timeout if read_timeout is not None else self.read_timeout))
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= max_attempts:
+                    self._count_error()
+                    raise
+                self._sleep_before_retry(attempt, None)
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < max_attempts:
+                retry_after = response.headers.get("Retry-After")
+                # Liberar la conexión al pool antes de esperar
+                response.close()
+                self._sleep_before_retry(attempt, retry_after)
+                continue
+
+            return response
+
+    def _sleep_before_retry(self, attempt: int, retry_after: Optional[str]):
+        """Espera con backoff exponencial y jitter completo (o lo que indique Retry-After)."""
+        with self._lock:
+            self._retries += 1
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+        if retry_after:
+            try:
+                delay = min(max(delay, float(retry_after)), self.backoff_max)
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    def _count_error(self):
+        with self._lock:
+            self._errors += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Devuelve los contadores del pool de conexiones.
+
+        Returns:
+            Dict[str, int]: requests (solicitudes enviadas), new_connections (handshakes
+            TCP+TLS realizados), pool_hits (solicitudes servidas por una conexión reutilizada),
+            retries y errors
+        """
+        total_requests = 0
+        new_connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            total_requests += pool.num_requests
+            new_connections += pool.num_connections
+
+        with self._lock:
+            retries = self._retries
+            errors = self._errors
+
+        return {
+            "requests": total_requests,
+            "new_connections": new_connections,
+            "pool_hits": max(total_requests - new_connections, 0),
+            "retries": retries,
+            "errors": errors,
+        }
+
+
+# Transportes compartidos por el proceso, uno por configuración
+_transports: Dict[Tuple, HttpTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_http_transport(**settings) -> HttpTransport:
+    """
+    Devuelve el transporte compartido para una configuración, creándolo la
+    primera vez que se solicita.
+
+    Args:
+        **settings: Argumentos de HttpTransport
+
+    Returns:
+        HttpTransport: Transporte compartido
+    """
+    key = tuple(sorted(settings.items()))
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = HttpTransport(**settings)
+            _transports[key] = transport
+        return transport
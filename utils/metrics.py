@@ -0,0 +1,403 @@
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (segundos) de los buckets de latencia
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefijo de los nombres de las métricas exportadas
+METRIC_PREFIX = "docanalysis"
+
+# Exportación (ver [metrics] en los secrets)
+DEFAULT_EXPORT_INTERVAL = 15
+DEFAULT_EXPORT_HOST = "127.0.0.1"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Función que devuelve (aciertos, fallos) de una caché con contadores propios
+CacheCounts = Callable[[], Tuple[int, int]]
+
+
+class OperationMetrics:
+    """
+    Histograma de latencia y contadores de llamadas, errores y bytes de una
+    operación. Cada evento cuesta una búsqueda binaria en los buckets y un lock
+    sin contención: alrededor de un microsegundo.
+    """
+
+    __slots__ = ("name", "buckets", "_lock", "_bucket_counts", "_sum", "_count", "_errors", "_bytes")
+
+    def __init__(self, name: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        Args:
+            name: Nombre de la operación (etiqueta operation)
+            buckets: Límites superiores de los buckets, en orden creciente
+        """
+        self.name = name
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # El último bucket cuenta lo que supera el mayor límite (+Inf)
+        self._bucket_counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._errors = 0
+        self._bytes = 0
+
+    def observe(self, seconds: float, error: bool = False, nbytes: int = 0):
+        """
+        Registra una llamada.
+
+        Args:
+            seconds: Duración de la llamada
+            error: Si la llamada falló
+            nbytes: Bytes producidos o recibidos por la llamada
+        """
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._bucket_counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+            if error:
+                self._errors += 1
+            self._bytes += nbytes
+
+    def add_bytes(self, nbytes: int):
+        """Suma bytes que se conocen dentro de la operación (p. ej. el cuerpo de la respuesta)."""
+        with self._lock:
+            self._bytes += nbytes
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> float:
+        """
+        Estimación de un cuantil: límite superior del bucket donde cae.
+
+        Args:
+            q: Cuantil entre 0 y 1
+            counts: Conteos por bucket (por defecto los actuales)
+
+        Returns:
+            float: Segundos (inf si cae por encima del mayor límite; 0 sin llamadas)
+        """
+        if counts is None:
+            with self._lock:
+                counts = list(self._bucket_counts)
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores, la media y los cuantiles estimados.
+
+        Returns:
+            Dict: count, errors, bytes, seconds_sum, seconds_avg, p50, p95, p99 y bucket_counts
+        """
+        with self._lock:
+            counts = list(self._bucket_counts)
+            stats = {"count": self._count, "errors": self._errors, "bytes": self._bytes,
+                     "seconds_sum": self._sum}
+
+        stats["seconds_avg"] = stats["seconds_sum"] / stats["count"] if stats["count"] else 0.0
+        for label, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            stats[label] = self.quantile(q, counts)
+        stats["bucket_counts"] = counts
+        return stats
+
+
+def instrument(name: str, failed: Optional[Callable[[Any], bool]] = None,
+               nbytes: Optional[Callable[[Any], int]] = None):
+    """
+    Decorador que mide cada llamada de la función en la operación `name` del
+    registro compartido. Las excepciones cuentan como error y se vuelven a
+    lanzar; las de control de Streamlit (st.rerun, st.stop) no heredan de
+    Exception y no se cuentan.
+
+    Args:
+        name: Nombre de la operación
+        failed: Función opcional que indica, a partir del resultado, si la
+            llamada falló (para funciones que informan el error y devuelven None)
+        nbytes: Función opcional que calcula los bytes a partir del resultado
+    """
+    operation = get_metrics_registry().operation(name)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                operation.observe(time.perf_counter() - start, error=True)
+                raise
+            operation.observe(time.perf_counter() - start,
+                              error=failed(result) if failed else False,
+                              nbytes=nbytes(result) if nbytes and result else 0)
+            return result
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """
+    Métricas de las operaciones instrumentadas y tasas de acierto de las cachés,
+    compartidas por todas las sesiones. Las cachés que ya llevan sus propios
+    contadores se registran con una función que los lee (sin coste por evento);
+    las que no, cuentan sus aciertos con record_cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, OperationMetrics] = {}
+        self._cache_sources: Dict[str, CacheCounts] = {}
+        self._cache_counts: Dict[str, List[int]] = {}
+
+    def operation(self, name: str) -> OperationMetrics:
+        """Devuelve las métricas de una operación, creándolas la primera vez."""
+        with self._lock:
+            operation = self._operations.get(name)
+            if operation is None:
+                operation = OperationMetrics(name)
+                self._operations[name] = operation
+            return operation
+
+    def register_cache(self, name: str, counts: CacheCounts):
+        """
+        Registra una caché con contadores propios.
+
+        Args:
+            name: Nombre de la caché (etiqueta cache)
+            counts: Función que devuelve (aciertos, fallos)
+        """
+        with self._lock:
+            self._cache_sources[name] = counts
+
+    def record_cache(self, name: str, hit: bool):
+        """Cuenta un acierto o un fallo de una caché sin contadores propios."""
+        with self._lock:
+            counts = self._cache_counts.get(name)
+            if counts is None:
+                counts = self._cache_counts[name] = [0, 0]
+            counts[0 if hit else 1] += 1
+
+    def get_cache_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Devuelve los aciertos, fallos y la tasa de aciertos de cada caché.
+
+        Returns:
+            Dict: Por caché, hits, misses y hit_rate
+        """
+        with self._lock:
+            sources = dict(self._cache_sources)
+            recorded = {name: tuple(counts) for name, counts in self._cache_counts.items()}
+
+        caches = {}
+        for name, counts in sources.items():
+            try:
+                recorded[name] = counts()
+            except Exception as e:
+                logger.warning("No se pudieron leer los contadores de la caché %s: %s", name, e)
+
+        for name, (hits, misses) in sorted(recorded.items()):
+            lookups = hits + misses
+            caches[name] = {"hits": hits, "misses": misses,
+                            "hit_rate": hits / lookups if lookups else 0.0}
+        return caches
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve las métricas de todas las operaciones y cachés.
+
+        Returns:
+            Dict: operations (por operación, ver OperationMetrics.get_metrics) y caches
+        """
+        with self._lock:
+            operations = sorted(self._operations.items())
+        return {"operations": {name: operation.get_metrics() for name, operation in operations},
+                "caches": self.get_cache_metrics()}
+
+    def render_prometheus(self) -> str:
+        """
+        Devuelve las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            str: Exposición de texto (version 0.0.4)
+        """
+        metrics = self.get_metrics()
+        operations = metrics["operations"]
+        caches = metrics["caches"]
+        with self._lock:
+            buckets = {name: operation.buckets for name, operation in self._operations.items()}
+
+        duration = f"{METRIC_PREFIX}_operation_duration_seconds"
+        lines = [f"# HELP {duration} Duración de las operaciones instrumentadas.",
+                 f"# TYPE {duration} histogram"]
+        for name, stats in operations.items():
+            cumulative = 0
+            bounds = [_format_value(bound) for bound in buckets[name]] + ["+Inf"]
+            for bound, count in zip(bounds, stats["bucket_counts"]):
+                cumulative += count
+                lines.append(f'{duration}_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{duration}_sum{{operation="{name}"}} {_format_value(stats["seconds_sum"])}')
+            lines.append(f'{duration}_count{{operation="{name}"}} {stats["count"]}')
+
+        for metric, key, kind, help_text in (
+            ("operation_errors_total", "errors", "counter", "Llamadas fallidas de las operaciones instrumentadas."),
+            ("operation_bytes_total", "bytes", "counter", "Bytes recibidos o generados por las operaciones."),
+        ):
+            lines += [f"# HELP {METRIC_PREFIX}_{metric} {help_text}",
+                      f"# TYPE {METRIC_PREFIX}_{metric} {kind}"]
+            lines += [f'{METRIC_PREFIX}_{metric}{{operation="{name}"}} {stats[key]}'
+                      for name, stats in operations.items()]
+
+        for metric, key, kind, help_text in (
+            ("cache_hits_total", "hits", "counter", "Aciertos de las cachés."),
+            ("cache_misses_total", "misses", "counter", "Fallos de las cachés."),
+            ("cache_hit_ratio", "hit_rate", "gauge", "Tasa de aciertos de las cachés."),
+        ):
+            lines += [f"# HELP {METRIC_PREFIX}_{metric} {help_text}",
+                      f"# TYPE {METRIC_PREFIX}_{metric} {kind}"]
+            lines += [f'{METRIC_PREFIX}_{metric}{{cache="{name}"}} {_format_value(stats[key])}'
+                      for name, stats in caches.items()]
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    """Número en el formato de Prometheus (repr de float, sin notación innecesaria)."""
+    if isinstance(value, int):
+        return str(value)
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class MetricsExporter:
+    """
+    Publica las métricas del registro para Prometheus: en un archivo que se
+    reescribe cada `interval` segundos (para el textfile collector de
+    node_exporter) y/o en un endpoint HTTP /metrics. Ambos corren en hilos
+    daemon del proceso de la aplicación.
+    """
+
+    def __init__(self, registry: MetricsRegistry, textfile_path: Optional[str] = None,
+                 interval: float = DEFAULT_EXPORT_INTERVAL, port: Optional[int] = None,
+                 host: str = DEFAULT_EXPORT_HOST):
+        """
+        Args:
+            registry: Registro de métricas
+            textfile_path: Archivo .prom a escribir (None: no se escribe)
+            interval: Segundos entre escrituras del archivo
+            port: Puerto del endpoint HTTP (None: no se sirve)
+            host: Interfaz del endpoint HTTP
+        """
+        self.registry = registry
+        self.textfile_path = textfile_path
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self):
+        """Inicia la escritura periódica del archivo y el endpoint HTTP configurados."""
+        if self.textfile_path:
+            self.write_textfile()
+            threading.Thread(target=self._textfile_loop, name="metrics-textfile", daemon=True).start()
+
+        if self.port:
+            registry = self.registry
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?", 1)[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render_prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info("Métricas en http://%s:%d/metrics", self.host, self.port)
+
+    def write_textfile(self):
+        """Escribe las métricas en el archivo de forma atómica (archivo temporal y rename)."""
+        directory = os.path.dirname(self.textfile_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.render_prometheus())
+        os.replace(tmp_path, self.textfile_path)
+
+    def _textfile_loop(self):
+        """Reescribe el archivo periódicamente; un fallo no detiene la exportación."""
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write_textfile()
+            except Exception as e:
+                logger.warning("No se pudo escribir el archivo de métricas: %s", e)
+
+
+# Registro y exportador compartidos por el proceso
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+_exporter: Optional[MetricsExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Devuelve el registro de métricas compartido, creándolo la primera vez.
+
+    Returns:
+        MetricsRegistry: Registro compartido por todas las sesiones
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
+
+
+def start_metrics_exporter(**settings) -> MetricsExporter:
+    """
+    Inicia la exportación de las métricas la primera vez que se llama.
+
+    Args:
+        **settings: Argumentos de MetricsExporter (solo se usan al crearlo)
+
+    Returns:
+        MetricsExporter: Exportador compartido
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            exporter = MetricsExporter(get_metrics_registry(), **settings)
+            try:
+                exporter.start()
+            except OSError as e:
+                # Un puerto ocupado o un directorio sin permisos no debe impedir la app
+                logger.warning("No se pudo iniciar la exportación de métricas: %s", e)
+            _exporter = exporter
+        return _exporter
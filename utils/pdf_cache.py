@@ -0,0 +1,137 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.analysis_result import AnalysisResult
+from utils.metrics import get_metrics_registry
+
+# Tamaño máximo por defecto de los PDF en memoria
+DEFAULT_PDF_CACHE_MB = 64
+
+
+def pdf_cache_key(results: AnalysisResult, selected_documents: List[Dict[str, Any]]) -> str:
+    """
+    Clave de un PDF: digest del contenido del resultado y de los documentos del
+    reporte. Se usa un digest y no el propio resultado para que la caché no
+    mantenga vivos los resultados de las sesiones.
+
+    Args:
+        results: Resultados procesados del análisis
+        selected_documents: Documentos incluidos en el reporte
+
+    Returns:
+        str: Digest hexadecimal
+    """
+    digest = hashlib.sha1()
+    for _, paragraphs in results.iter_sections():
+        for paragraph in paragraphs:
+            digest.update(paragraph.encode("utf-8", "surrogatepass"))
+            digest.update(b"\x00")
+        digest.update(b"\x01")
+    for ref in results.references:
+        digest.update(repr(tuple(ref)).encode("utf-8", "surrogatepass"))
+    digest.update(b"\x02")
+    for doc in selected_documents:
+        digest.update(f"{doc.get('number', '')}\x00{doc.get('name', '')}\x01".encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class PdfCache:
+    """
+    PDF ya generados, compartidos por todas las sesiones, con un límite de
+    tamaño total; al superarlo se descartan los usados hace más tiempo.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_PDF_CACHE_MB * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Tamaño máximo total de los PDF guardados
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+
+        # Contadores para diagnóstico
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Devuelve el PDF de la clave, o None si no está generado."""
+        with self._lock:
+            pdf_data = self._entries.get(key)
+            if pdf_data is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return pdf_data
+
+    def __contains__(self, key: str) -> bool:
+        """Indica si el PDF está guardado (sin contar como acierto ni fallo)."""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: str, pdf_data: bytes) -> bool:
+        """
+        Guarda un PDF (los que superan por sí solos el límite no se guardan).
+
+        Returns:
+            bool: True si el PDF quedó guardado
+        """
+        if not pdf_data or len(pdf_data) > self.max_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = pdf_data
+            self._size += len(pdf_data)
+            self.stats["stores"] += 1
+
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.stats["evictions"] += 1
+        return True
+
+    def hit_counts(self) -> Tuple[int, int]:
+        """Aciertos y fallos de la caché para las métricas."""
+        with self._lock:
+            return self.stats["hits"], self.stats["misses"]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores, la cantidad de PDF y su tamaño total.
+
+        Returns:
+            Dict: Contadores, entries y size_bytes
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["size_bytes"] = self._size
+        return stats
+
+
+# Caché compartida por el proceso
+_cache: Optional[PdfCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache(**settings) -> PdfCache:
+    """
+    Devuelve la caché de PDF compartida, creándola la primera vez.
+
+    Args:
+        **settings: Argumentos de PdfCache (solo se usan al crearla)
+
+    Returns:
+        PdfCache: Caché compartida
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PdfCache(**settings)
+            get_metrics_registry().register_cache("pdf", _cache.hit_counts)
+        return _cache
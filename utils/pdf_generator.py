@@ -1,223 +1,161 @@
 import streamlit as st
 from datetime import datetime
-import io
-from typing import Dict, Any, List
+import tempfile
+from typing import Callable, Dict, Any, List, Optional
 
-def create_download_button(results: Dict[str, Any], selected_documents: List[Dict[str, Any]]):
+from utils.analysis_result import AnalysisResult
+from utils.pdf_report import (DEFAULT_LARGE_REPORT_CHARS, DEFAULT_MAX_REPORT_MB, SPOOL_MAX_BYTES,
+                              build_analysis_pdf)
+from utils.metrics import instrument
+from utils.pdf_cache import DEFAULT_PDF_CACHE_MB, PdfCache, get_pdf_cache, pdf_cache_key
+from utils.pdf_renderer import (DEFAULT_MAX_PENDING, DEFAULT_RENDER_WORKERS, DEFAULT_SPOOL_DIR,
+                                PdfRenderPool, get_pdf_render_pool)
+
+# Intervalo (segundos) con el que la UI consulta si terminó el render en segundo plano
+RENDER_POLL_SECONDS = 1.0
+
+def get_shared_pdf_cache() -> PdfCache:
+    """Caché de PDF compartida, configurada desde la sección [cache] de los secrets."""
+    return get_pdf_cache(
+        max_bytes=st.secrets.get("cache", {}).get("pdf_cache_mb", DEFAULT_PDF_CACHE_MB) * 1024 * 1024
+    )
+
+def max_report_bytes() -> int:
+    """Tamaño máximo de un PDF, configurado con max_report_mb en la sección [pdf] de los secrets."""
+    return st.secrets.get("pdf", {}).get("max_report_mb", DEFAULT_MAX_REPORT_MB) * 1024 * 1024
+
+def large_report_chars() -> int:
+    """Texto a partir del cual se usa el modo de reporte grande ([pdf] large_report_chars)."""
+    return st.secrets.get("pdf", {}).get("large_report_chars", DEFAULT_LARGE_REPORT_CHARS)
+
+def get_render_pool() -> Optional[PdfRenderPool]:
+    """
+    Pool de render en segundo plano, configurado desde la sección [pdf] de los
+    secrets. Devuelve None si background_render no está activado.
+    """
+    pdf_config = st.secrets.get("pdf", {})
+    if not pdf_config.get("background_render", False):
+        return None
+    return get_pdf_render_pool(
+        get_shared_pdf_cache(),
+        max_workers=pdf_config.get("render_workers", DEFAULT_RENDER_WORKERS),
+        max_pending=pdf_config.get("render_max_pending", DEFAULT_MAX_PENDING),
+        spool_dir=pdf_config.get("spool_dir", DEFAULT_SPOOL_DIR),
+        max_report_bytes=max_report_bytes(),
+        large_report_chars=large_report_chars()
+    )
+
+def start_pdf_prerender(results: AnalysisResult, selected_documents: List[Dict[str, Any]]) -> bool:
     """
-    Crea un botón de descarga para el PDF del análisis.
+    Empieza a generar el PDF en segundo plano en cuanto termina un análisis
+    (solo si background_render está activado).
     
     Args:
         results: Resultados procesados del análisis
         selected_documents: Lista de documentos seleccionados
+        
+    Returns:
+        bool: True si el PDF quedó en curso o ya estaba disponible
     """
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.colors import HexColor
-    except ImportError as e:
-        st.error(f"❌ Error importando ReportLab: {e}")
+    pool = get_render_pool()
+    if pool is None:
+        return False
+    return pool.submit(pdf_cache_key(results, selected_documents), results, selected_documents)
+
+@st.fragment(run_every=RENDER_POLL_SECONDS)
+def _wait_for_render(pool: PdfRenderPool, cache_key: str):
+    """Muestra el estado del render y, al terminar, vuelve a ejecutar la página con el botón de descarga."""
+    if pool.status(cache_key) == "pending":
+        st.button("⏳ Generando PDF...", disabled=True, key=f"pdf_pending_{cache_key[:12]}")
         return
+    st.rerun()
+
+def create_download_button(results: AnalysisResult, selected_documents: List[Dict[str, Any]]):
+    """
+    Crea un botón de descarga para el PDF del análisis. El PDF se genera bajo
+    demanda (o en segundo plano, si background_render está activado) y se guarda
+    en la caché compartida, de modo que las siguientes ejecuciones con el mismo
+    resultado no lo vuelven a construir.
     
+    Args:
+        results: Resultados procesados del análisis
+        selected_documents: Lista de documentos seleccionados
+    """
     try:
-        # Generar el PDF
-        pdf_data = generate_analysis_pdf_fixed(results, selected_documents)
-        
-        if pdf_data:
-            # Crear nombre del archivo con timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"analisis_documentario_{timestamp}.pdf"
+        # Reutilizar el PDF si ya se generó para este resultado (en cualquier sesión)
+        cache = get_shared_pdf_cache()
+        cache_key = pdf_cache_key(results, selected_documents)
+        pdf_data = cache.get(cache_key)
+        
+        if pdf_data is None:
+            # Con render en segundo plano, esperar a que termine sin bloquear la sesión
+            pool = get_render_pool()
+            status = pool.status(cache_key) if pool else None
+            if status == "pending":
+                _wait_for_render(pool, cache_key)
+                return
+            if status == "failed":
+                st.warning("No se pudo generar el PDF en segundo plano; puede generarlo ahora.")
+            
+            # El PDF se genera solo cuando el usuario lo pide, no en cada ejecución
+            if not st.button("📄 Preparar PDF", help="Generar el PDF del análisis para descargarlo"):
+                return
             
-            # Botón de descarga
-            st.download_button(
-                label="📄 Descargar Análisis (PDF)",
-                data=pdf_data,
-                file_name=filename,
-                mime="application/pdf",
-                help="Descargar el análisis completo en formato PDF"
-            )
-        else:
-            st.error("No se pudo generar el PDF")
+            if pool and status != "failed" and pool.submit(cache_key, results, selected_documents):
+                _wait_for_render(pool, cache_key)
+                return
+            
+            with st.spinner("Generando PDF..."):
+                pdf_data = generate_analysis_pdf_fixed(
+                    results, selected_documents,
+                    max_bytes=max_report_bytes(), large_report_chars=large_report_chars()
+                )
+            
+            if not pdf_data:
+                st.error("No se pudo generar el PDF")
+                return
+            
+            cache.put(cache_key, pdf_data)
+        
+        # Crear nombre del archivo con timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"analisis_documentario_{timestamp}.pdf"
+        
+        # Botón de descarga
+        st.download_button(
+            label="📄 Descargar Análisis (PDF)",
+            data=pdf_data,
+            file_name=filename,
+            mime="application/pdf",
+            help="Descargar el análisis completo en formato PDF"
+        )
         
     except Exception as e:
         st.error(f"Error al generar el PDF: {str(e)}")
 
-def generate_analysis_pdf_fixed(results: Dict[str, Any], selected_documents: List[Dict[str, Any]]) -> bytes:
+@instrument("generate_analysis_pdf_fixed", failed=lambda pdf_data: not pdf_data, nbytes=len)
+def generate_analysis_pdf_fixed(results: AnalysisResult, selected_documents: List[Dict[str, Any]],
+                                on_error: Optional[Callable[[str], None]] = None,
+                                max_bytes: int = DEFAULT_MAX_REPORT_MB * 1024 * 1024,
+                                large_report_chars: int = DEFAULT_LARGE_REPORT_CHARS) -> bytes:
     """
     Genera un PDF con todos los resultados del análisis.
     Versión corregida que evita el problema de conversión a dict.
-    """
-    # Importaciones locales
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.colors import HexColor
-    
-    # Crear buffer
-    buffer = io.BytesIO()
-    
-    # Función interna para crear y construir el PDF
-    def build_pdf():
-        # Crear el documento PDF dentro de la función para evitar interferencias
-        pdf_doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
-        
-        # Verificar inmediatamente que es el tipo correcto
-        if not hasattr(pdf_doc, 'build'):
-            raise ValueError(f"PDF document object is invalid: {type(pdf_doc)}")
-        
-        # Obtener estilos
-        styles = getSampleStyleSheet()
-        
-        # Crear estilos personalizados
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=20,
-            spaceAfter=30,
-            alignment=1,  # Centrado
-            textColor=HexColor('#2C3E50'),
-            fontName='Helvetica-Bold'
-        )
-        
-        section_title_style = ParagraphStyle(
-            'SectionTitle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=15,
-            spaceBefore=20,
-            textColor=HexColor('#3498DB'),
-            fontName='Helvetica-Bold'
-        )
-        
-        content_style = ParagraphStyle(
-            'Content',
-            parent=styles['Normal'],
-            fontSize=11,
-            spaceAfter=12,
-            alignment=4,  # Justificado
-            fontName='Helvetica',
-            leading=16
-        )
-        
-        doc_list_style = ParagraphStyle(
-            'DocList',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=8,
-            leftIndent=20,
-            fontName='Helvetica'
-        )
-        
-        # Crear story
-        story = []
-        
-        # Título principal
-        story.append(Paragraph("CENTRO DE ANÁLISIS DOCUMENTARIO", title_style))
-        story.append(Paragraph("Reporte de Análisis", styles['Heading2']))
-        story.append(Spacer(1, 20))
-        
-        # Información del reporte
-        current_date = datetime.now().strftime("%d/%m/%Y %H:%M")
-        story.append(Paragraph(f"<b>Fecha de generación:</b> {current_date}", content_style))
-        story.append(Paragraph(f"<b>Total de documentos analizados:</b> {len(selected_documents)}", content_style))
-        story.append(Spacer(1, 20))
-        
-        # Lista de documentos analizados
-        story.append(Paragraph("Documentos Analizados", section_title_style))
-        for i, document in enumerate(selected_documents, 1):
-            doc_name = document.get('name', 'Sin nombre')
-            # Escapar caracteres especiales
-            doc_name = escape_xml_chars(doc_name)
-            doc_text = f"{i}. {doc_name}"
-            story.append(Paragraph(doc_text, doc_list_style))
-        
-        story.append(Spacer(1, 30))
-        story.append(PageBreak())
-        
-        # Secciones del análisis
-        sections_data = [
-            ("Introducción", results.get("introduction", "")),
-            ("Contexto", results.get("contexto", "")),
-            ("Resúmenes Ejecutivos", results.get("resumenes_ejecutivos", "")),
-            ("Análisis Detallado", results.get("analisis_detallado", "")),
-            ("Comparación de Documentos", results.get("comparacion_documentos", "")),
-            ("Conclusión", results.get("conclusion", ""))
-        ]
-        
-        for section_name, section_content in sections_data:
-            if section_content and section_content.strip():
-                # Título de la sección
-                story.append(Paragraph(section_name, section_title_style))
-                
-                # Procesar contenido en párrafos
-                paragraphs = section_content.split('\n\n')
-                for paragraph in paragraphs:
-                    if paragraph.strip():
-                        # Limpiar y escapar el texto
-                        clean_text = paragraph.strip().replace('\n', ' ')
-                        clean_text = escape_xml_chars(clean_text)
-                        
-                        # Limitar longitud del párrafo para evitar problemas
-                        if len(clean_text) > 2000:
-                            clean_text = clean_text[:2000] + "..."
-                        
-                        story.append(Paragraph(clean_text, content_style))
-                
-                story.append(Spacer(1, 20))
-        
-        # Verificar nuevamente antes de build
-        if not hasattr(pdf_doc, 'build'):
-            raise ValueError(f"PDF document lost build method: {type(pdf_doc)}")
-        
-        # Construir el PDF
-        pdf_doc.build(story)
-        
-        return True
-    
-    try:
-        # Ejecutar la construcción del PDF
-        success = build_pdf()
-        
-        if success:
-            # Obtener datos del buffer
-            pdf_data = buffer.getvalue()
-            buffer.close()
-            return pdf_data
-        else:
-            buffer.close()
-            return b""
-            
-    except Exception as e:
-        buffer.close()
-        st.error(f"Error en build_pdf: {str(e)}")
-        return b""
-
-def escape_xml_chars(text: str) -> str:
-    """
-    Escapa caracteres especiales para XML/HTML.
     
     Args:
-        text: Texto a escapar
-        
-    Returns:
-        str: Texto escapado
+        results: Resultados procesados del análisis
+        selected_documents: Lista de documentos seleccionados
+        on_error: Función que recibe los mensajes de error (por defecto st.error)
+        max_bytes: Tamaño máximo del PDF
+        large_report_chars: Caracteres a partir de los que se usa el modo de reporte grande
     """
-    if not isinstance(text, str):
-        text = str(text)
-    
-    # Escapar caracteres básicos
-    text = text.replace('&', '&amp;')
-    text = text.replace('<', '&lt;')
-    text = text.replace('>', '&gt;')
-    text = text.replace('"', '&quot;')
-    text = text.replace("'", '&#x27;')
-    
-    return text
\ No newline at end of file
+    # El PDF se escribe en memoria y pasa a disco si supera SPOOL_MAX_BYTES
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as output:
+        try:
+            build_analysis_pdf(results, selected_documents, output, max_bytes, large_report_chars)
+        except Exception as e:
+            (on_error or st.error)(f"Error en build_pdf: {str(e)}")
+            return b""
+        
+        output.seek(0)
+        return output.read()
@@ -0,0 +1,286 @@
+import os
+import sys
+import time
+import types
+import logging
+import tempfile
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.analysis_result import AnalysisResult
+from utils.pdf_cache import PdfCache
+from utils.pdf_report import DEFAULT_LARGE_REPORT_CHARS, DEFAULT_MAX_REPORT_MB, build_analysis_pdf
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto del render en segundo plano
+DEFAULT_RENDER_WORKERS = 2
+DEFAULT_MAX_PENDING = 8
+DEFAULT_SPOOL_DIR = os.path.join(tempfile.gettempdir(), "analysis_pdf_spool")
+
+# Claves de renders terminados que se recuerdan para detectar PDF ya descartados de la caché
+RENDERED_KEYS_MAX = 1024
+
+# Espera máxima (segundos) de cada proceso a que arranquen los demás al crear el pool
+WORKER_START_TIMEOUT = 60
+
+
+def render_pdf_to_spool(results: AnalysisResult, selected_documents: List[Dict[str, Any]],
+                        spool_dir: str, max_bytes: int, large_report_chars: int) -> Tuple[str, int, float]:
+    """
+    Construye el PDF en un archivo temporal del directorio de spool. Se ejecuta
+    en un proceso del pool: el PDF vuelve al proceso de la aplicación como una
+    ruta, no como bytes serializados.
+
+    Args:
+        results: Resultados procesados del análisis
+        selected_documents: Documentos incluidos en el reporte
+        spool_dir: Directorio de los archivos temporales
+        max_bytes: Tamaño máximo del PDF
+        large_report_chars: Caracteres a partir de los que se usa el modo de reporte grande
+
+    Returns:
+        Tuple[str, int, float]: (ruta del PDF, tamaño en bytes, segundos de render)
+    """
+    start = time.perf_counter()
+    os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=spool_dir)
+    try:
+        with os.fdopen(fd, "wb") as output:
+            build_analysis_pdf(results, selected_documents, output, max_bytes, large_report_chars)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, os.path.getsize(path), time.perf_counter() - start
+
+
+def _wait_for_workers(barrier):
+    """
+    Inicializador de los procesos de render: espera a que arranquen todos los
+    del pool (ver PdfRenderPool._get_executor).
+    """
+    try:
+        barrier.wait(WORKER_START_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+
+
+@contextmanager
+def _neutral_main():
+    """
+    Oculta el módulo __main__ mientras se inician procesos con spawn. Streamlit
+    instala el script de la aplicación como __main__, y spawn lo volvería a
+    ejecutar completo en cada proceso de render. Afecta a todo el proceso, por
+    lo que solo se usa una vez, al crear el pool.
+    """
+    main_module = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+
+class PdfRenderPool:
+    """
+    Render de PDF en segundo plano en un pool de procesos, para que el layout de
+    ReportLab (CPU y GIL) no bloquee los hilos de las sesiones de Streamlit.
+
+    Cada PDF terminado se guarda en la caché de PDF compartida. El pool limita
+    los renders simultáneos (procesos) y los pendientes; por encima de ese
+    límite las solicitudes se rechazan y la UI genera el PDF bajo demanda.
+    """
+
+    def __init__(self, cache: PdfCache, max_workers: int = DEFAULT_RENDER_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING, spool_dir: str = DEFAULT_SPOOL_DIR,
+                 max_report_bytes: int = DEFAULT_MAX_REPORT_MB * 1024 * 1024,
+                 large_report_chars: int = DEFAULT_LARGE_REPORT_CHARS):
+        """
+        Args:
+            cache: Caché de PDF donde se dejan los renders terminados
+            max_workers: Procesos de render (renders simultáneos)
+            max_pending: Renders en cola o en curso como máximo
+            spool_dir: Directorio de los archivos temporales de salida
+            max_report_bytes: Tamaño máximo de cada PDF
+            large_report_chars: Caracteres a partir de los que se usa el modo de reporte grande
+        """
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.spool_dir = spool_dir
+        self.max_report_bytes = max_report_bytes
+        self.large_report_chars = large_report_chars
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._failed: Dict[str, str] = {}
+        self._rendered: "OrderedDict[str, None]" = OrderedDict()
+
+        # Contadores y tiempos de render para diagnóstico
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "broken": 0,
+                      "render_seconds_total": 0.0, "render_seconds_max": 0.0,
+                      "wait_seconds_total": 0.0, "bytes_total": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Crea el pool la primera vez (spawn: no se hace fork del servidor con sus
+        hilos) e inicia todos sus procesos de una vez, con __main__ oculto.
+
+        Con spawn, cada submit inicia un proceso nuevo mientras ninguno haya
+        terminado una tarea. Los procesos no empiezan a atender tareas hasta que
+        arrancan todos (barrera en el inicializador), así que max_workers envíos
+        los inician todos y los submit posteriores ya no inician ninguno.
+        """
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_wait_for_workers,
+                initargs=(context.Barrier(self.max_workers),)
+            )
+            with _neutral_main():
+                for _ in range(self.max_workers):
+                    executor.submit(os.getpid)
+            self._executor = executor
+        return self._executor
+
+    def submit(self, key: str, results: AnalysisResult, selected_documents: List[Dict[str, Any]]) -> bool:
+        """
+        Encola el render de un PDF si no está ya en la caché ni en curso.
+
+        Args:
+            key: Clave del PDF (pdf_cache_key)
+            results: Resultados procesados del análisis
+            selected_documents: Documentos incluidos en el reporte
+
+        Returns:
+            bool: True si el PDF está en curso o ya disponible; False si se rechazó
+            (cola llena o pool roto, que se vuelve a crear en el próximo envío)
+        """
+        with self._lock:
+            if key in self._pending:
+                return True
+            if len(self._pending) >= self.max_pending:
+                self.stats["rejected"] += 1
+                return False
+            if key in self.cache:
+                return True
+
+            self._failed.pop(key, None)
+            self._rendered.pop(key, None)
+            submitted_at = time.perf_counter()
+            try:
+                future = self._get_executor().submit(
+                    render_pdf_to_spool, results, list(selected_documents), self.spool_dir,
+                    self.max_report_bytes, self.large_report_chars
+                )
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. por falta de memoria) y el pool ya no acepta
+                # tareas: se descarta y la UI genera este PDF bajo demanda
+                logger.warning("El pool de render de PDF se rompió; se creará de nuevo")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self.stats["broken"] += 1
+                return False
+            self._pending[key] = future
+            self.stats["submitted"] += 1
+
+        future.add_done_callback(lambda done: self._collect(key, done, submitted_at))
+        return True
+
+    def _collect(self, key: str, future: Future, submitted_at: float):
+        """Pasa el PDF terminado del archivo de spool a la caché y registra los tiempos."""
+        try:
+            path, size, render_seconds = future.result()
+            try:
+                with open(path, "rb") as f:
+                    stored = self.cache.put(key, f.read())
+            finally:
+                os.remove(path)
+            if not stored:
+                # La UI lo genera bajo demanda y entrega los bytes sin pasar por la caché
+                raise ValueError(f"el PDF ({size / 1e6:.1f} MB) supera el tamaño de la caché de PDF")
+        except Exception as e:
+            logger.warning("Falló el render del PDF en segundo plano: %s", e)
+            with self._lock:
+                self._pending.pop(key, None)
+                self._failed[key] = str(e)
+                self.stats["failed"] += 1
+            return
+
+        with self._lock:
+            self._pending.pop(key, None)
+            self._rendered[key] = None
+            while len(self._rendered) > RENDERED_KEYS_MAX:
+                self._rendered.popitem(last=False)
+            self.stats["completed"] += 1
+            self.stats["bytes_total"] += size
+            self.stats["render_seconds_total"] += render_seconds
+            self.stats["render_seconds_max"] = max(self.stats["render_seconds_max"], render_seconds)
+            self.stats["wait_seconds_total"] += time.perf_counter() - submitted_at
+
+    def status(self, key: str) -> str:
+        """
+        Estado del render de un PDF. Un PDF que se generó pero ya no está en la
+        caché (descartado por tamaño antes de que se descargara) cuenta como
+        fallido, para que la UI lo genere bajo demanda en lugar de volver a
+        encolarlo.
+
+        Returns:
+            str: "ready", "pending", "failed" o "missing"
+        """
+        with self._lock:
+            if key in self._pending:
+                return "pending"
+            if key in self._failed:
+                return "failed"
+            rendered = key in self._rendered
+        if key in self.cache:
+            return "ready"
+        return "failed" if rendered else "missing"
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores y los tiempos medios de render.
+
+        Returns:
+            Dict: Contadores, in_flight, render_seconds_avg y wait_seconds_avg
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._pending)
+
+        completed = stats["completed"]
+        stats["render_seconds_avg"] = stats["render_seconds_total"] / completed if completed else 0.0
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / completed if completed else 0.0
+        return stats
+
+
+# Pool compartido por el proceso
+_pool: Optional[PdfRenderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_render_pool(cache: PdfCache, **settings) -> PdfRenderPool:
+    """
+    Devuelve el pool de render compartido, creándolo la primera vez.
+
+    Args:
+        cache: Caché de PDF compartida
+        **settings: Argumentos de PdfRenderPool (solo se usan al crearlo)
+
+    Returns:
+        PdfRenderPool: Pool compartido
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PdfRenderPool(cache, **settings)
+        return _pool
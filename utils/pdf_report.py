@@ -0,0 +1,377 @@
+import html
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import asBytes
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFBase85Encode, PDFName, PDFStream, PDFZCompress
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, SimpleDocTemplate, Paragraph, Spacer, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.colors import HexColor
+
+from utils.analysis_result import AnalysisResult
+
+# Este módulo no importa Streamlit para poder ejecutarse en procesos de render
+
+# Tamaño a partir del cual el PDF en construcción pasa de memoria a disco
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+
+# Tamaño máximo por defecto de un reporte
+DEFAULT_MAX_REPORT_MB = 50
+
+# Caracteres máximos de cada párrafo del PDF (los más largos se dividen)
+PARAGRAPH_CHUNK_CHARS = 2000
+
+# Texto total a partir del cual se usa el modo de reporte grande
+DEFAULT_LARGE_REPORT_CHARS = 200_000
+
+# Elementos del story que se preparan por adelantado en el modo de reporte grande
+LAZY_STORY_LOOKAHEAD = 32
+
+
+class ReportTooLargeError(Exception):
+    """El PDF generado supera el tamaño máximo permitido."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"El PDF supera el tamaño máximo de {max_bytes / 1e6:.0f} MB")
+
+
+class ReportTemplate:
+    """
+    Estilos del reporte, construidos una sola vez por proceso. Los estilos no se
+    modifican al construir un documento, así que se comparten entre renders
+    simultáneos; el documento y su plantilla de página (que guardan el estado
+    del layout) se crean por render con new_document.
+    """
+
+    def __init__(self, page_compression: int = 1):
+        """
+        Args:
+            page_compression: 1 para comprimir el contenido de las páginas (zlib)
+        """
+        self.page_compression = page_compression
+        styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=20,
+            spaceAfter=30,
+            alignment=1,  # Centrado
+            textColor=HexColor('#2C3E50'),
+            fontName='Helvetica-Bold'
+        )
+
+        self.subtitle_style = styles['Heading2']
+
+        self.section_title_style = ParagraphStyle(
+            'SectionTitle',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=15,
+            spaceBefore=20,
+            textColor=HexColor('#3498DB'),
+            fontName='Helvetica-Bold'
+        )
+
+        self.content_style = ParagraphStyle(
+            'Content',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=12,
+            alignment=4,  # Justificado
+            fontName='Helvetica',
+            leading=16
+        )
+
+        # Partes de un párrafo dividido, salvo la última: sin espacio debajo
+        self.content_chunk_style = ParagraphStyle(
+            'ContentChunk',
+            parent=self.content_style,
+            spaceAfter=0
+        )
+
+        self.doc_list_style = ParagraphStyle(
+            'DocList',
+            parent=styles['Normal'],
+            fontSize=10,
+            spaceAfter=8,
+            leftIndent=20,
+            fontName='Helvetica'
+        )
+
+    def new_document(self, output: BinaryIO) -> SimpleDocTemplate:
+        """Documento A4 con los márgenes del reporte y compresión de páginas."""
+        return SimpleDocTemplate(
+            output,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=18,
+            pageCompression=self.page_compression
+        )
+
+
+_template: Optional[ReportTemplate] = None
+_template_lock = threading.Lock()
+
+
+def get_report_template() -> ReportTemplate:
+    """Devuelve la plantilla del reporte del proceso, creándola la primera vez."""
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = ReportTemplate()
+        return _template
+
+
+class _CappedOutput:
+    """
+    Archivo de salida que rechaza escrituras por encima de un tamaño máximo.
+    ReportLab escribe el PDF completo de una vez al terminar, así que esta es
+    una comprobación posterior a la construcción; en el modo de reporte grande
+    el límite ya se aplica durante el maquetado (ver _SpoolingCanvas).
+    """
+
+    def __init__(self, output: BinaryIO, max_bytes: int):
+        self._output = output
+        self._max_bytes = max_bytes
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        if self.written + len(data) > self._max_bytes:
+            raise ReportTooLargeError(self._max_bytes)
+        self.written += len(data)
+        return self._output.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self._output, name)
+
+
+def split_paragraph(text: str, max_chars: int = PARAGRAPH_CHUNK_CHARS) -> List[str]:
+    """
+    Divide un párrafo en partes de hasta max_chars caracteres, cortando en el
+    último espacio disponible (o en max_chars si no hay ninguno).
+
+    Args:
+        text: Texto del párrafo (sin escapar)
+        max_chars: Longitud máxima de cada parte
+
+    Returns:
+        List[str]: Partes del párrafo, en orden
+    """
+    chunks = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def report_text_size(results: AnalysisResult) -> int:
+    """Caracteres totales de las secciones del análisis."""
+    return sum(len(paragraph) for _, paragraphs in results.iter_sections() for paragraph in paragraphs)
+
+
+def _iter_story(template: ReportTemplate, results: AnalysisResult,
+                selected_documents: List[Dict[str, Any]]) -> Iterator[Flowable]:
+    """Genera los elementos del reporte en orden."""
+    # Título principal
+    yield Paragraph("CENTRO DE ANÁLISIS DOCUMENTARIO", template.title_style)
+    yield Paragraph("Reporte de Análisis", template.subtitle_style)
+    yield Spacer(1, 20)
+
+    # Información del reporte
+    current_date = datetime.now().strftime("%d/%m/%Y %H:%M")
+    yield Paragraph(f"<b>Fecha de generación:</b> {current_date}", template.content_style)
+    yield Paragraph(f"<b>Total de documentos analizados:</b> {len(selected_documents)}", template.content_style)
+    yield Spacer(1, 20)
+
+    # Lista de documentos analizados
+    yield Paragraph("Documentos Analizados", template.section_title_style)
+    for i, document in enumerate(selected_documents, 1):
+        doc_name = document.get('name', 'Sin nombre')
+        # Escapar caracteres especiales
+        doc_name = escape_xml_chars(doc_name)
+        doc_text = f"{i}. {doc_name}"
+        yield Paragraph(doc_text, template.doc_list_style)
+
+    yield Spacer(1, 30)
+    yield PageBreak()
+
+    # Secciones del análisis
+    sections_data = [
+        ("Introducción", results.paragraphs("introduction")),
+        ("Contexto", results.paragraphs("contexto")),
+        ("Resúmenes Ejecutivos", results.paragraphs("resumenes_ejecutivos")),
+        ("Análisis Detallado", results.paragraphs("analisis_detallado")),
+        ("Comparación de Documentos", results.paragraphs("comparacion_documentos")),
+        ("Conclusión", results.paragraphs("conclusion"))
+    ]
+
+    for section_name, paragraphs in sections_data:
+        if any(paragraph.strip() for paragraph in paragraphs):
+            # Título de la sección
+            yield Paragraph(section_name, template.section_title_style)
+
+            # Un párrafo del PDF por párrafo de la sección; los largos se
+            # dividen en partes (antes de escapar, para no cortar entidades)
+            for paragraph in paragraphs:
+                if paragraph.strip():
+                    chunks = split_paragraph(paragraph.strip().replace('\n', ' '))
+                    for chunk in chunks[:-1]:
+                        yield Paragraph(escape_xml_chars(chunk), template.content_chunk_style)
+                    yield Paragraph(escape_xml_chars(chunks[-1]), template.content_style)
+
+            yield Spacer(1, 20)
+
+
+class _LazyStory(list):
+    """
+    Story que ReportLab consume desde el principio y que se rellena desde un
+    generador a medida que se consume, de modo que solo hay en memoria unos
+    pocos elementos por delante de la página en curso.
+    """
+
+    def __init__(self, flowables: Iterator[Flowable], lookahead: int = LAZY_STORY_LOOKAHEAD):
+        super().__init__()
+        self._flowables = flowables
+        self._lookahead = lookahead
+        self._fill()
+
+    def _fill(self):
+        while list.__len__(self) < self._lookahead:
+            flowable = next(self._flowables, None)
+            if flowable is None:
+                break
+            self.append(flowable)
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._fill()
+
+
+class _SpooledPageStream(PDFStream):
+    """Contenido de una página ya codificado y guardado en el archivo de spool."""
+
+    def __init__(self, spool: BinaryIO, offset: int, length: int, filter_names: List[str]):
+        super().__init__(content=b"")
+        # Con Filter ya definido, PDFStream.format no vuelve a codificar el contenido
+        self.dictionary["Filter"] = PDFArray([PDFName(name) for name in filter_names])
+        self._spool = spool
+        self._offset = offset
+        self._length = length
+
+    def format(self, document):
+        self._spool.seek(self._offset)
+        self.content = self._spool.read(self._length)
+        try:
+            return super().format(document)
+        finally:
+            self.content = b""
+
+
+class _SpoolingCanvas(Canvas):
+    """
+    Canvas que, al cerrar cada página, codifica su contenido con los mismos
+    filtros que usaría ReportLab al guardar y lo pasa al archivo de spool; en
+    memoria queda solo la referencia a esa posición.
+
+    El contenido de las páginas es la mayor parte del PDF final, así que en
+    cuanto el spool supera max_bytes el render se corta, sin maquetar el resto.
+    """
+
+    def __init__(self, *args, spool: BinaryIO, max_bytes: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._spool = spool
+        self._max_bytes = max_bytes
+
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if not page.stream or not page.compression:
+            return
+
+        filters = [PDFBase85Encode, PDFZCompress] if rl_config.useA85 else [PDFZCompress]
+        data = page.stream
+        for stream_filter in reversed(filters):
+            data = stream_filter.encode(data)
+        data = asBytes(data)
+
+        self._spool.seek(0, 2)
+        offset = self._spool.tell()
+        if offset + len(data) > self._max_bytes:
+            raise ReportTooLargeError(self._max_bytes)
+        self._spool.write(data)
+        page.Contents = _SpooledPageStream(self._spool, offset, len(data),
+                                           [stream_filter.pdfname for stream_filter in filters])
+        page.stream = None
+
+
+def build_analysis_pdf(results: AnalysisResult, selected_documents: List[Dict[str, Any]], output: BinaryIO,
+                       max_bytes: int = DEFAULT_MAX_REPORT_MB * 1024 * 1024,
+                       large_report_chars: int = DEFAULT_LARGE_REPORT_CHARS) -> int:
+    """
+    Construye el PDF del análisis y lo escribe en `output`. Los párrafos largos
+    se dividen en varias partes, sin recortar texto.
+
+    Con más de large_report_chars caracteres de texto se usa el modo de reporte
+    grande: el story se genera a medida que se maqueta y cada página terminada
+    se comprime y se pasa a un archivo temporal, de modo que la memoria no crece
+    con la longitud de las secciones (salvo por el PDF final comprimido). En
+    este modo el límite de tamaño se comprueba al pasar cada página, y el render
+    se detiene en cuanto se supera; en el modo normal se comprueba al escribir
+    el PDF terminado.
+
+    Args:
+        results: Resultados procesados del análisis
+        selected_documents: Lista de documentos seleccionados
+        output: Archivo binario de destino
+        max_bytes: Tamaño máximo del PDF
+        large_report_chars: Caracteres a partir de los que se usa el modo de reporte grande
+
+    Returns:
+        int: Cantidad de páginas
+
+    Raises:
+        ReportTooLargeError: Si el PDF supera max_bytes (no se escribe nada)
+        Exception: Cualquier error de ReportLab al construir el documento
+    """
+    template = get_report_template()
+    pdf_doc = template.new_document(_CappedOutput(output, max_bytes))
+    story = _iter_story(template, results, selected_documents)
+
+    if report_text_size(results) < large_report_chars:
+        pdf_doc.build(list(story))
+        return pdf_doc.page
+
+    with tempfile.TemporaryFile() as spool:
+        def canvasmaker(*args, **kwargs):
+            return _SpoolingCanvas(*args, spool=spool, max_bytes=max_bytes, **kwargs)
+
+        pdf_doc.build(_LazyStory(story), canvasmaker=canvasmaker)
+    return pdf_doc.page
+
+
+def escape_xml_chars(text: str) -> str:
+    """
+    Escapa caracteres especiales para XML/HTML (&, <, >, comillas dobles y simples).
+    
+    Args:
+        text: Texto a escapar
+        
+    Returns:
+        str: Texto escapado
+    """
+    if not isinstance(text, str):
+        text = str(text)
+    return html.escape(text)
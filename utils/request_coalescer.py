@@ -0,0 +1,249 @@
+import queue
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Llamadas al API distintas que se ejecutan a la vez (las demás esperan turno)
+DEFAULT_UPSTREAM_WORKERS = 8
+
+# Origen del resultado devuelto por RequestCoalescer.run
+CACHED = "cached"      # Encontrado por lookup, sin llamada al API
+STARTED = "started"    # Esta solicitud inició la llamada
+JOINED = "joined"      # Se unió a una llamada en curso de otra sesión
+
+# Función que publica un evento de la llamada (tipo, *argumentos) a todas las solicitudes que la esperan
+Publish = Callable[..., None]
+
+# Marca de fin en la cola de eventos de cada solicitud
+_DONE = object()
+
+
+class _Flight:
+    """
+    Llamada en curso para una clave: su resultado y los eventos publicados
+    (progreso, secciones, errores). Cada solicitud que la espera recibe los
+    eventos en su propia cola, incluidos los publicados antes de unirse.
+    """
+
+    def __init__(self):
+        self.future: Future = Future()
+        self._lock = threading.Lock()
+        self._events: List[Tuple[Any, ...]] = []
+        self._subscribers: List[queue.SimpleQueue] = []
+        self._done = False
+
+    def subscribe(self) -> queue.SimpleQueue:
+        """Cola de eventos de una solicitud nueva, con los eventos ya publicados."""
+        events = queue.SimpleQueue()
+        with self._lock:
+            for event in self._events:
+                events.put(event)
+            if self._done:
+                events.put(_DONE)
+            else:
+                self._subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events: queue.SimpleQueue):
+        """Deja de enviar eventos a una solicitud (terminó o su sesión se interrumpió)."""
+        with self._lock:
+            if events in self._subscribers:
+                self._subscribers.remove(events)
+
+    @property
+    def waiters(self) -> int:
+        """Solicitudes que esperan la llamada."""
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, *event):
+        """Envía un evento a todas las solicitudes que esperan la llamada."""
+        with self._lock:
+            self._events.append(event)
+            for events in self._subscribers:
+                events.put(event)
+
+    def finish(self):
+        """Avisa a las solicitudes que la llamada terminó (el resultado está en future)."""
+        with self._lock:
+            self._done = True
+            for events in self._subscribers:
+                events.put(_DONE)
+            self._subscribers.clear()
+
+
+class RequestCoalescer:
+    """
+    Agrupa solicitudes idénticas en curso (single-flight) entre todas las sesiones.
+
+    La llamada al API se ejecuta en un pool de hilos compartido, desacoplada de
+    las sesiones: si la sesión que la inició se vuelve a ejecutar o se cierra,
+    la llamada sigue para las demás. Las solicitudes que llegan mientras sigue
+    en curso esperan su resultado en lugar de repetir la llamada, y reciben sus
+    eventos en su propio hilo. Al terminar, la clave se libera: las solicitudes
+    posteriores dependen de la caché de resultados, no de este objeto.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_UPSTREAM_WORKERS):
+        """
+        Args:
+            max_workers: Llamadas al API distintas que se ejecutan a la vez
+        """
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, _Flight] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Contadores para diagnóstico
+        self.stats = {"upstream_calls": 0, "coalesced": 0, "cached": 0, "errors": 0, "max_waiters": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Crea el pool la primera vez (debe llamarse con el lock tomado)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="analysis-upstream")
+        return self._executor
+
+    def run(self, key: str, call: Callable[[Publish], Any],
+            on_event: Optional[Callable[..., None]] = None,
+            lookup: Optional[Callable[[], Any]] = None,
+            peek: Optional[Callable[[], Any]] = None) -> Tuple[Any, str]:
+        """
+        Devuelve el resultado de la clave: desde lookup, uniéndose a la llamada
+        en curso o iniciando una nueva, y espera a que termine.
+
+        Args:
+            key: Clave canónica de la solicitud (p. ej. canonical_key)
+            call: Función que hace la llamada al API. Se ejecuta en el pool, sin
+                contexto de Streamlit, y recibe `publish` para emitir eventos
+            on_event: Función opcional que recibe cada evento (tipo, *argumentos)
+                en el hilo de esta solicitud
+            lookup: Función opcional que busca el resultado ya guardado (p. ej. en
+                la caché, incluido el disco). Se consulta sin el lock, salvo que
+                haya una llamada en curso para la clave
+            peek: Función opcional y rápida (p. ej. solo la memoria de la caché)
+                que se consulta con el lock tomado antes de iniciar una llamada,
+                de modo que una llamada que terminó y liberó la clave mientras se
+                consultaba lookup no se repite
+
+        Returns:
+            Tuple[Any, str]: (resultado, CACHED, STARTED o JOINED)
+
+        Raises:
+            Exception: La excepción de la llamada, en todas las solicitudes que la esperaban
+        """
+        # La búsqueda completa (disco, descompresión) no bloquea a las demás claves
+        if lookup and not self.is_in_flight(key):
+            cached = lookup()
+            if cached is not None:
+                with self._lock:
+                    self.stats["cached"] += 1
+                return cached, CACHED
+
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is None:
+                cached = peek() if peek else None
+                if cached is not None:
+                    self.stats["cached"] += 1
+                    return cached, CACHED
+                flight = _Flight()
+                self._in_flight[key] = flight
+                self.stats["upstream_calls"] += 1
+                self._get_executor().submit(self._execute, key, flight, call)
+                source = STARTED
+            else:
+                self.stats["coalesced"] += 1
+                source = JOINED
+            events = flight.subscribe()
+            self.stats["max_waiters"] = max(self.stats["max_waiters"], flight.waiters)
+
+        if source == JOINED:
+            logger.info("Solicitud agrupada con un análisis en curso (%s)", key[:12])
+
+        # Los eventos se atienden en el hilo de la solicitud; si su sesión se interrumpe
+        # (st.rerun, st.stop), solo esta solicitud deja de esperar
+        try:
+            while True:
+                event = events.get()
+                if event is _DONE:
+                    break
+                if on_event:
+                    on_event(*event)
+        finally:
+            flight.unsubscribe(events)
+
+        return flight.future.result(), source
+
+    def _execute(self, key: str, flight: _Flight, call: Callable[[Publish], Any]):
+        """Ejecuta la llamada en el pool y entrega el resultado a todas las solicitudes."""
+        try:
+            result = call(flight.publish)
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            flight.future.set_exception(e)
+        except BaseException as e:
+            # Nunca se propagan a las sesiones excepciones de control ajenas
+            with self._lock:
+                self.stats["errors"] += 1
+            flight.future.set_exception(RuntimeError(f"Llamada interrumpida: {e!r}"))
+            raise
+        else:
+            flight.future.set_result(result)
+        finally:
+            # La llamada guarda el resultado (p. ej. en la caché) antes de liberar la clave
+            with self._lock:
+                del self._in_flight[key]
+            flight.finish()
+
+    def is_in_flight(self, key: str) -> bool:
+        """Indica si hay una llamada en curso para la clave."""
+        with self._lock:
+            return key in self._in_flight
+
+    def hit_counts(self) -> Tuple[int, int]:
+        """Solicitudes agrupadas (aciertos) y llamadas al API (fallos) para las métricas."""
+        with self._lock:
+            return self.stats["coalesced"], self.stats["upstream_calls"]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores y las llamadas al API ahorradas.
+
+        Returns:
+            Dict: Contadores, in_flight, saved_calls y saved_ratio
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._in_flight)
+
+        requests = stats["upstream_calls"] + stats["coalesced"]
+        stats["saved_calls"] = stats["coalesced"]
+        stats["saved_ratio"] = stats["coalesced"] / requests if requests else 0.0
+        return stats
+
+
+# Agrupador compartido por el proceso
+_coalescer: Optional[RequestCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """
+    Devuelve el agrupador de solicitudes compartido, creándolo la primera vez.
+
+    Returns:
+        RequestCoalescer: Agrupador compartido por todas las sesiones
+    """
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = RequestCoalescer()
+            get_metrics_registry().register_cache("request_coalescer", _coalescer.hit_counts)
+        return _coalescer
@@ -0,0 +1,70 @@
+import time
+from typing import Dict, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Nombre de la ejecución completa de la página
+APP_SCOPE = "app"
+
+
+class RerunTimer:
+    """
+    Mide el tiempo de script de una ejecución de la página completa o de uno de
+    sus fragmentos, y guarda el último tiempo de cada uno en la sesión. También
+    cuenta las ejecuciones de script de la sesión: las completas y las de
+    fragmentos que se ejecutan solos.
+    """
+
+    def __init__(self, scope: str):
+        """
+        Args:
+            scope: APP_SCOPE o el nombre del fragmento
+        """
+        self.scope = scope
+        self.start = time.perf_counter()
+        if not self.in_full_run:
+            counts = get_rerun_counts()
+            counts[scope] = counts.get(scope, 0) + 1
+
+    @property
+    def in_full_run(self) -> bool:
+        """
+        Indica si el fragmento se ejecuta como parte de una ejecución completa.
+        Se consulta en la ejecución de script actual y no en un indicador de la
+        sesión, que quedaría activo si la página termina antes (st.rerun,
+        st.stop o un error).
+        """
+        return self.scope != APP_SCOPE and not _fragment_only_run()
+
+    def stop(self) -> float:
+        """
+        Termina la medición y la guarda como último tiempo del ámbito.
+
+        Returns:
+            float: Segundos de script
+        """
+        elapsed = time.perf_counter() - self.start
+        get_rerun_timings()[self.scope] = elapsed
+        return elapsed
+
+
+def _fragment_only_run() -> bool:
+    """Indica si la ejecución de script actual es solo de fragmentos (sin la página completa)."""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def get_rerun_timings() -> Dict[str, float]:
+    """Último tiempo de script (segundos) de la página y de cada fragmento en esta sesión."""
+    return st.session_state.setdefault("_rerun_timings", {})
+
+
+def get_rerun_counts() -> Dict[str, int]:
+    """Ejecuciones de script de la sesión: completas (APP_SCOPE) y de cada fragmento ejecutado solo."""
+    return st.session_state.setdefault("_rerun_counts", {})
+
+
+def last_full_run_seconds() -> Optional[float]:
+    """Tiempo de la última ejecución completa de la página, o None si aún no terminó ninguna."""
+    return get_rerun_timings().get(APP_SCOPE)
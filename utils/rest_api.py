@@ -1,10 +1,84 @@
 import streamlit as st
 import requests
+import copy
 import json
 import time
-import re
-from typing import Dict, Any, List, Optional, Tuple
+import logging
+from typing import Callable, Dict, Any, List, Mapping, Optional, Tuple
+from functools import partial
 from urllib.parse import urlencode, quote
+from utils.token_provider import TokenFetchError, get_token_provider
+from utils.http_transport import HttpTransport, get_http_transport, DEFAULT_CONNECT_TIMEOUT
+from utils.catalog_cache import get_catalog_cache, DEFAULT_TTL_SECONDS
+from utils.result_cache import (AnalysisResultCache, DEFAULT_CACHE_PATH, DEFAULT_MAX_DISK_MB,
+                                DEFAULT_MEMORY_ENTRIES, canonical_key, get_result_cache)
+from utils.result_cache import DEFAULT_TTL_SECONDS as RESULT_CACHE_TTL_SECONDS
+from utils.request_coalescer import CACHED, JOINED, get_request_coalescer
+from utils.result_decoder import decode_analysis_response, loads
+from utils.analysis_result import AnalysisResult
+from utils.stream_decoder import NDJSON_CONTENT_TYPE, SSE_CONTENT_TYPE, iter_stream_events
+from utils.catalog_store import CatalogStore, EMPTY_CATALOG
+from utils.session import set_analysis_results, sync_catalog
+from utils.metrics import get_metrics_registry, instrument
+from utils.catalog_ingest import (DEFAULT_CHUNK_SIZE, extract_document_number,
+                                  ingest_documents, iter_processed_documents)
+
+logger = logging.getLogger(__name__)
+
+# Métricas de las operaciones cuyos bytes se conocen dentro de la llamada (cuerpo de la respuesta)
+_FETCH_DOCUMENTS_METRICS = get_metrics_registry().operation("fetch_documents")
+_GENERATE_ANALYSIS_METRICS = get_metrics_registry().operation("generate_analysis")
+
+class DocumentsFetchError(Exception):
+    """Error al obtener el catálogo de documentos del API."""
+
+
+def request_cognito_token(transport: HttpTransport, auth_url: str, client_id: str,
+                          client_secret: str, scope: str) -> Tuple[str, int]:
+    """
+    Solicita un token nuevo a Cognito con el flujo client_credentials.
+    
+    Args:
+        transport: Transporte HTTP compartido
+        auth_url: URL completa para obtener el token
+        client_id: Client ID de Cognito
+        client_secret: Client secret de Cognito
+        scope: Scopes solicitados
+        
+    Returns:
+        Tuple[str, int]: (access_token, expires_in)
+        
+    Raises:
+        TokenFetchError: Si la respuesta no es exitosa
+    """
+    # Preparar payload para la solicitud de token
+    payload = {
+        "grant_type": "client_credentials",
+        "scope": scope,
+        "client_id": client_id,
+        "client_secret": client_secret
+    }
+    payload = urlencode(payload, quote_via=quote)
+    
+    # Hacer la solicitud para obtener el token (client_credentials se puede repetir sin efectos)
+    response = transport.request('POST',
+        auth_url,
+        idempotent=True,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        data=payload
+    )
+    
+    if response.status_code != 200:
+        raise TokenFetchError(f"Error al obtener token: {response.status_code} - {response.text}")
+    
+    token_data = response.json()
+    access_token = token_data.get("access_token")
+    if not access_token:
+        raise TokenFetchError("Error al obtener token: la respuesta no contiene access_token")
+    
+    # Default 1 hora
+    return access_token, int(token_data.get("expires_in", 3600))
+
 
 class DocumentAnalysisAPI:
     """
@@ -12,73 +86,92 @@ class DocumentAnalysisAPI:
     Maneja la autenticación con Cognito y las solicitudes al API Gateway.
     """
     
-    def __init__(self):
-        """Inicializa el cliente API."""
+    def __init__(self, config: Optional[Mapping[str, Any]] = None,
+                 on_error: Optional[Callable[[str], None]] = None):
+        """
+        Inicializa el cliente API.
+        
+        Args:
+            config: Configuración con las secciones "api" y "cognito" (por defecto st.secrets).
+                Permite usar el cliente fuera de Streamlit.
+            on_error: Función que recibe los mensajes de error (por defecto st.error)
+        """
+        if config is None:
+            config = st.secrets
+        api_config = config["api"]
+        cognito_config = config["cognito"]
+        self.on_error = on_error or st.error
+        
         # URLs de los endpoints (desde secrets)
-        self.auth_url = st.secrets["api"]["auth_url"]  # URL completa para obtener token
-        self.documents_url = st.secrets["api"]["documents_url"]  # URL para obtener documentos
-        self.generate_url = st.secrets["api"]["generate_url"]  # URL para generar análisis
+        self.auth_url = api_config["auth_url"]  # URL completa para obtener token
+        self.documents_url = api_config["documents_url"]  # URL para obtener documentos
+        self.generate_url = api_config["generate_url"]  # URL para generar análisis
         
         # Credenciales de autenticación
-        self.client_id = st.secrets["cognito"]["client_id"]
-        self.client_secret = st.secrets["cognito"]["client_secret"]
-        self.scope = st.secrets["cognito"]["scope"]  # "poc-smv-genai-api/write poc-smv-genai-api/read"
+        self.client_id = cognito_config["client_id"]
+        self.client_secret = cognito_config["client_secret"]
+        self.scope = cognito_config["scope"]  # "poc-smv-genai-api/write poc-smv-genai-api/read"
+        
+        # Configuración de timeout (timeout_seconds se mantiene como timeout de lectura por defecto)
+        self.timeout = api_config.get("timeout_seconds", 30)
+        self.connect_timeout = api_config.get("connect_timeout_seconds", DEFAULT_CONNECT_TIMEOUT)
+        self.read_timeout = api_config.get("read_timeout_seconds", self.timeout)
+        
+        # Transporte HTTP con conexiones keep-alive compartido por todas las sesiones
+        self.transport = get_http_transport(
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            pool_maxsize=api_config.get("pool_maxsize", 32),
+            max_retries=api_config.get("max_retries", 3)
+        )
+        
+        # Modo jobs (asíncrono): si hay jobs_url, el análisis se envía y se consulta su estado
+        self.jobs_url = api_config.get("jobs_url")
+        self.job_poll_interval = api_config.get("job_poll_interval_seconds", 0.5)
+        self.job_poll_max_interval = api_config.get("job_poll_max_interval_seconds", 5)
+        self.job_timeout = api_config.get("job_timeout_seconds", 900)
         
-        # Estado de la autenticación
-        self.token = None
-        self.token_expiry = 0  # Timestamp de expiración
+        # Modo streaming: las secciones del análisis llegan (NDJSON o SSE) a medida que se generan
+        self.stream_url = api_config.get("stream_url")
         
-        # Configuración de timeout
-        self.timeout = st.secrets["api"].get("timeout_seconds", 30)
+        # Versión del modelo (forma parte de la clave de la caché de resultados)
+        self.model_tag = api_config.get("model_tag")
+        
+        # Ingestión en streaming del catálogo (evita cargar el cuerpo completo en memoria)
+        self.stream_catalog = api_config.get("stream_catalog", True)
+        self.last_ingest_stats: Optional[Dict[str, Any]] = None
+        
+        # Proveedor de tokens compartido por todas las sesiones del proceso
+        self.token_provider = get_token_provider(
+            self.auth_url,
+            self.client_id,
+            self.scope,
+            partial(request_cognito_token, self.transport, self.auth_url,
+                    self.client_id, self.client_secret, self.scope)
+        )
     
+    @property
+    def token_expiry(self) -> float:
+        """Timestamp de expiración del token compartido actual."""
+        return self.token_provider.token_expiry
+    
+    @instrument("get_token", failed=lambda token: token is None)
     def get_token(self) -> Optional[str]:
         """
-        Obtiene un token de acceso de Cognito. Si ya existe un token válido,
-        lo devuelve directamente, de lo contrario solicita uno nuevo.
+        Obtiene un token de acceso de Cognito desde el proveedor compartido.
+        El proveedor lo refresca en segundo plano antes de que expire, por lo que
+        normalmente se devuelve sin hacer ninguna solicitud.
         
         Returns:
             str: Token de acceso o None si falla la obtención
         """
-        # Verificar si ya tenemos un token válido (con margen de 5 minutos)
-        current_time = time.time()
-        if self.token and current_time < (self.token_expiry - 300):
-            return self.token
-        
-        # Si no hay token o está a punto de expirar, obtener uno nuevo
         try:
-            # Preparar payload para la solicitud de token
-            payload = {
-                "grant_type": "client_credentials",
-                "scope": self.scope,
-                "client_id": self.client_id,
-                "client_secret": self.client_secret
-            }
-            payload=urlencode(payload, quote_via = quote)
-            
-            # Hacer la solicitud para obtener el token
-            response = requests.request('POST',
-                self.auth_url,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                data=payload,
-                timeout=self.timeout
-            )
-            
-            # Verificar si la solicitud fue exitosa
-            if response.status_code == 200:
-                token_data = response.json()
-                self.token = token_data.get("access_token")
-                
-                # Calcular la expiración (restar 5 minutos para ser conservadores)
-                expires_in = token_data.get("expires_in", 3600)  # Default 1 hora
-                self.token_expiry = current_time + expires_in
-                
-                return self.token
-            else:
-                st.error(f"Error al obtener token: {response.status_code} - {response.text}")
-                return None
-                
+            return self.token_provider.get_token()
+        except TokenFetchError as e:
+            self.on_error(str(e))
+            return None
         except Exception as e:
-            st.error(f"Error en la autenticación: {str(e)}")
+            self.on_error(f"Error en la autenticación: {str(e)}")
             return None
     
     def get_documents(self) -> List[Dict[str, str]]:
@@ -86,59 +179,99 @@ class DocumentAnalysisAPI:
         Obtiene la lista de documentos disponibles desde el API.
         
         Returns:
-            List[Dict]: Lista de documentos con id y nombre
+            List[Dict]: Lista de documentos con id y nombre (vacía si hay error)
+        """
+        return self._request_documents() or []
+    
+    @instrument("get_documents", failed=lambda documents: documents is None)
+    def _request_documents(self) -> Optional[List[Dict[str, str]]]:
+        """
+        Solicita los documentos e informa los errores con on_error. Devuelve None
+        si hubo error, para que las métricas no cuenten un catálogo vacío como fallo.
+        
+        Returns:
+            List[Dict]: Lista de documentos, o None si hay error
         """
         # Obtener token de acceso
         token = self.get_token()
         if not token:
-            st.error("No se pudo obtener el token de autenticación.")
-            return []
+            self.on_error("No se pudo obtener el token de autenticación.")
+            return None
         
         try:
-            # Configurar headers con el token Bearer
-            headers = {
-                "Authorization": f"Bearer {token}"
-            }
+            documents, _, _ = self.fetch_documents()
+            return documents or []
+        except DocumentsFetchError as e:
+            self.on_error(str(e))
+            return None
+        except Exception as e:
+            self.on_error(f"Error al obtener documentos: {str(e)}")
+            return None
+    
+    @instrument("fetch_documents")
+    def fetch_documents(self, etag: Optional[str] = None,
+                        last_modified: Optional[str] = None,
+                        as_store: bool = False) -> Tuple[Any, Optional[str], Optional[str]]:
+        """
+        Descarga el catálogo con una solicitud condicional. No usa la UI de Streamlit,
+        por lo que se puede llamar desde hilos en segundo plano.
+        
+        Args:
+            etag: ETag de la versión en caché (se envía como If-None-Match)
+            last_modified: Last-Modified de la versión en caché (se envía como If-Modified-Since)
+            as_store: Si es True, devuelve un CatalogStore compacto en lugar de una lista de dicts
             
-            # Realizar la solicitud GET al API
-            response = requests.request('GET',
-                self.documents_url,
-                headers=headers,
-                timeout=self.timeout
-            )
+        Returns:
+            Tuple: (documentos procesados o None si el API respondió 304, etag, last_modified)
             
-            # Verificar si la solicitud fue exitosa
-            if response.status_code == 200:
-                documents_data = response.json()
-                
-                # Procesar los documentos recibidos
-                processed_documents = []
-                for doc in documents_data:
-                    # Usar NUM_INTERNO_DOC como ID principal
-                    #doc_id = doc.get("NUM_INTERNO_DOC", "")
-                    doc_name = doc.get("NOMBRE_DOCUMENTO", "")
-                    doc_id = self._extract_document_number(doc_name)
-                    # Extraer el número del documento del nombre para el campo "number"
-                    doc_number = self._extract_document_number(doc_name)
-                    
-                    # Si por alguna razón no hay NUM_INTERNO_DOC, usar el número extraído
-                    if not doc_id:
-                        doc_id = doc_number if doc_number else f"doc_{len(processed_documents)}"
-                    
-                    processed_documents.append({
-                        "id": doc_id,
-                        "name": doc_name,
-                        "number": doc_number,
-                    })
-                
-                return processed_documents
+        Raises:
+            TokenFetchError: Si no se pudo obtener el token
+            DocumentsFetchError: Si el API responde con error
+        """
+        # Configurar headers con el token Bearer
+        headers = {
+            "Authorization": f"Bearer {self.token_provider.get_token()}"
+        }
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        
+        # Realizar la solicitud GET al API (en streaming si está habilitado)
+        response = self.transport.request('GET',
+            self.documents_url,
+            headers=headers,
+            stream=self.stream_catalog
+        )
+        
+        try:
+            new_etag = response.headers.get("ETag")
+            new_last_modified = response.headers.get("Last-Modified")
+            
+            # El catálogo no cambió desde la versión en caché
+            if response.status_code == 304:
+                return None, new_etag, new_last_modified
+            
+            if response.status_code != 200:
+                raise DocumentsFetchError(f"Error al obtener documentos: {response.status_code} - {response.text}")
+            
+            collect = CatalogStore.from_documents if as_store else list
+            
+            if self.stream_catalog:
+                # Decodificar el cuerpo a medida que llega, registro por registro
+                documents, stats = ingest_documents(response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE),
+                                                    collect=collect)
+                self.last_ingest_stats = stats
+                _FETCH_DOCUMENTS_METRICS.add_bytes(stats["bytes"])
+                logger.info("Catálogo ingerido: %d documentos, %.0f docs/s, buffer máx. %d caracteres",
+                            stats["rows"], stats["rows_per_sec"], stats["peak_buffer_chars"])
             else:
-                st.error(f"Error al obtener documentos: {response.status_code} - {response.text}")
-                return []
-                
-        except Exception as e:
-            st.error(f"Error al obtener documentos: {str(e)}")
-            return []
+                _FETCH_DOCUMENTS_METRICS.add_bytes(len(response.content))
+                documents = collect(iter_processed_documents(response.json()))
+            
+            return documents, new_etag, new_last_modified
+        finally:
+            response.close()
     
     def _extract_document_number(self, doc_name: str) -> str:
         """
@@ -150,13 +283,10 @@ class DocumentAnalysisAPI:
         Returns:
             str: Número del documento extraído
         """
-        # Extraer el número al inicio del nombre del documento
         # Ejemplo: "2020029582 - RSASCM 074 ICCGSA.docx" -> "2020029582"
-        match = re.match(r"^(\d+)", doc_name)
-        if match:
-            return match.group(1)
-        return ""
+        return extract_document_number(doc_name)
     
+    @instrument("generate_analysis", failed=lambda results: results is None)
     def generate_analysis(self, document_numbers: List[str]) -> Optional[Dict[str, Any]]:
         """
         Solicita el análisis de los documentos seleccionados.
@@ -170,7 +300,7 @@ class DocumentAnalysisAPI:
         # Obtener token de acceso
         token = self.get_token()
         if not token:
-            st.error("No se pudo obtener el token de autenticación.")
+            self.on_error("No se pudo obtener el token de autenticación.")
             return None
         
         try:
@@ -186,16 +316,16 @@ class DocumentAnalysisAPI:
             }
             
             # Realizar la solicitud POST al API
-            response = requests.request('POST',
+            response = self.transport.request('POST',
                 self.generate_url,
                 data=payload,
-                headers=headers,
-                timeout=self.timeout
+                headers=headers
             )
             
             # Verificar si la solicitud fue exitosa
             if response.status_code == 200:
-                return response.json()
+                _GENERATE_ANALYSIS_METRICS.add_bytes(len(response.content))
+                return decode_analysis_response(response.content)
             else:
                 error_msg = f"Error al solicitar análisis: {response.status_code}"
                 try:
@@ -204,20 +334,264 @@ class DocumentAnalysisAPI:
                 except:
                     error_msg += f" - {response.text}"
                 
-                st.error(error_msg)
+                self.on_error(error_msg)
+                return None
+                
+        except requests.exceptions.Timeout:
+            self.on_error(f"Tiempo de espera agotado al solicitar análisis.")
+            return None
+        except requests.RequestException as e:
+            self.on_error(f"Error de conexión: {str(e)}")
+            return None
+        except Exception as e:
+            self.on_error(f"Error inesperado: {str(e)}")
+            return None
+    
+    def submit_analysis(self, document_numbers: List[str]) -> Optional[str]:
+        """
+        Envía un trabajo de análisis asíncrono (modo jobs).
+        
+        Args:
+            document_numbers: Lista de números de documentos seleccionados
+            
+        Returns:
+            str: analysis_id del trabajo o None si hay error
+        """
+        token = self.get_token()
+        if not token:
+            self.on_error("No se pudo obtener el token de autenticación.")
+            return None
+        
+        try:
+            response = self.transport.request('POST',
+                self.jobs_url,
+                data=json.dumps({"document_numbers": document_numbers}),
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {token}"
+                }
+            )
+            
+            if response.status_code in (200, 201, 202):
+                analysis_id = response.json().get("analysis_id")
+                if analysis_id:
+                    return analysis_id
+                self.on_error("Error al enviar análisis: la respuesta no contiene analysis_id")
+            else:
+                self.on_error(f"Error al enviar análisis: {response.status_code} - {response.text}")
+            return None
+            
+        except requests.RequestException as e:
+            self.on_error(f"Error de conexión: {str(e)}")
+            return None
+        except Exception as e:
+            self.on_error(f"Error inesperado: {str(e)}")
+            return None
+    
+    def get_analysis_job(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta el estado de un trabajo de análisis.
+        
+        Args:
+            analysis_id: Id devuelto por submit_analysis
+            
+        Returns:
+            Dict: Estado del trabajo (status, progress, message y, al completar, result)
+            o None si hay error
+        """
+        token = self.get_token()
+        if not token:
+            self.on_error("No se pudo obtener el token de autenticación.")
+            return None
+        
+        try:
+            # GET idempotente: el transporte lo reintenta ante 429/5xx
+            response = self.transport.request('GET',
+                f"{self.jobs_url.rstrip('/')}/{analysis_id}",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            
+            if response.status_code == 200:
+                return loads(response.content)
+            
+            self.on_error(f"Error al consultar el análisis: {response.status_code} - {response.text}")
+            return None
+            
+        except requests.RequestException as e:
+            self.on_error(f"Error de conexión: {str(e)}")
+            return None
+        except Exception as e:
+            self.on_error(f"Error inesperado: {str(e)}")
+            return None
+    
+    def run_analysis_job(self, document_numbers: List[str],
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Envía un análisis en modo jobs y consulta su estado con backoff hasta que
+        termina. A diferencia de generate_analysis, no está limitado por el timeout
+        de una única solicitud HTTP.
+        
+        Args:
+            document_numbers: Lista de números de documentos seleccionados
+            on_progress: Función opcional que recibe el estado del análisis
+                (status, progress, message, analysis_id) en cada consulta
+            
+        Returns:
+            Dict: Resultados del análisis o None si hay error
+        """
+        analysis_id = self.submit_analysis(document_numbers)
+        if not analysis_id:
+            return None
+        
+        def report(status: str, progress: float, message: str):
+            if on_progress:
+                on_progress({
+                    "status": status,
+                    "progress": progress,
+                    "message": message,
+                    "analysis_id": analysis_id
+                })
+        
+        report("processing", 0, "Análisis en cola...")
+        
+        deadline = time.time() + self.job_timeout
+        delay = self.job_poll_interval
+        while True:
+            time.sleep(delay)
+            
+            job = self.get_analysis_job(analysis_id)
+            if job is None:
+                return None
+            
+            status = job.get("status", "processing")
+            if status == "complete":
+                report("complete", 100, job.get("message") or "Análisis completado")
+                return job.get("result")
+            
+            if status == "error":
+                self.on_error(f"Error al generar análisis: {job.get('message', 'error desconocido')}")
+                return None
+            
+            report("processing", job.get("progress", 0), job.get("message") or "Generando análisis...")
+            
+            if time.time() > deadline:
+                self.on_error("Tiempo de espera agotado al esperar el análisis.")
                 return None
+            
+            # Backoff: espaciar las consultas mientras el análisis sigue en curso
+            delay = min(delay * 1.5, self.job_poll_max_interval)
+    
+    def stream_analysis(self, document_numbers: List[str],
+                        on_section: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Solicita el análisis en modo streaming (NDJSON o SSE) y va entregando cada
+        sección a medida que llega, en lugar de esperar la respuesta completa.
+        
+        Args:
+            document_numbers: Lista de números de documentos seleccionados
+            on_section: Función opcional que recibe (clave de la sección, resultados
+                acumulados hasta el momento) cada vez que llega contenido
+            on_progress: Función opcional que recibe cada evento "progress" con el
+                mismo formato que en el modo jobs (status, progress, message, analysis_id)
+            
+        Returns:
+            Dict: Resultados completos con el mismo formato que generate_analysis,
+            o None si hay error
+        """
+        token = self.get_token()
+        if not token:
+            self.on_error("No se pudo obtener el token de autenticación.")
+            return None
+        
+        # Acumulador con el mismo formato que la respuesta de generate_url
+        results: Dict[str, Any] = {"sections": {}, "referencias": []}
+        
+        try:
+            response = self.transport.request('POST',
+                self.stream_url,
+                data=json.dumps({"document_numbers": document_numbers}),
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": f"{NDJSON_CONTENT_TYPE}, {SSE_CONTENT_TYPE}",
+                    "Authorization": f"Bearer {token}"
+                },
+                stream=True
+            )
+            
+            try:
+                if response.status_code != 200:
+                    self.on_error(f"Error al solicitar análisis: {response.status_code} - {response.text}")
+                    return None
                 
+                events = iter_stream_events(response.iter_lines(), response.headers.get("Content-Type", ""))
+                for event in events:
+                    event_type = event.get("event")
+                    
+                    if event_type == "section":
+                        section = event.get("section")
+                        results["sections"].setdefault(section, []).extend(event.get("items", []))
+                        if on_section:
+                            on_section(section, results)
+                    elif event_type == "referencias":
+                        results["referencias"].extend(event.get("items", []))
+                        if on_section:
+                            on_section("referencias", results)
+                    elif event_type == "progress":
+                        if on_progress:
+                            on_progress({
+                                "status": "processing",
+                                "progress": event.get("progress", 0),
+                                "message": event.get("message") or "Generando análisis...",
+                                "analysis_id": None
+                            })
+                    elif event_type == "error":
+                        self.on_error(f"Error al generar análisis: {event.get('message', 'error desconocido')}")
+                        return None
+                    elif event_type == "done":
+                        break
+                else:
+                    # El flujo terminó sin evento "done": la respuesta está incompleta
+                    self.on_error("El análisis en streaming terminó de forma inesperada.")
+                    return None
+            finally:
+                response.close()
+            
+            return results
+            
         except requests.exceptions.Timeout:
-            st.error(f"Tiempo de espera agotado al solicitar análisis.")
+            self.on_error("Tiempo de espera agotado al recibir el análisis.")
             return None
         except requests.RequestException as e:
-            st.error(f"Error de conexión: {str(e)}")
+            self.on_error(f"Error de conexión: {str(e)}")
             return None
         except Exception as e:
-            st.error(f"Error inesperado: {str(e)}")
+            self.on_error(f"Error inesperado: {str(e)}")
             return None
     
-    def process_analysis_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
+    def request_analysis(self, document_numbers: List[str],
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         on_section: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Solicita el análisis con el modo configurado: streaming (stream_url),
+        jobs (jobs_url) o una única solicitud síncrona (generate_url).
+        
+        Args:
+            document_numbers: Lista de números de documentos seleccionados
+            on_progress: Función opcional que recibe el progreso en modo jobs
+            on_section: Función opcional que recibe (clave, resultados crudos acumulados) en modo streaming
+            
+        Returns:
+            Dict: Resultados del análisis (respuesta cruda del API) o None si hay error
+        """
+        if self.stream_url:
+            return self.stream_analysis(document_numbers, on_section, on_progress)
+        if self.jobs_url:
+            return self.run_analysis_job(document_numbers, on_progress)
+        return self.generate_analysis(document_numbers)
+    
+    @instrument("process_analysis_results")
+    def process_analysis_results(self, results: Dict[str, Any]) -> AnalysisResult:
         """
         Procesa los resultados del análisis para mostrarlos en la UI.
         
@@ -225,96 +599,9 @@ class DocumentAnalysisAPI:
             results: Resultados del análisis
             
         Returns:
-            Dict: Resultados procesados con las secciones para mostrar
+            AnalysisResult: Secciones (como párrafos) y referencias para mostrar
         """
-        # Inicializar estructura de resultados procesados
-        processed_results = {
-            "introduction": "",
-            "contexto": "",
-            "resumenes_ejecutivos":"",
-            "analisis_detallado":"",
-            "comparacion_documentos":"",
-            "conclusion": "",
-            "referencias_data": []  # NUEVA LÍNEA - CLAVE PARA REFERENCIAS
-        }
-        
-        # Procesar las secciones según la estructura de la Fig4
-        if "sections" in results:
-            sections = results["sections"]
-            
-            # Procesar introducción
-            if "introduction" in sections and len(sections["introduction"]) > 0:
-                intro_texts = []
-                for intro_item in sections["introduction"]:
-                    if "text" in intro_item:
-                        intro_texts.append(intro_item["text"])
-                processed_results["introduction"] = "\n\n".join(intro_texts)
-            
-            # Procesar contexto (si existe)
-            if "contexto" in sections and len(sections["contexto"]) > 0:
-                context_texts = []
-                for context_item in sections["contexto"]:
-                    if "text" in context_item:
-                        context_texts.append(context_item["text"])
-                processed_results["contexto"] = "\n\n".join(context_texts)
-            
-            # Procesar contenido principal (si existe)
-            if "resumenes_ejecutivos" in sections and len(sections["resumenes_ejecutivos"]) > 0:
-                main_texts = []
-                for main_item in sections["resumenes_ejecutivos"]:
-                    if "text" in main_item:
-                        main_texts.append(main_item["text"])
-                processed_results["resumenes_ejecutivos"] = "\n\n".join(main_texts)
-
-            # Procesar contenido principal (si existe)
-            if "analisis_detallado" in sections and len(sections["analisis_detallado"]) > 0:
-                main_texts = []
-                for main_item in sections["analisis_detallado"]:
-                    if "text" in main_item:
-                        main_texts.append(main_item["text"])
-                processed_results["analisis_detallado"] = "\n\n".join(main_texts)
-
-            # Procesar contenido principal (si existe)
-            if "comparacion_documentos" in sections and len(sections["comparacion_documentos"]) > 0:
-                main_texts = []
-                for main_item in sections["comparacion_documentos"]:
-                    if "text" in main_item:
-                        main_texts.append(main_item["text"])
-                processed_results["comparacion_documentos"] = "\n\n".join(main_texts)
-            
-            # Procesar conclusión (si existe)
-            if "conclusion" in sections and len(sections["conclusion"]) > 0:
-                conclusion_texts = []
-                for conclusion_item in sections["conclusion"]:
-                    if "text" in conclusion_item:
-                        conclusion_texts.append(conclusion_item["text"])
-                processed_results["conclusion"] = "\n\n".join(conclusion_texts)
-        
-        # NUEVO CÓDIGO PARA PROCESAR REFERENCIAS
-        referencias_data = None
-        
-        # Buscar referencias en diferentes ubicaciones posibles
-        locations = [
-            results.get("referencia"),
-            results.get("referencias"), 
-            results.get("sections", {}).get("referencia") if "sections" in results else None,
-            results.get("sections", {}).get("referencias") if "sections" in results else None
-        ]
-        
-        # Buscar en cada ubicación
-        for location in locations:
-            if isinstance(location, list) and len(location) > 0:
-                referencias_data = location
-                break
-        
-        # Guardar las referencias encontradas
-        if referencias_data:
-            processed_results["referencias_data"] = referencias_data
-        else:
-            processed_results["referencias_data"] = []
-            print("DEBUG: No se encontraron referencias")
-        
-        return processed_results
+        return AnalysisResult.from_response(results)
 
 # Funciones para inicializar y utilizar en la aplicación
 
@@ -326,41 +613,69 @@ def initialize_api_client():
     if 'api_client' not in st.session_state:
         st.session_state.api_client = DocumentAnalysisAPI()
 
-def load_available_documents():
+def load_available_documents() -> CatalogStore:
     """
-    Carga la lista de documentos disponibles y la almacena en el estado de la sesión.
+    Obtiene el catálogo desde la caché compartida entre sesiones y lo referencia
+    en el estado de la sesión. Solo la primera carga del proceso espera al API;
+    después el catálogo se revalida en segundo plano y, si el API falla, se sigue
+    sirviendo la última versión válida.
     
     Returns:
-        List[Dict]: Lista de documentos disponibles
+        CatalogStore: Catálogo compartido (de solo lectura)
     """
-    # Verificar si ya tenemos documentos cargados y válidos
-    if 'available_documents' in st.session_state and st.session_state.available_documents is not None and len(st.session_state.available_documents) > 0:
-        return st.session_state.available_documents
-    
-    # Obtener documentos del API
     api_client = st.session_state.get('api_client')
     if not api_client:
         api_client = DocumentAnalysisAPI()
         st.session_state.api_client = api_client
     
-    documents = api_client.get_documents()
+    cache = get_catalog_cache(
+        api_client.documents_url,
+        ttl=st.secrets["api"].get("catalog_ttl_seconds", DEFAULT_TTL_SECONDS)
+    )
+    catalog = cache.get(partial(api_client.fetch_documents, as_store=True))
     
-    if documents:
-        st.session_state.available_documents = documents
-        return documents
-    else:
-        st.session_state.available_documents = []
-        return []
+    if catalog is None and cache.last_error:
+        st.error(cache.last_error)
+    
+    # Se guarda una referencia al catálogo compartido, no una copia
+    sync_catalog(catalog or EMPTY_CATALOG)
+    return st.session_state.available_documents
 
-def analyze_selected_documents(selected_docs: List[Dict[str, Any]]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+def get_analysis_cache() -> AnalysisResultCache:
+    """
+    Devuelve la caché de resultados de análisis compartida, configurada desde
+    la sección [cache] de los secrets.
+    
+    Returns:
+        AnalysisResultCache: Caché compartida por todas las sesiones
+    """
+    cache_config = st.secrets.get("cache", {})
+    return get_result_cache(
+        path=cache_config.get("result_cache_path", DEFAULT_CACHE_PATH),
+        ttl=cache_config.get("result_cache_ttl_seconds", RESULT_CACHE_TTL_SECONDS),
+        memory_entries=cache_config.get("result_cache_memory_entries", DEFAULT_MEMORY_ENTRIES),
+        max_disk_bytes=cache_config.get("result_cache_max_mb", DEFAULT_MAX_DISK_MB) * 1024 * 1024
+    )
+
+def analyze_selected_documents(selected_docs: List[Dict[str, Any]],
+                               force_refresh: bool = False,
+                               on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                               on_section: Optional[Callable[[str, AnalysisResult], None]] = None) -> Tuple[bool, Optional[AnalysisResult]]:
     """
     Envía los documentos seleccionados para análisis y procesa los resultados.
+    Si el mismo conjunto de documentos ya fue analizado (por cualquier usuario),
+    se reutiliza el resultado de la caché; si se está analizando en ese momento
+    en otra sesión, se espera ese mismo análisis en lugar de solicitar otro.
     
     Args:
         selected_docs: Lista de documentos seleccionados
+        force_refresh: Si es True, ignora la caché y solicita un análisis nuevo
+        on_progress: Función opcional que recibe el progreso real en modo jobs
+        on_section: Función opcional que recibe (clave de la sección, resultados
+            procesados parciales) a medida que llegan las secciones en modo streaming
         
     Returns:
-        Tuple[bool, Dict]: (éxito, resultados procesados)
+        Tuple[bool, AnalysisResult]: (éxito, resultados procesados, ya guardados en la sesión)
     """
     if not selected_docs:
         st.warning("Seleccione al menos un documento para analizar.")
@@ -373,13 +688,69 @@ def analyze_selected_documents(selected_docs: List[Dict[str, Any]]) -> Tuple[boo
         st.warning("Los documentos seleccionados no tienen números válidos.")
         return False, None
     
-    # Enviar solicitud de análisis
     api_client = st.session_state.api_client
-    results = api_client.generate_analysis(document_numbers)
+    cache = get_analysis_cache()
+    cache_key = canonical_key(document_numbers, api_client.model_tag)
+    
+    # La llamada se ejecuta fuera de la sesión (ver RequestCoalescer): los errores,
+    # el progreso y las secciones llegan como eventos y se muestran en el hilo de cada sesión
+    def request(publish):
+        upstream_client = copy.copy(api_client)
+        upstream_client.on_error = partial(publish, "error")
+        
+        def handle_section(section, partial_results):
+            # Solo se normaliza la sección recibida: la respuesta completa se procesa una vez al final
+            publish("section", section, AnalysisResult.from_section(partial_results, section))
+        
+        # En modo streaming las secciones llegan por partes; en modo jobs se envía y se consulta su progreso
+        response = upstream_client.request_analysis(document_numbers, partial(publish, "progress"), handle_section)
+        # Guardar antes de liberar la clave para que no quede un hueco sin caché ni solicitud en curso
+        if response:
+            cache.put(cache_key, response)
+        return response
+    
+    def handle_event(kind, *args):
+        if kind == "error":
+            api_client.on_error(*args)
+        elif kind == "progress" and on_progress:
+            on_progress(*args)
+        elif kind == "section" and on_section:
+            on_section(*args)
+    
+    # Reutilizar un análisis previo del mismo conjunto (de cualquier sesión) o, si
+    # otra sesión lo está analizando en ese momento, esperar ese mismo análisis
+    coalescer = get_request_coalescer()
+    if on_progress and coalescer.is_in_flight(cache_key):
+        on_progress({"status": "processing", "progress": 0,
+                     "message": "Esperando un análisis en curso de los mismos documentos...",
+                     "analysis_id": None})
+    try:
+        results, source = coalescer.run(cache_key, request, on_event=handle_event,
+                                        lookup=None if force_refresh else partial(cache.get, cache_key),
+                                        peek=None if force_refresh else partial(cache.peek, cache_key))
+    except Exception as e:
+        api_client.on_error(f"Error inesperado: {str(e)}")
+        return False, None
+    
+    if source == CACHED:
+        st.toast("Análisis recuperado de la caché")
+    elif source == JOINED and results:
+        st.toast("Análisis compartido con otra sesión en curso")
     
     if results:
         # Procesar resultados para mostrarlos en la UI
         processed_results = api_client.process_analysis_results(results)
+        # Los textos los comparte la caché: si la sesión queda inactiva se vuelven a
+        # obtener de ella en lugar de guardar una copia propia en disco
+        set_analysis_results(processed_results, shared=results,
+                             reload=partial(_reload_analysis, cache, cache_key) if cache.persistent else None)
         return True, processed_results
     else:
-        return False, None
\ No newline at end of file
+        return False, None
+
+def _reload_analysis(cache: AnalysisResultCache, cache_key: str) -> Optional[Tuple[AnalysisResult, Dict[str, Any]]]:
+    """Vuelve a construir (resultados procesados, respuesta) desde la caché, o None si ya no está."""
+    response = cache.get(cache_key)
+    if response is None:
+        return None
+    return AnalysisResult.from_response(response), response
\ No newline at end of file
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.metrics import get_metrics_registry
+
+# Valores por defecto de la caché de resultados
+DEFAULT_CACHE_PATH = os.path.join(".cache", "analysis_results.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_MAX_DISK_MB = 512
+
+
+def canonical_document_numbers(document_numbers: Iterable[str]) -> Tuple[str, ...]:
+    """Conjunto canónico de números de documento: sin duplicados y ordenado."""
+    return tuple(sorted({str(number) for number in document_numbers if number}))
+
+
+def canonical_key(document_numbers: Iterable[str], model_tag: Optional[str] = None) -> str:
+    """
+    Clave de contenido para un análisis: el mismo conjunto de documentos (en
+    cualquier orden y con repeticiones) y la misma versión de modelo producen la
+    misma clave.
+
+    Args:
+        document_numbers: Números de documentos analizados
+        model_tag: Etiqueta opcional de modelo/versión del análisis
+
+    Returns:
+        str: Hash SHA-256 hexadecimal
+    """
+    payload = json.dumps({
+        "document_numbers": canonical_document_numbers(document_numbers),
+        "model": model_tag or "",
+    }, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisResultCache:
+    """
+    Caché de resultados de análisis con dos niveles:
+
+    - Memoria: LRU de las respuestas más recientes (compartida por todas las sesiones).
+    - Disco: SQLite local con las respuestas comprimidas, que sobrevive a reinicios.
+
+    Ambos niveles respetan un TTL; el nivel de disco además un tamaño máximo, tras
+    el cual se eliminan las entradas usadas hace más tiempo.
+
+    El LRU y la conexión SQLite tienen locks separados, y la compresión y el
+    (de)serializado JSON se hacen sin ningún lock: un acierto en memoria no
+    espera a que otra sesión comprima o escriba un resultado grande en disco.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH,
+                 ttl: float = DEFAULT_TTL_SECONDS,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_MB * 1024 * 1024):
+        """
+        Inicializa la caché.
+
+        Args:
+            path: Ruta del archivo SQLite (None para usar solo memoria)
+            ttl: Vida útil de cada resultado en segundos
+            memory_entries: Cantidad máxima de resultados en memoria
+            max_disk_bytes: Tamaño máximo (comprimido) de los resultados en disco
+        """
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        # _lock protege el LRU y los contadores; _db_lock, la conexión SQLite
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " payload BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                      "stores": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un resultado, primero en memoria y luego en disco.
+
+        Args:
+            key: Clave generada con canonical_key
+
+        Returns:
+            Dict: Respuesta del API almacenada, o None si no está o venció
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, result = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return result
+                del self._memory[key]
+                self.stats["expired"] += 1
+
+        payload = None
+        expired = False
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT payload, created_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    payload, created_at = row
+                    if now - created_at < self.ttl:
+                        self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                    else:
+                        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                        payload = None
+                        expired = True
+                    self._db.commit()
+
+        # La descompresión y el JSON de una respuesta grande se hacen sin lock
+        result = json.loads(zlib.decompress(payload)) if payload is not None else None
+
+        with self._lock:
+            if result is not None:
+                # Un put concurrente de la misma clave tiene prioridad sobre la copia leída de disco
+                if key not in self._memory:
+                    self._remember(key, created_at, result)
+                self.stats["disk_hits"] += 1
+                return result
+            if expired:
+                self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un resultado solo en memoria, sin consultar el disco ni contar
+        aciertos o fallos (p. ej. para confirmar con otro lock tomado que un
+        resultado recién guardado no está).
+
+        Args:
+            key: Clave generada con canonical_key
+
+        Returns:
+            Dict: Respuesta del API en memoria, o None si no está o venció
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None or now - entry[0] >= self.ttl:
+                return None
+            self._memory.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """
+        Guarda un resultado en ambos niveles.
+
+        Args:
+            key: Clave generada con canonical_key
+            result: Respuesta del API (serializable a JSON)
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, result)
+            self.stats["stores"] += 1
+
+        if self._db is None:
+            return
+
+        payload = zlib.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, payload, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            evicted = self._enforce_disk_limits(now)
+            self._db.commit()
+
+        if evicted:
+            with self._lock:
+                self.stats["evictions"] += evicted
+
+    def _remember(self, key: str, created_at: float, result: Dict[str, Any]):
+        """Guarda en el LRU de memoria (debe llamarse con _lock tomado)."""
+        self._memory[key] = (created_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _enforce_disk_limits(self, now: float) -> int:
+        """
+        Elimina entradas vencidas y, si hace falta, las menos usadas recientemente
+        (debe llamarse con _db_lock tomado).
+
+        Returns:
+            int: Entradas eliminadas por el límite de tamaño
+        """
+        self._db.execute("DELETE FROM results WHERE created_at <= ?", (now - self.ttl,))
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        evicted = 0
+        if total <= self.max_disk_bytes:
+            return evicted
+
+        for key, size in self._db.execute(
+                "SELECT key, size FROM results ORDER BY accessed_at").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        return evicted
+
+    def invalidate(self, key: str):
+        """Elimina un resultado de ambos niveles."""
+        with self._lock:
+            self._memory.pop(key, None)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        """Indica si los resultados se guardan también en disco."""
+        return self._db is not None
+
+    def hit_counts(self) -> Tuple[int, int]:
+        """Aciertos (memoria o disco) y fallos de la caché para las métricas."""
+        with self._lock:
+            return self.stats["memory_hits"] + self.stats["disk_hits"], self.stats["misses"]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores de la caché y la tasa de aciertos.
+
+        Returns:
+            Dict: Contadores, hit_rate y entradas en memoria
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+# Caché compartida por el proceso
+_cache: Optional[AnalysisResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache(**settings) -> AnalysisResultCache:
+    """
+    Devuelve la caché de resultados compartida, creándola la primera vez.
+
+    Args:
+        **settings: Argumentos de AnalysisResultCache (solo se usan al crearla)
+
+    Returns:
+        AnalysisResultCache: Caché compartida
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisResultCache(**settings)
+            get_metrics_registry().register_cache("analysis_result", _cache.hit_counts)
+        return _cache
@@ -0,0 +1,78 @@
+import json
+import logging
+from typing import Any, Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+# Secciones del análisis, en el orden en que las devuelve el API
+ANALYSIS_SECTIONS = ("introduction", "contexto", "resumenes_ejecutivos",
+                     "analisis_detallado", "comparacion_documentos", "conclusion")
+
+# Claves en las que el API puede devolver las referencias (en la raíz o dentro de "sections")
+REFERENCE_KEYS = ("referencia", "referencias")
+
+# Separador entre los párrafos de una sección
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# Decodificadores rápidos opcionales: msgspec (con tipos) u orjson; si no, json
+try:
+    import msgspec
+    from typing import TypedDict
+
+    class AnalysisResponse(TypedDict, total=False):
+        """Forma esperada de la respuesta de /generate (y del result de /jobs)."""
+        sections: Dict[str, List[Dict[str, Any]]]
+        referencia: List[Any]
+        referencias: List[Any]
+
+    _typed_decoder = msgspec.json.Decoder(AnalysisResponse)
+    _untyped_decoder = msgspec.json.Decoder()
+    DECODER_BACKEND = "msgspec"
+except ImportError:
+    msgspec = None
+    _typed_decoder = _untyped_decoder = None
+    try:
+        import orjson
+        DECODER_BACKEND = "orjson"
+    except ImportError:
+        orjson = None
+        DECODER_BACKEND = "json"
+
+
+def loads(body: Union[bytes, str]) -> Any:
+    """
+    Decodifica JSON con el backend más rápido disponible.
+
+    Args:
+        body: Cuerpo JSON
+
+    Returns:
+        Any: Valor decodificado (dicts y listas, como json.loads)
+    """
+    if _untyped_decoder is not None:
+        return _untyped_decoder.decode(body)
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_analysis_response(body: Union[bytes, str]) -> Dict[str, Any]:
+    """
+    Decodifica la respuesta de un análisis. Con msgspec se valida la forma de
+    "sections" y de las referencias al decodificar (y se descartan los campos
+    que la aplicación no usa); si la respuesta no tiene la forma esperada se
+    decodifica sin tipos y se normaliza igual que antes.
+
+    Args:
+        body: Cuerpo JSON de la respuesta
+
+    Returns:
+        Dict: Respuesta decodificada
+    """
+    if _typed_decoder is not None:
+        try:
+            return _typed_decoder.decode(body)
+        except msgspec.ValidationError as e:
+            logger.debug("Respuesta de análisis con forma inesperada: %s", e)
+    return loads(body)
+
@@ -1,14 +1,27 @@
 import streamlit as st
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any
+
+from utils.session_memory import (DEFAULT_BUDGET_MB, DEFAULT_IDLE_SECONDS, DEFAULT_OFFLOAD_PATH,
+                                  OffloadableValue, SessionTracker, get_session_memory_manager)
+from utils.metrics import get_metrics_registry
+from utils.widget_keys import get_widget_key_metrics, reclaim_superseded_keys, rotate_widget_key
+
+# Claves de la sesión que se contabilizan en la memoria por sesión
+SESSION_KEYS = ["selected_rows", "last_attempted_document", "selector_key",
+                "api_results", "analysis_state", "available_documents"]
+
+def _memory_config() -> Dict[str, Any]:
+    """Sección [memory] de los secrets (opcional)."""
+    return st.secrets.get("memory", {})
 
 def initialize_session_state():
     """
     Inicializa todas las variables de estado de la sesión necesarias.
     Debe llamarse al inicio de la aplicación.
     """
-    # Lista de documentos seleccionados
-    if 'selected_documents' not in st.session_state:
-        st.session_state.selected_documents = []
+    # Filas del catálogo compartido seleccionadas (no se copian los documentos)
+    if 'selected_rows' not in st.session_state:
+        st.session_state.selected_rows = []
     
     # Último documento intentado agregar
     if 'last_attempted_document' not in st.session_state:
@@ -18,9 +31,11 @@ def initialize_session_state():
     if 'selector_key' not in st.session_state:
         st.session_state.selector_key = 0
     
-    # Resultados del análisis
+    # Resultados del análisis (descargables a disco si la sesión queda inactiva)
     if 'api_results' not in st.session_state:
-        st.session_state.api_results = None
+        st.session_state.api_results = OffloadableValue(
+            None, _memory_config().get("offload_path", DEFAULT_OFFLOAD_PATH)
+        )
     
     # Estado del análisis
     if 'analysis_state' not in st.session_state:
@@ -31,9 +46,83 @@ def initialize_session_state():
             "analysis_id": None
         }
     
-    # Documentos disponibles (se cargarán desde la API)
+    # Catálogo compartido de documentos (CatalogStore, se cargará desde la API)
     if 'available_documents' not in st.session_state:
         st.session_state.available_documents = None
+    
+    # Contabilidad de memoria de la sesión
+    if '_memory_tracker' not in st.session_state:
+        tracker = SessionTracker()
+        tracker.offloadable["api_results"] = st.session_state.api_results
+        st.session_state._memory_tracker = tracker
+
+def track_session_memory():
+    """
+    Actualiza la estimación de memoria de la sesión y aplica el presupuesto
+    global, descargando a disco los resultados de las sesiones inactivas si
+    hace falta. Debe llamarse una vez por ejecución, tras initialize_session_state.
+    """
+    memory_config = _memory_config()
+    manager = get_session_memory_manager(
+        budget_bytes=memory_config.get("budget_mb", DEFAULT_BUDGET_MB) * 1024 * 1024,
+        idle_seconds=memory_config.get("idle_seconds", DEFAULT_IDLE_SECONDS)
+    )
+    tracker = st.session_state._memory_tracker
+    
+    # Eliminar el estado de las versiones anteriores del selector
+    reclaim_superseded_keys()
+    tracker.widget_keys = get_widget_key_metrics()["live_widget_keys"]
+    
+    manager.touch(tracker, st.session_state, SESSION_KEYS)
+    manager.enforce(current=tracker)
+
+def get_analysis_results():
+    """
+    Devuelve los resultados del análisis de la sesión (rehidratándolos si
+    fueron descargados a disco).
+    
+    Returns:
+        AnalysisResult: Resultados procesados, o None si no hay
+    """
+    return st.session_state.api_results.get()
+
+def get_analysis_view(name: str, build: Callable[[Any], Any]):
+    """
+    Vista derivada de los resultados de la sesión (p. ej. el HTML de las
+    tarjetas), calculada una vez por resultado y reutilizada en las ejecuciones
+    siguientes. Se descarta al cambiar los resultados o al descargarlos a disco.
+    
+    Args:
+        name: Nombre de la vista
+        build: Función que calcula la vista a partir de los resultados
+        
+    Returns:
+        Any: La vista, o None si no hay resultados
+    """
+    built = False
+    
+    def build_once(results):
+        nonlocal built
+        built = True
+        return build(results)
+    
+    view = st.session_state.api_results.derived(name, build_once)
+    if view is not None:
+        get_metrics_registry().record_cache(name, hit=not built)
+    return view
+
+def set_analysis_results(results, shared=None, reload=None):
+    """
+    Guarda (o borra, con None) los resultados del análisis de la sesión.
+    
+    Args:
+        results: AnalysisResult o None
+        shared: Respuesta del API de la que salen los resultados, si la guarda
+            la caché de resultados (sus textos no se cuentan para la sesión)
+        reload: Función opcional que vuelve a construir (resultados, respuesta)
+            desde la caché al rehidratar la sesión, en lugar de usar una copia en disco
+    """
+    st.session_state.api_results.set(results, shared, reload)
 
 def update_analysis_state(state: Dict[str, Any]):
     """
@@ -49,45 +138,170 @@ def update_analysis_state(state: Dict[str, Any]):
     
     # NO hacer rerun automático - esto estaba causando el problema
 
-def add_document(document: Dict[str, Any]) -> bool:
+def sync_catalog(catalog):
+    """
+    Referencia el catálogo compartido en la sesión. Si el catálogo cambió de
+    versión, traduce las filas seleccionadas a las del nuevo catálogo por id.
+    
+    Args:
+        catalog: CatalogStore compartido
+    """
+    previous = st.session_state.get('available_documents')
+    if previous is not None and previous is not catalog and st.session_state.selected_rows:
+        remapped = []
+        for row in st.session_state.selected_rows:
+            new_row = catalog.row_for_id(previous.doc_id(row))
+            if new_row is not None:
+                remapped.append(new_row)
+        st.session_state.selected_rows = remapped
+    
+    st.session_state.available_documents = catalog
+
+def get_selected_documents() -> List[Dict[str, Any]]:
+    """
+    Materializa los documentos seleccionados a partir de sus filas en el catálogo.
+    
+    Returns:
+        List[Dict]: Documentos seleccionados con id, nombre y número
+    """
+    catalog = st.session_state.available_documents
+    if catalog is None:
+        return []
+    return [catalog.document(row) for row in st.session_state.selected_rows]
+
+def add_document(row: int) -> bool:
     """
     Añade un documento a la lista de seleccionados.
     
     Args:
-        document: Documento a añadir
+        row: Fila del documento en el catálogo compartido
         
     Returns:
         bool: True si se añadió correctamente, False si ya existía
     """
-    # Verificar si ya está seleccionado
-    is_already_selected = document['id'] in [d['id'] for d in st.session_state.selected_documents]
+    catalog = st.session_state.available_documents
+    doc_id = catalog.doc_id(row)
+    
+    # Usar siempre la primera fila con ese id para detectar duplicados
+    row = catalog.row_for_id(doc_id)
+    is_already_selected = row in st.session_state.selected_rows
     
     if not is_already_selected:
         # Documento no está seleccionado, agregarlo
-        st.session_state.selected_documents.append(document)
-        st.session_state.last_attempted_document = document['id']
+        st.session_state.selected_rows.append(row)
+        st.session_state.last_attempted_document = doc_id
         
         # Resetear los resultados de la API cuando se cambia la selección
-        st.session_state.api_results = None
+        set_analysis_results(None)
         st.session_state.analysis_state["status"] = "idle"
         
-        # Incrementar la clave para forzar el reseteo del selectbox
-        st.session_state.selector_key += 1
+        # Pasar el selectbox a una clave nueva (lo resetea) y liberar la anterior
+        rotate_widget_key("doc_selector")
         return True
     else:
         # Documento ya está seleccionado
-        st.session_state.last_attempted_document = document['id']
+        st.session_state.last_attempted_document = doc_id
         return False
 
+def add_documents(rows: List[int]) -> int:
+    """
+    Añade varios documentos a la vez (p. ej. todos los que cumplen un filtro),
+    con un único reseteo del selector.
+    
+    Args:
+        rows: Filas de los documentos en el catálogo compartido
+        
+    Returns:
+        int: Cantidad de documentos nuevos añadidos
+    """
+    catalog = st.session_state.available_documents
+    selected = set(st.session_state.selected_rows)
+    
+    added = 0
+    for row in rows:
+        # Usar siempre la primera fila con ese id para detectar duplicados
+        row = catalog.row_for_id(catalog.doc_id(row))
+        if row not in selected:
+            selected.add(row)
+            st.session_state.selected_rows.append(row)
+            added += 1
+    
+    if added:
+        # Resetear los resultados de la API cuando se cambia la selección
+        set_analysis_results(None)
+        st.session_state.analysis_state["status"] = "idle"
+        rotate_widget_key("doc_selector")
+    
+    return added
+
 def clear_selection():
     """Limpia todos los documentos seleccionados y el estado del análisis."""
-    st.session_state.selected_documents = []
+    st.session_state.selected_rows = []
     st.session_state.last_attempted_document = None
-    st.session_state.api_results = None
+    set_analysis_results(None)
     st.session_state.analysis_state = {
         "status": "idle",
         "progress": 0,
         "message": "",
         "analysis_id": None
     }
-    st.session_state.selector_key += 1
\ No newline at end of file
+    rotate_widget_key("doc_selector")
+
+# Callbacks de los widgets. Streamlit los ejecuta antes del script, así que la
+# única ejecución que sigue a cada acción ya muestra el estado nuevo. Si la acción
+# descarta resultados que están en pantalla, st.rerun() dentro del callback
+# cambia esa ejecución (solo el fragmento del widget) por la página completa,
+# sin añadir otra.
+
+def _results_shown() -> bool:
+    """Indica si hay resultados del análisis en pantalla."""
+    return st.session_state.analysis_state["status"] == "complete"
+
+def on_document_selected(selector_key: str):
+    """
+    Callback del selector: añade el documento elegido.
+    
+    Args:
+        selector_key: Clave del selectbox (su valor es la fila elegida)
+    """
+    row = st.session_state.get(selector_key)
+    if row is None:
+        return
+    
+    results_shown = _results_shown()
+    if add_document(row):
+        # Confirmación de una sola ejecución (la muestra el selector)
+        name = st.session_state.available_documents.name(row)
+        st.session_state.document_notice = f"✅ Documento agregado: {name[:50]}..."
+        if results_shown:
+            st.rerun()
+
+def on_add_documents(rows: List[int]):
+    """
+    Callback de "Agregar todos los coincidentes".
+    
+    Args:
+        rows: Filas de los documentos en el catálogo compartido
+    """
+    results_shown = _results_shown()
+    if not add_documents(rows):
+        st.session_state.selection_notice = "⚠️ Todos los documentos coincidentes ya están seleccionados"
+    elif results_shown:
+        st.rerun()
+
+def on_clear_selection():
+    """Callback de "Limpiar Selección"."""
+    results_shown = _results_shown()
+    clear_selection()
+    if results_shown:
+        st.rerun()
+
+def on_new_analysis():
+    """Callback de "Nuevo Análisis": limpia la selección y quita los resultados."""
+    clear_selection()
+    st.rerun()
+
+def request_analysis():
+    """Callback de "Generar Análisis": el análisis se ejecuta en la página completa."""
+    st.session_state.analysis_requested = True
+    st.rerun()
@@ -0,0 +1,353 @@
+import os
+import sys
+import time
+import uuid
+import zlib
+import pickle
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.catalog_store import CatalogStore
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto de la política de memoria
+DEFAULT_BUDGET_MB = 512
+DEFAULT_IDLE_SECONDS = 600
+DEFAULT_OFFLOAD_PATH = os.path.join(".cache", "session_offload")
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Estima los bytes que ocupa un valor de la sesión, recorriendo contenedores.
+    El catálogo compartido no se cuenta (no pertenece a ninguna sesión) y de un
+    OffloadableValue solo se cuenta lo que sigue en memoria y es propio de la sesión.
+
+    Args:
+        value: Valor a medir
+        _seen: Ids de los objetos ya contados (o que no se deben contar)
+
+    Returns:
+        int: Bytes estimados
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen or isinstance(value, CatalogStore):
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, OffloadableValue):
+        return value.nbytes
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    return size
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _owned_size(value: Any, shared: Any = None) -> int:
+    """Bytes estimados de un valor sin contar los objetos que comparte con `shared`."""
+    if value is None:
+        return 0
+    seen = set()
+    if shared is not None:
+        # Recorrer el dueño compartido marca sus objetos como ya vistos
+        estimate_size(shared, seen)
+    return estimate_size(value, seen)
+
+
+class OffloadableValue:
+    """
+    Contenedor de un valor grande de la sesión que la política de memoria puede
+    descargar a disco (comprimido) mientras la sesión está inactiva. El valor se
+    vuelve a cargar de forma transparente la próxima vez que se lee.
+
+    Si el valor se construye a partir de un objeto que guarda otro dueño (p. ej.
+    la respuesta del API en la caché de resultados), sus objetos no se cuentan
+    y, con `reload`, al descargarlo solo se suelta la referencia: al leerlo se
+    vuelve a construir desde ese dueño, sin copias propias en disco ni en memoria.
+    """
+
+    __slots__ = ("_value", "_nbytes", "_path", "_finalizer", "_offload_dir", "_lock", "_derived",
+                 "_derived_nbytes", "_reload", "__weakref__")
+
+    def __init__(self, value: Any = None, offload_dir: str = DEFAULT_OFFLOAD_PATH):
+        self._offload_dir = offload_dir
+        self._lock = threading.Lock()
+        self._path: Optional[str] = None
+        self._finalizer = None
+        self._value = None
+        self._nbytes = 0
+        self._derived: Dict[str, Any] = {}
+        self._derived_nbytes = 0
+        self._reload = None
+        self.set(value)
+
+    def set(self, value: Any, shared: Any = None,
+            reload: Optional[Callable[[], Optional[Tuple[Any, Any]]]] = None):
+        """
+        Reemplaza el valor (descarta la copia en disco y las vistas derivadas).
+
+        Args:
+            value: Nuevo valor (None para borrarlo)
+            shared: Objeto de otro dueño que el valor referencia (no se cuenta)
+            reload: Función opcional que vuelve a construir (valor, shared) desde
+                ese dueño, o devuelve None si ya no lo tiene. Con ella el valor
+                no se escribe a disco al descargarlo
+        """
+        with self._lock:
+            self._discard_file()
+            self._clear_derived()
+            self._value = value
+            self._reload = reload if value is not None else None
+            self._nbytes = _owned_size(value, shared)
+
+    def derived(self, name: str, build: Callable[[Any], Any]) -> Any:
+        """
+        Vista derivada del valor (p. ej. su HTML), calculada una sola vez por
+        valor: se descarta al reemplazarlo y al descargarlo a disco, y su tamaño
+        se suma al del valor.
+
+        Args:
+            name: Nombre de la vista
+            build: Función que calcula la vista a partir del valor
+
+        Returns:
+            Any: La vista, o None si no hay valor
+        """
+        value = self.get()
+        if value is None:
+            return None
+        with self._lock:
+            if self._value is value and name in self._derived:
+                return self._derived[name]
+        view = build(value)
+        with self._lock:
+            # Solo se guarda si el valor no cambió mientras se calculaba
+            if self._value is value:
+                self._derived[name] = view
+                self._derived_nbytes += estimate_size(view)
+        return view
+
+    def get(self) -> Any:
+        """Devuelve el valor, rehidratándolo (desde disco o su dueño) si fue descargado."""
+        with self._lock:
+            if self._path is not None:
+                with open(self._path, "rb") as f:
+                    self._value = pickle.loads(zlib.decompress(f.read()))
+                self._discard_file()
+            elif self._value is None and self._reload is not None:
+                reloaded = self._reload()
+                if reloaded is None:
+                    logger.warning("El valor descargado ya no está disponible en su origen")
+                    self._reload = None
+                    self._nbytes = 0
+                else:
+                    self._value, shared = reloaded
+                    self._nbytes = _owned_size(self._value, shared)
+            return self._value
+
+    def offload(self) -> int:
+        """
+        Descarga el valor a disco (o, si se puede volver a construir desde su
+        dueño, solo lo suelta) y libera la referencia en memoria.
+
+        Returns:
+            int: Bytes estimados liberados (0 si no había nada que descargar)
+        """
+        with self._lock:
+            if self._value is None or self._path is not None:
+                return 0
+            if self._reload is None:
+                os.makedirs(self._offload_dir, exist_ok=True)
+                path = os.path.join(self._offload_dir, f"{uuid.uuid4().hex}.bin")
+                with open(path, "wb") as f:
+                    f.write(zlib.compress(pickle.dumps(self._value, pickle.HIGHEST_PROTOCOL)))
+                # El archivo se elimina si la sesión termina sin volver a leer el valor
+                self._finalizer = weakref.finalize(self, _remove_file, path)
+                self._path = path
+            self._value = None
+            freed = self._nbytes + self._derived_nbytes
+            self._clear_derived()
+            return freed
+
+    def _clear_derived(self):
+        """Descarta las vistas derivadas y su tamaño (debe llamarse con el lock tomado)."""
+        self._derived.clear()
+        self._derived_nbytes = 0
+
+    def _discard_file(self):
+        """Elimina la copia en disco (debe llamarse con el lock tomado)."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self._path = None
+
+    @property
+    def offloaded(self) -> bool:
+        return self._path is not None or (self._value is None and self._reload is not None)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes estimados en memoria propios de la sesión (0 mientras está descargado)."""
+        return 0 if self.offloaded else self._nbytes + self._derived_nbytes
+
+
+class SessionTracker:
+    """Contabilidad de memoria de una sesión (se guarda en su session_state)."""
+
+    __slots__ = ("session_id", "last_seen", "key_sizes", "offloadable", "widget_keys", "__weakref__")
+
+    def __init__(self):
+        self.session_id = uuid.uuid4().hex[:12]
+        self.last_seen = time.monotonic()
+        self.key_sizes: Dict[str, int] = {}
+        self.offloadable: Dict[str, OffloadableValue] = {}
+        self.widget_keys = 0  # Claves de widgets versionados con estado
+
+    @property
+    def total(self) -> int:
+        return sum(self.key_sizes.values())
+
+
+class SessionMemoryManager:
+    """
+    Contabilidad de memoria de todas las sesiones del proceso y política de
+    descarga: cuando el total estimado supera el presupuesto, se descargan a
+    disco los valores grandes de las sesiones inactivas, empezando por las que
+    llevan más tiempo sin usarse.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_MB * 1024 * 1024,
+                 idle_seconds: float = DEFAULT_IDLE_SECONDS):
+        """
+        Args:
+            budget_bytes: Presupuesto global de memoria de las sesiones
+            idle_seconds: Inactividad mínima para descargar los valores de una sesión
+        """
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+
+        self._lock = threading.Lock()
+        # Las sesiones cerradas desaparecen solas al liberarse su session_state
+        self._sessions: "weakref.WeakValueDictionary[str, SessionTracker]" = weakref.WeakValueDictionary()
+
+        # Contadores para diagnóstico
+        self.stats = {"offloads": 0, "offloaded_bytes": 0, "enforcements": 0}
+
+    def touch(self, tracker: SessionTracker, state: Dict[str, Any], keys: List[str]):
+        """
+        Registra actividad de una sesión y actualiza su estimación de memoria.
+
+        Args:
+            tracker: Contabilidad de la sesión
+            state: session_state de la sesión
+            keys: Claves de session_state que se contabilizan
+        """
+        tracker.last_seen = time.monotonic()
+        tracker.key_sizes = {key: estimate_size(state[key]) for key in keys if key in state}
+        with self._lock:
+            self._sessions[tracker.session_id] = tracker
+
+    def enforce(self, current: Optional[SessionTracker] = None) -> int:
+        """
+        Aplica el presupuesto descargando valores de sesiones inactivas.
+
+        Args:
+            current: Sesión en curso, que nunca se descarga
+
+        Returns:
+            int: Bytes estimados liberados
+        """
+        with self._lock:
+            trackers = list(self._sessions.values())
+
+        total = sum(tracker.total for tracker in trackers)
+        if total <= self.budget_bytes:
+            return 0
+
+        self.stats["enforcements"] += 1
+        now = time.monotonic()
+        idle = sorted((tracker for tracker in trackers
+                       if tracker is not current and now - tracker.last_seen >= self.idle_seconds),
+                      key=lambda tracker: tracker.last_seen)
+
+        freed = 0
+        for tracker in idle:
+            if total - freed <= self.budget_bytes:
+                break
+            for key, value in tracker.offloadable.items():
+                released = value.offload()
+                if released:
+                    freed += released
+                    self.stats["offloads"] += 1
+                    # La clave descargada ya no cuenta hasta que la sesión vuelva
+                    tracker.key_sizes[key] = 0
+
+        self.stats["offloaded_bytes"] += freed
+        if freed:
+            logger.info("Memoria de sesiones: %.1f MB sobre el presupuesto, %.1f MB descargados a disco",
+                        (total - self.budget_bytes) / 1e6, freed / 1e6)
+        return freed
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Devuelve la estimación de memoria por sesión y los totales.
+
+        Returns:
+            Dict: sessions (lista por sesión, de mayor a menor), total_bytes,
+            budget_bytes y los contadores de descarga
+        """
+        with self._lock:
+            trackers = list(self._sessions.values())
+
+        now = time.monotonic()
+        sessions = sorted(({
+            "session_id": tracker.session_id,
+            "idle_seconds": round(now - tracker.last_seen, 1),
+            "total_bytes": tracker.total,
+            "keys": dict(tracker.key_sizes),
+            "widget_keys": tracker.widget_keys,
+            "offloaded": any(value.offloaded for value in tracker.offloadable.values()),
+        } for tracker in trackers), key=lambda session: session["total_bytes"], reverse=True)
+
+        return {
+            "sessions": sessions,
+            "session_count": len(sessions),
+            "total_bytes": sum(session["total_bytes"] for session in sessions),
+            "budget_bytes": self.budget_bytes,
+            **self.stats,
+        }
+
+
+# Gestor compartido por el proceso
+_manager: Optional[SessionMemoryManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_session_memory_manager(**settings) -> SessionMemoryManager:
+    """
+    Devuelve el gestor de memoria de sesiones compartido, creándolo la primera vez.
+
+    Args:
+        **settings: Argumentos de SessionMemoryManager (solo se usan al crearlo)
+
+    Returns:
+        SessionMemoryManager: Gestor compartido
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionMemoryManager(**settings)
+        return _manager
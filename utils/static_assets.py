@@ -0,0 +1,106 @@
+import os
+import glob
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Optional
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Raíz de la aplicación (directorio de app.py)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Hoja de estilos fuente y directorio servido por Streamlit en app/static/
+STYLESHEET_SOURCE = os.path.join(APP_ROOT, "assets", "styles.css")
+STATIC_DIR = os.path.join(APP_ROOT, "static")
+STATIC_URL = "app/static"
+
+
+def stylesheet_name(css: str) -> str:
+    """Nombre del archivo de la hoja de estilos, con el hash de su contenido."""
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    return f"styles.{digest}.css"
+
+
+def build_stylesheet(static_dir: str = STATIC_DIR) -> str:
+    """
+    Escribe la hoja de estilos en static_dir con el hash del contenido en el
+    nombre (si no existe ya) y elimina las versiones anteriores.
+
+    Args:
+        static_dir: Directorio servido como app/static
+
+    Returns:
+        str: Nombre del archivo generado
+    """
+    with open(STYLESHEET_SOURCE, encoding="utf-8") as f:
+        css = f.read()
+    name = stylesheet_name(css)
+    path = os.path.join(static_dir, name)
+
+    if not os.path.exists(path):
+        os.makedirs(static_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=static_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(css)
+        os.replace(tmp_path, path)
+
+    for old_path in glob.glob(os.path.join(static_dir, "styles.*.css")):
+        if os.path.basename(old_path) != name:
+            os.remove(old_path)
+    return name
+
+
+class StylesheetLink:
+    """
+    Referencia a la hoja de estilos estática, resuelta una vez por proceso. Si
+    el servido estático no está activado o el archivo no se puede escribir, la
+    hoja se incrusta como <style> (sin la petición externa de fuentes).
+    """
+
+    def __init__(self, static_serving: bool):
+        self.href: Optional[str] = None
+        self.inline_css: Optional[str] = None
+
+        if static_serving:
+            try:
+                self.href = f"{STATIC_URL}/{build_stylesheet()}"
+            except OSError as e:
+                logger.warning("No se pudo generar la hoja de estilos estática: %s", e)
+
+        if self.href is None:
+            with open(STYLESHEET_SOURCE, encoding="utf-8") as f:
+                self.inline_css = f.read()
+
+    def tag(self) -> str:
+        """HTML que se emite en cada ejecución: un <link> o, en su defecto, el <style> completo."""
+        if self.href is not None:
+            return f'<link rel="stylesheet" href="{self.href}">'
+        return f"<style>{self.inline_css}</style>"
+
+    def get_metrics(self) -> Dict[str, object]:
+        """Modo de la hoja de estilos y bytes que se envían en cada ejecución."""
+        return {"mode": "static" if self.href else "inline", "href": self.href,
+                "tag_bytes": len(self.tag().encode("utf-8"))}
+
+
+# Referencia compartida por el proceso
+_stylesheet: Optional[StylesheetLink] = None
+_stylesheet_lock = threading.Lock()
+
+
+def get_stylesheet_link() -> StylesheetLink:
+    """
+    Devuelve la referencia a la hoja de estilos, creándola la primera vez.
+
+    Returns:
+        StylesheetLink: Referencia compartida
+    """
+    global _stylesheet
+    with _stylesheet_lock:
+        if _stylesheet is None:
+            _stylesheet = StylesheetLink(bool(st.get_option("server.enableStaticServing")))
+        return _stylesheet
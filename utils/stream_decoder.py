@@ -0,0 +1,95 @@
+from typing import Any, Dict, Iterable, Iterator
+
+from utils.result_decoder import loads
+
+# Tipos de contenido aceptados para el análisis en streaming
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+SSE_CONTENT_TYPE = "text/event-stream"
+
+
+def iter_ndjson_events(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Decodifica un flujo NDJSON: un objeto JSON por línea.
+
+    Args:
+        lines: Líneas del cuerpo de la respuesta (p. ej. response.iter_lines())
+
+    Yields:
+        Dict: Cada evento con su campo "event"
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if line:
+            yield loads(line)
+
+
+def iter_sse_events(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Decodifica un flujo Server-Sent Events. El nombre del evento (event:) se copia
+    al campo "event" del JSON de los datos (data:).
+
+    Args:
+        lines: Líneas del cuerpo de la respuesta
+
+    Yields:
+        Dict: Cada evento con su campo "event"
+    """
+    event_name = None
+    data_lines = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\r\n")
+
+        # Una línea vacía cierra el evento
+        if not line:
+            if data_lines:
+                event = loads("\n".join(data_lines))
+                if event_name:
+                    event.setdefault("event", event_name)
+                yield event
+            event_name = None
+            data_lines = []
+            continue
+
+        # Comentarios (p. ej. keep-alive)
+        if line.startswith(":"):
+            continue
+
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "event":
+            event_name = value
+        elif field == "data":
+            data_lines.append(value)
+
+    if data_lines:
+        event = loads("\n".join(data_lines))
+        if event_name:
+            event.setdefault("event", event_name)
+        yield event
+
+
+def iter_stream_events(lines: Iterable[bytes], content_type: str) -> Iterator[Dict[str, Any]]:
+    """
+    Decodifica el flujo del análisis según su Content-Type (SSE o NDJSON).
+
+    Eventos esperados:
+        {"event": "section", "section": "<clave>", "items": [{"text": ...}, ...]}
+        {"event": "referencias", "items": [{...}, ...]}
+        {"event": "progress", "progress": <0-100>, "message": "..."}
+        {"event": "error", "message": "..."}
+        {"event": "done"}
+
+    Args:
+        lines: Líneas del cuerpo de la respuesta
+        content_type: Cabecera Content-Type de la respuesta
+
+    Yields:
+        Dict: Cada evento decodificado
+    """
+    if content_type and content_type.split(";")[0].strip() == SSE_CONTENT_TYPE:
+        return iter_sse_events(lines)
+    return iter_ndjson_events(lines)
@@ -0,0 +1,172 @@
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Margen (segundos) antes de la expiración a partir del cual el token ya no se entrega
+EXPIRY_MARGIN_SECONDS = 300
+
+# Anticipación adicional (segundos) con la que se refresca el token en segundo plano
+PREFETCH_SECONDS = 60
+
+# Espera (segundos) antes de reintentar un refresco en segundo plano fallido
+BACKGROUND_RETRY_SECONDS = 30
+
+
+class TokenFetchError(Exception):
+    """Error al obtener un token del endpoint de autenticación."""
+
+
+class TokenProvider:
+    """
+    Proveedor de tokens compartido por todo el proceso.
+
+    Es seguro entre hilos: si varias sesiones encuentran el token vencido al mismo
+    tiempo, solo una hace la solicitud al endpoint de autenticación y el resto
+    espera su resultado. Además, refresca el token en segundo plano antes de que
+    entre en el margen de expiración, de modo que las solicitudes de los usuarios
+    no esperan al endpoint de autenticación.
+    """
+
+    def __init__(self, fetch_token: Callable[[], Tuple[str, int]],
+                 expiry_margin: int = EXPIRY_MARGIN_SECONDS,
+                 prefetch: int = PREFETCH_SECONDS):
+        """
+        Inicializa el proveedor.
+
+        Args:
+            fetch_token: Función que solicita un token nuevo y devuelve
+                (access_token, expires_in). Debe lanzar TokenFetchError si falla.
+            expiry_margin: Margen antes de la expiración en el que el token deja de entregarse
+            prefetch: Anticipación adicional del refresco en segundo plano
+        """
+        self._fetch_token = fetch_token
+        self._expiry_margin = expiry_margin
+        self._prefetch = prefetch
+
+        # Estado del token (se reemplaza siempre como tupla para lecturas sin lock)
+        self._state: Tuple[Optional[str], float, float] = (None, 0.0, 0.0)  # (token, expiry, valid_until)
+
+        # Lock de "single-flight": solo un hilo refresca a la vez
+        self._refresh_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+        # Contadores para diagnóstico (cached_count se incrementa sin lock: es aproximado)
+        self.fetch_count = 0
+        self.background_refresh_count = 0
+        self.cached_count = 0
+
+    @property
+    def token_expiry(self) -> float:
+        """Timestamp de expiración del token actual (0 si no hay token)."""
+        return self._state[1]
+
+    def get_token(self) -> str:
+        """
+        Devuelve un token válido, solicitándolo solo si no hay uno vigente.
+
+        Returns:
+            str: Token de acceso
+
+        Raises:
+            TokenFetchError: Si no hay token vigente y la solicitud falla
+        """
+        token, _, valid_until = self._state
+        if token and time.time() < valid_until:
+            self.cached_count += 1
+            return token
+
+        return self._refresh(force=False)
+
+    def _refresh(self, force: bool) -> str:
+        """
+        Solicita un token nuevo con un único hilo a la vez.
+
+        Args:
+            force: Si es True, refresca aunque el token actual siga vigente
+
+        Returns:
+            str: Token de acceso
+        """
+        with self._refresh_lock:
+            # Otro hilo pudo haber refrescado el token mientras esperábamos el lock
+            token, _, valid_until = self._state
+            if not force and token and time.time() < valid_until:
+                return token
+
+            request_time = time.time()
+            token, expires_in = self._fetch_token()
+            self.fetch_count += 1
+
+            # Si el token dura menos que el margen, usar la mitad de su vida útil
+            margin = min(self._expiry_margin, expires_in / 2)
+            expiry = request_time + expires_in
+            self._state = (token, expiry, expiry - margin)
+
+            # Programar el refresco antes de que el token deje de entregarse
+            self._schedule_refresh(max(expires_in - margin - self._prefetch, expires_in / 4))
+            return token
+
+    def _schedule_refresh(self, delay: float):
+        """Programa un refresco en segundo plano dentro de `delay` segundos."""
+        if self._timer is not None:
+            self._timer.cancel()
+
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        """Refresca el token en segundo plano; si falla, reintenta mientras siga vigente."""
+        try:
+            self._refresh(force=True)
+            self.background_refresh_count += 1
+        except Exception as e:
+            logger.warning("Error al refrescar el token en segundo plano: %s", e)
+            _, _, valid_until = self._state
+            remaining = valid_until - time.time()
+            if remaining > 0:
+                self._schedule_refresh(min(BACKGROUND_RETRY_SECONDS, remaining))
+
+    def hit_counts(self) -> Tuple[int, int]:
+        """Aciertos (token vigente en memoria) y fallos (solicitudes en primer plano) para las métricas."""
+        return self.cached_count, self.fetch_count - self.background_refresh_count
+
+    def invalidate(self):
+        """Descarta el token actual (p. ej. tras un 401 del API)."""
+        with self._refresh_lock:
+            self._state = (None, 0.0, 0.0)
+
+
+# Registro de proveedores por configuración de credenciales (compartido por el proceso)
+_providers: Dict[Tuple[str, str, str], TokenProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_token_provider(auth_url: str, client_id: str, scope: str,
+                       fetch_token: Callable[[], Tuple[str, int]]) -> TokenProvider:
+    """
+    Devuelve el proveedor de tokens compartido para unas credenciales,
+    creándolo la primera vez que se solicita.
+
+    Args:
+        auth_url: URL del endpoint de autenticación
+        client_id: Client ID de Cognito
+        scope: Scope solicitado
+        fetch_token: Función para solicitar tokens (solo se usa al crear el proveedor)
+
+    Returns:
+        TokenProvider: Proveedor compartido
+    """
+    key = (auth_url, client_id, scope)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = TokenProvider(fetch_token)
+            _providers[key] = provider
+            get_metrics_registry().register_cache("token", provider.hit_counts)
+        return provider
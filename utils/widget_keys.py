@@ -0,0 +1,94 @@
+from typing import Dict, List
+
+import streamlit as st
+
+# Widgets con clave versionada: prefijo -> contador de versión en session_state
+VERSIONED_WIDGETS = {
+    "doc_selector": "selector_key",
+}
+
+
+def widget_key(prefix: str) -> str:
+    """Clave vigente de un widget versionado (p. ej. doc_selector_3)."""
+    return f"{prefix}_{st.session_state[VERSIONED_WIDGETS[prefix]]}"
+
+
+def _stats() -> Dict[str, int]:
+    """Contadores de claves de widgets de la sesión."""
+    return st.session_state.setdefault("_widget_key_stats", {"rotations": 0, "reclaimed": 0})
+
+
+def retire_widget_key(key: str) -> bool:
+    """
+    Elimina el estado de un widget que ya no se va a renderizar.
+
+    Streamlit descarta el valor de los widgets que dejan de renderizarse, pero
+    conserva la asociación clave -> widget, que solo se elimina borrando la
+    clave mientras el widget todavía tiene estado (p. ej. en su callback).
+
+    Args:
+        key: Clave del widget
+
+    Returns:
+        bool: True si la clave tenía estado y se eliminó
+    """
+    try:
+        del st.session_state[key]
+    except KeyError:
+        return False
+    _stats()["reclaimed"] += 1
+    return True
+
+
+def rotate_widget_key(prefix: str):
+    """
+    Pasa un widget versionado a una clave nueva (lo que lo resetea) y elimina
+    el estado de la clave anterior. Debe llamarse desde un callback, antes de
+    que termine la ejecución en la que la clave anterior quedó sin renderizar.
+
+    Args:
+        prefix: Prefijo del widget en VERSIONED_WIDGETS
+    """
+    old_key = widget_key(prefix)
+    st.session_state[VERSIONED_WIDGETS[prefix]] += 1
+    _stats()["rotations"] += 1
+    retire_widget_key(old_key)
+
+
+def reclaim_superseded_keys() -> int:
+    """
+    Elimina las claves de versiones anteriores de los widgets versionados que
+    sigan en session_state (p. ej. las rotadas fuera de un callback).
+
+    Returns:
+        int: Claves eliminadas
+    """
+    reclaimed = 0
+    for prefix, counter in VERSIONED_WIDGETS.items():
+        if counter not in st.session_state:
+            continue
+        current = widget_key(prefix)
+        for key in list(st.session_state.keys()):
+            if isinstance(key, str) and key.startswith(f"{prefix}_") and key != current:
+                reclaimed += retire_widget_key(key)
+    return reclaimed
+
+
+def live_widget_keys() -> List[str]:
+    """Claves de widgets versionados con estado en la sesión (debería haber una por widget)."""
+    prefixes = tuple(f"{prefix}_" for prefix in VERSIONED_WIDGETS)
+    return [key for key in st.session_state.keys() if isinstance(key, str) and key.startswith(prefixes)]
+
+
+def get_widget_key_metrics() -> Dict[str, int]:
+    """
+    Métricas de claves de widgets de la sesión.
+
+    Returns:
+        Dict: live_widget_keys, session_keys, rotations y reclaimed
+    """
+    return {
+        "live_widget_keys": len(live_widget_keys()),
+        "session_keys": len(st.session_state.keys()),
+        **_stats(),
+    }